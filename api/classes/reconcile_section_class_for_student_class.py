@@ -10,7 +10,7 @@ Requires: CSV with "Student Name", "Class Name" or "Grade", and "Year" columns
 
 Usage: ./reconcile_section_class_for_student_class.py {filename}
 
-Outputs: CSV with Students, reconciled Class, and Year
+Outputs: CSV with Students, Year, reconciled Class, and its number of Sections
 """
 
 
@@ -22,8 +22,7 @@ def main():
     qs.logger.config(__file__)
 
     filename = sys.argv[1]
-    csv_student_sections = qs.CSV(filename)
-    students = {}
+    csv_student_sections = qs.CSV(filename, stream=True)
 
     if 'Student Name' not in csv_student_sections.cols:
         raise ValueError("'Student Name' column required")
@@ -32,29 +31,29 @@ def main():
     elif 'Year' not in csv_student_sections.cols:
         raise ValueError("'Year' column required.")
 
-    # Make dict of student class info by year and count number of times a course appears
-
-    for record in csv_student_sections:
-        student_name = record['Student Name']
-        if 'Class Name' in record:
-            class_name = record['Class Name']
-        else:
-            class_name = record['Grade']
-        year = record['Year']
-
-        if student_name not in students:
-            students[student_name] = dict()
-    
-        if year not in students[student_name]:
-            students[student_name][year] = dict()
-      
-        if class_name not in students[student_name][year]:
-            students[student_name][year][class_name] = 1
-        else:
-            students[student_name][year][class_name] += 1
-
-    # TO DO: COMPLETE AS NEEDED
-
+    if 'Class Name' in csv_student_sections.cols:
+        class_col = 'Class Name'
+    else:
+        class_col = 'Grade'
+
+    # Count the sections each student has with each class, by year
+    student_sections = qs.Table.from_csv(csv_student_sections)
+    class_counts = student_sections.group_by(
+        ['Student Name', 'Year', class_col],
+        {'Sections': (None, 'count')})
+
+    # The class with the most sections is first for each student and year
+    class_counts = class_counts.sort_by(['Sections'], reverse=True)
+    student_classes = class_counts.group_by(
+        ['Student Name', 'Year'],
+        {'Class': (class_col, 'first'), 'Sections': ('Sections', 'first')})
+    student_classes = student_classes.sort_by(['Student Name', 'Year'])
+
+    filepath = qs.unique_path(
+        csv_student_sections.filepath, suffix='-reconciled-classes')
+    filepath = student_classes.save(filepath)
+    qs.logger.info('Saved {} student classes to {}'.format(
+        len(student_classes), filepath), cc_print=True)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
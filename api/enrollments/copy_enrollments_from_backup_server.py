@@ -3,6 +3,9 @@
 
 Run with Q1 active on live and backup
 
+Only students that aren't already enrolled on live are POSTed, so re-running
+this only sends what's still missing.
+
 CLI usage:
 ./copy_enrollments_from_backup_server.py {schoolcode}
 """
@@ -17,6 +20,7 @@ def main():
     backup = qs.API(schoolcode, 'backup')
     live = qs.API(schoolcode)
 
+    desired_enrollments = {}
     for section_dict in qs.bar(backup.get_sections()):
         section_id = section_dict['id']
         backup_enrollment = backup.get_section_enrollment(section_id)
@@ -24,7 +28,10 @@ def main():
         enrolled_ids = [i['smsStudentStubId'] for i in backup_enrollment]
 
         if enrolled_ids:
-            live.post_section_enrollment(section_id, enrolled_ids)
+            desired_enrollments[section_id] = enrolled_ids
+
+    summary = live.sync_section_enrollments(desired_enrollments)
+    qs.logger.info('Enrollment copied', summary, cc_print=True)
 
 if __name__ == '__main__':
     main()
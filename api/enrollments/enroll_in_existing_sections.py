@@ -9,7 +9,8 @@ Requires: CSV must have the following columns: "Student ID", "Section ID"
 
 Usage: ./enroll_in_existing_sections.py {school code} {filename.csv}
 
-Returns: Nothing - just enrolls students in their sections.
+Returns: Nothing - just enrolls students in their sections. Students that are
+already enrolled aren't POSTed again, so the script is safe to re-run.
 
 """
 
@@ -23,11 +24,8 @@ def main():
     filename = sys.argv[2]
     q = qs.API(schoolcode)
     csv_enrollments = qs.CSV(filename)
-    section_info = {}
     student_enrollments = {}
 
-    # Get Section Info
-
     if 'Section ID' not in csv_enrollments.cols:
         qs.logger.critical('"Section ID" column required. Current columns: ',
             csv_enrollments.cols)
@@ -37,28 +35,16 @@ def main():
 
     qs.logger.info('Setting up enrollment info from csv data...', cc_print=True)
     for enrollment in csv_enrollments:
-        section_name = enrollment['Section Name']
         section_id = enrollment['Section ID']
         student_id = enrollment['Student ID']
-        if 'Section Code' in enrollment:
-            section_code = enrollment['Section Code']
-        else:
-            section_code = enrollment['Section Name']
 
         if section_id not in student_enrollments:
             student_enrollments[section_id] = list()
         student_enrollments[section_id].append(student_id)
 
-        section_info[section_id] = {'section_name': section_name,
-            'section_id': section_id, 'section_code': section_code,
-            'student_ids': student_enrollments[section_id]}
-
     qs.logger.info('POSTing section enrollments...', cc_print=True)
-    for section in qs.bar(section_info):
-        section_id = section_info[section]['section_id']
-        students = section_info[section]['student_ids']
-
-        new_enrollment = q.post_section_enrollment(section_id, students)
+    summary = q.sync_section_enrollments(student_enrollments)
+    qs.logger.info('Section enrollments POSTed', summary, cc_print=True)
 
 if __name__ == '__main__':
     main()
@@ -99,24 +99,32 @@ def main():
 
     qs.logger.info(sections)
 
-    # POST assignment and POST grades to it
-    qs.logger.info('POSTing assignments...', cc_print=True)
+    # POST each assignment followed by its grades, sections concurrently
+    qs.logger.info('POSTing assignments and grades...', cc_print=True)
 
-    for section in qs.bar(sections):
+    uploads = []
+    for section in sections:
         for assign_name in sections[section]:
             assign_data = sections[section][assign_name]
-            section_id = assign_data['section_id']
-
-            new_grade = q.post_assignment_with_grades(section,
-                assign_data['assign_name'], assign_data['assign_date'],
-                assign_data['total'], assign_data['cat_id'],
-                assign_data['grade_scale'], assign_data['grades_data'])
-            
-            qs.logger.info('--> NEW ASSIGNMENT ID: ', new_grade)
-            qs.logger.info('--> NEW SECTION ID: ', section_id)
-
-            new_assignments.append({'Assignment ID': new_grade,
-                'Section ID': section_id})
+            uploads.append({
+                'section_id': assign_data['section_id'],
+                'name': assign_data['assign_name'],
+                'date': assign_data['assign_date'],
+                'total_marks_possible': assign_data['total'],
+                'column_category_id': assign_data['cat_id'],
+                'grading_scale_id': assign_data['grade_scale'],
+                'grades': assign_data['grades_data'],
+            })
+
+    for posted in q.post_assignments_with_grades(uploads):
+        if posted['assignment id'] is None or posted['grades failed']:
+            qs.logger.error('Assignment or grades not POSTed', posted,
+                cc_print=True)
+        if posted['assignment id'] is not None:
+            qs.logger.info('--> NEW ASSIGNMENT ID: ', posted['assignment id'])
+            qs.logger.info('--> NEW SECTION ID: ', posted['section id'])
+            new_assignments.append({'Assignment ID': posted['assignment id'],
+                'Section ID': posted['section id']})
 
     qs.logger.info('All Assignments are posted....', cc_print=True)
     filepath = qs.unique_path(csv_grades.filepath, suffix='_posted_asignments')
@@ -7,8 +7,12 @@
 Skips sections where there are no students without valid grades, because then
 all those students are staying in Q1.
 
+Each POST is recorded in a qs.Journal (rolling_migration.journal.jsonl by
+default), so if the script dies, running it again picks up where it left off
+instead of creating duplicate assignments.
+
 CLI Usage:
-./upload.py {schoolcode}
+./upload.py {schoolcode} [journal_filename]
 """
 
 import sys
@@ -19,48 +23,75 @@ import qs
 def main():
     qs.logger.config(__file__)
     schoolcode = sys.argv[1]
+    journal_path = (
+        sys.argv[2]
+        if len(sys.argv) > 2
+        else 'rolling_migration.journal.jsonl')
     q = qs.API(schoolcode)
     data = json.load(open('rolling_migration.json'))
+    journal = qs.Journal(journal_path)
+    qs.logger.info('Journal: {}, {} steps already done'.format(
+        journal_path, len(journal)), cc_print=True)
 
-    for old_section_id, old_section_dict in qs.bar(data.iteritems()):
+    for old_section_id in journal.bar(data):
+        old_section_dict = data[old_section_id]
         new_section = q.match_section(old_section_id)
         new_section_id = new_section['id']
         enrolled_no_valid_grades = old_section_dict['enrolled_no_valid_grades']
         invalid_grades = old_section_dict['invalid_grades']
 
-        if not enrolled_no_valid_grades: continue
-
-        q.post_section_enrollment(new_section_id, enrolled_no_valid_grades)
-
-        invalid_by_assignment = {i['assignmentId']: [] for i in invalid_grades}
-        for grade in invalid_grades:
-            if grade['isFinalGrade'] is False:
-                invalid_by_assignment[grade['assignmentId']].append(grade)
-
-        for assignment_id, grades in invalid_by_assignment.iteritems():
-            old_assignment = q.get_assignment(assignment_id)
-            new_assignment = q.post_assignment(
-                new_section_id,
-                old_assignment.get('name'),
-                old_assignment.get('date'),
-                old_assignment.get('totalMarksPossible'),
-                old_assignment.get('categoryId'),
-                old_assignment.get('gradingScaleId'))
-
-            grades_to_upload = []
-            for grade in grades:
-                student_id = grade['studentId']
-                if student_id in enrolled_no_valid_grades:
-                    grades_to_upload.append(grade)
-                else:
-                    warning = ("student {} has some, but not all valid grades "
-                        "for section {}").format(student_id, old_section_id)
-                    qs.logger.warning(warning)
-
-            q.post_grades(
-                new_section_id,
-                new_assignment['id'],
-                grades_to_upload)
+        if enrolled_no_valid_grades:
+            upload_section(q, journal, old_section_id, new_section_id,
+                enrolled_no_valid_grades, invalid_grades)
+
+        # marks the whole section as done for journal.bar
+        journal.run(old_section_id, lambda: new_section_id)
+
+
+def upload_section(q, journal, old_section_id, new_section_id,
+        enrolled_no_valid_grades, invalid_grades):
+    journal.run(
+        (old_section_id, 'enrollment'),
+        q.post_section_enrollment,
+        new_section_id,
+        enrolled_no_valid_grades,
+        critical=True)
+
+    invalid_by_assignment = {i['assignmentId']: [] for i in invalid_grades}
+    for grade in invalid_grades:
+        if grade['isFinalGrade'] is False:
+            invalid_by_assignment[grade['assignmentId']].append(grade)
+
+    for assignment_id, grades in invalid_by_assignment.iteritems():
+        old_assignment = q.get_assignment(assignment_id)
+        new_assignment = journal.run(
+            (old_section_id, assignment_id, 'assignment'),
+            q.post_assignment,
+            new_section_id,
+            old_assignment.get('name'),
+            old_assignment.get('date'),
+            old_assignment.get('totalMarksPossible'),
+            old_assignment.get('categoryId'),
+            old_assignment.get('gradingScaleId'),
+            critical=True)
+
+        grades_to_upload = []
+        for grade in grades:
+            student_id = grade['studentId']
+            if student_id in enrolled_no_valid_grades:
+                grades_to_upload.append(grade)
+            else:
+                warning = ("student {} has some, but not all valid grades "
+                    "for section {}").format(student_id, old_section_id)
+                qs.logger.warning(warning)
+
+        journal.run(
+            (old_section_id, assignment_id, 'grades'),
+            q.post_grades,
+            new_section_id,
+            new_assignment['id'],
+            grades_to_upload,
+            critical=True)
 
 if __name__ == '__main__':
     main()
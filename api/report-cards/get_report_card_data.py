@@ -34,6 +34,10 @@ def main():
         raise ValueError("'Report Cycle ID' column is required.")
 
     qs.logger.info('GETting all report card data for each student enrollment...', cc_print=True)
+    q.get_report_cards([
+        (i['Student ID'], i['Report Cycle ID'])
+        for i in csv_report_card_data
+    ])
     for csv_student in qs.bar(csv_report_card_data):
         student_id = csv_student['Student ID']
         section_id = csv_student['Section ID']
@@ -40,6 +40,10 @@ def main():
     if 'Report Cycle ID' not in csv_student_report_cycles.cols:
         raise ValueError("'Report Cycle ID' column required.")
 
+    q.get_report_cards([
+        (i['Student ID'], i['Report Cycle ID'])
+        for i in csv_student_report_cycles
+    ])
     for csv_student in qs.bar(csv_student_report_cycles):
         student_id = csv_student['Student ID']
         report_cycle_id = csv_student['Report Cycle ID']
@@ -18,8 +18,12 @@ Takes a CSV with the following format:
 
 See examples/import_section_level.example.csv for an example import file.
 
+Each student's POST is recorded in a qs.Journal ({csv_filename}.journal.jsonl
+by default), so if the script dies, running it again skips the students that
+were already imported.
+
 CLI Usage:
-python import_section_level.py {schoolcode} {csv_filename}
+python import_section_level.py {schoolcode} {csv_filename} [journal_filename]
 """
 
 import sys
@@ -30,6 +34,10 @@ def main():
     qs.logger.config(__file__)
     schoolcode = sys.argv[1]
     filename = sys.argv[2]
+    journal_path = (
+        sys.argv[3]
+        if len(sys.argv) > 3
+        else filename + '.journal.jsonl')
 
     q = qs.API(schoolcode)
     csv = qs.CSV(filename)
@@ -49,9 +57,20 @@ def main():
         rc.add_section_data(section_id, identifier, value)
 
     report_cycle_id = q.get_active_report_cycle()['id']
-    for student_id, rc in student_rcs.iteritems():
-        rc_data = rc.full_report_card_data()
-        q.post_report_card_section_level(student_id, report_cycle_id, rc_data)
+    journal = qs.Journal(journal_path)
+    qs.logger.info('Journal: {}, {} students already done'.format(
+        journal_path, len(journal)), cc_print=True)
+
+    key = lambda student_id: (student_id, report_cycle_id)
+    for student_id in journal.bar(student_rcs, key=key):
+        rc_data = student_rcs[student_id].full_report_card_data()
+        journal.run(
+            key(student_id),
+            q.post_report_card_section_level,
+            student_id,
+            report_cycle_id,
+            rc_data,
+            critical=True)
 
 
 class StudentRC(object):
@@ -0,0 +1,47 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Run a script for many schools at once, each school in its own process.
+
+The script is run as if it was called with each schoolcode as its first
+argument, followed by the rest of the arguments. Any {schoolcode} in those
+arguments is replaced with the schoolcode.
+
+Each school's logs, printed output and output files are saved in its own
+directory, {script name}-schools/{schoolcode}/, and a report of which schools
+succeeded and how long each took is saved as
+{script name}-schools/school_report.csv.
+
+CLI Usage:
+./run_for_schools.py {schoolcodes} {script} [{script args} ...]
+
+schoolcodes is a comma-separated list of schoolcodes, or 'all' for every
+school in the API key store.
+
+Example:
+./run_for_schools.py school1,school2 students/add_student_ids.py {schoolcode}.csv
+"""
+
+import os
+import sys
+import qs
+
+
+def main():
+    qs.logger.config(__file__)
+    schoolcodes = sys.argv[1]
+    script_path = sys.argv[2]
+    script_args = sys.argv[3:]
+
+    schoolcodes = (
+        qs.stored_schoolcodes()
+        if schoolcodes == 'all'
+        else schoolcodes.split(','))
+    script_name = os.path.splitext(os.path.basename(script_path))[0]
+
+    qs.run_script_for_schools(
+        script_path,
+        script_args,
+        schoolcodes=schoolcodes,
+        output_dir='{}-schools'.format(script_name))
+
+if __name__ == '__main__':
+    main()
@@ -47,6 +47,9 @@ def main():
     qs.logger.info('POSTing sections...', cc_print=True)
 
     new_sections = q.post_sections(sections_dict=sections)
+    failed = [k for k, v in new_sections.iteritems() if v is None]
+    if failed:
+        qs.logger.error('Sections failed to POST', failed)
 
 if __name__ == '__main__':
     main()
@@ -2,7 +2,10 @@
 """Add a Student ID to each student row based on the First and Last or Full
 Name columns.
 
-If ignore_case is true, this will ignore case when matching student names
+If ignore_case is true, this will ignore case when matching student names.
+Names that aren't an exact match are matched to the most similar name in the
+db (see qs.NameResolver), and get a "Match Confidence" column to check them
+by.
 
 This doesn't save unless it finds matches for **all students in the csv**.
 
@@ -10,8 +13,8 @@ Usage:
     ./add_student_id {schoolcode} {filename.csv} {opt ignore_case} {opt enrolled_only}
 
 Requires:
-    A CSV with "First" and "Last" columns, with an exact name match to the
-        provided school database for each student.
+    A CSV with "First" and "Last" (or "Full Name") columns, with a name
+        match in the provided school database for each student.
 
 Outputs:
     The same CSV, but with a "Student ID" column.
@@ -37,7 +40,7 @@ def main():
         raise ValueError('"Full Name" or "First" and "Last" columns required.')
 
     if enrolled_only is True:
-        db_students = q.get_students()
+        db_students = q.get_students(projection='id_and_name')
     elif enrolled_only is False:
         db_students = q.get_students(
             show_has_left=True,
@@ -52,28 +55,32 @@ def main():
     else:
         qs.logger.info('Student names are unique.')
 
-    if ignore_case is True:
-        for student in db_students:
-            student['fullName'] = student['fullName'].lower()
-    db_by_name = qs.dict_list_to_dict(db_students, 'fullName')
+    resolver = qs.NameResolver(db_students, ignore_case=ignore_case)
 
     student_names_not_matched = set()
+    similar_names = {}
     for csv_student in csv_students:
         if 'Full Name' in csv_student:
             csv_full_name = csv_student['Full Name']
         else:
-            csv_full_name = '{}, {}'.format(
+            csv_full_name = u'{}, {}'.format(
                 csv_student['Last'],
                 csv_student['First'])
 
-        csv_original_full_name = csv_full_name
-        if ignore_case:
-            csv_full_name = csv_full_name.lower()
-        db_match = db_by_name.get(csv_full_name)
-        if db_match:
-            csv_student['Student ID'] = db_match['id']
+        match = resolver.resolve(csv_full_name)
+        if match:
+            csv_student['Student ID'] = match['record']['id']
+            if match['confidence'] < 1:
+                csv_student['Match Confidence'] = match['confidence']
+                similar_names[csv_full_name] = match['record']['fullName']
         else:
-            student_names_not_matched.add(csv_original_full_name)
+            student_names_not_matched.add(csv_full_name)
+
+    if similar_names:
+        qs.logger.warning(
+            ('{} students were matched to a similar name in the db, see the '
+                'Match Confidence column'.format(len(similar_names))),
+            similar_names)
 
     if student_names_not_matched:
         qs.logger.warning(
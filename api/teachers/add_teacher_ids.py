@@ -6,6 +6,9 @@ duplicates in the csv and database
 
 Requires: Database with Teacher Names, under a 'Teacher' column. The
 'ignore_case' param is optional
+
+Names that aren't an exact match are matched to the most similar name in the
+db (see qs.NameResolver), and get a 'Match Confidence' column to check them by.
 Usage: ./add_teacher_ids.py {schoolcode} {filename} {ignore_case}
 
 Returns: the same csv, but with teacher ids
@@ -37,24 +40,28 @@ def main():
     else:
         qs.logger.info('Teacher names are unique.')
 
-    if ignore_case is True:
-        for teacher in db_teachers:
-            teacher['fullName'] = teacher['fullName'].lower()
-    db_by_name = qs.dict_list_to_dict(db_teachers, 'fullName')
+    resolver = qs.NameResolver(db_teachers, ignore_case=ignore_case)
 
     teacher_names_not_matched = set()
+    similar_names = {}
     for csv_teacher in csv_teachers:
         csv_full_name = csv_teacher['Teacher Name']
 
-        if ignore_case:
-            csv_full_name = csv_full_name.lower()
-
-        db_match = db_by_name.get(csv_full_name)
-        if db_match:
-            csv_teacher['Teacher ID'] = db_match['id']
+        match = resolver.resolve(csv_full_name)
+        if match:
+            csv_teacher['Teacher ID'] = match['record']['id']
+            if match['confidence'] < 1:
+                csv_teacher['Match Confidence'] = match['confidence']
+                similar_names[csv_full_name] = match['record']['fullName']
         else:
             teacher_names_not_matched.add(csv_full_name)
 
+    if similar_names:
+        qs.logger.warning(
+            ('{} teachers were matched to a similar name in the db, see the '
+                'Match Confidence column'.format(len(similar_names))),
+            similar_names)
+
     if teacher_names_not_matched:
         qs.logger.warning(
             ('{} Teachers in the file were not found in the db'
@@ -0,0 +1,65 @@
+"""
+Export Transcript Values
+
+This script takes a CSV of Student IDs and exports every value on those
+students' transcripts to a flat CSV, with one row per student, section and
+identifier. Transcript-level values have an empty 'Section ID'. All of the
+transcripts are downloaded once (concurrently), so any number of identifiers
+can be exported in a single run.
+
+The output has the same columns as the import file for
+import_rc_section_level.py:
+    'Student ID'
+    'Section ID'
+    'Identifier'
+    'Value'
+
+Requires: CSV with 'Student ID' column
+
+Usage: ./export_transcript_values.py {schoolcode} {server} {filename} [{identifier} ...]
+
+Returns: CSV of transcript values. If identifiers are supplied, only those
+identifiers are exported.
+"""
+
+import qs
+import sys
+
+
+def main():
+    qs.logger.config(__file__)
+
+    schoolcode = sys.argv[1]
+    server = sys.argv[2]
+    filename = sys.argv[3]
+    identifiers = sys.argv[4:] or None
+    q = qs.API(schoolcode, server)
+    csv_students = qs.CSV(filename)
+
+    if 'Student ID' not in csv_students.cols:
+        raise ValueError("'Student ID' column required.")
+
+    qs.logger.info('GETting all transcripts...', cc_print=True)
+    student_ids = [i['Student ID'] for i in csv_students]
+    values = q.iter_transcript_values(student_ids, identifiers=identifiers)
+    rows = (
+        {
+            'Student ID': i['studentId'],
+            'Section ID': i['sectionId'],
+            'Identifier': i['identifier'],
+            'Value': i['value'],
+        }
+        for i in values
+    )
+
+    filepath = qs.unique_path(csv_students.filepath, suffix='-transcripts')
+    qs.write_csv(rows, filepath, column_headers=[
+        'Student ID',
+        'Section ID',
+        'Identifier',
+        'Value',
+    ])
+    qs.logger.info('Transcript values saved to:', filepath, cc_print=True)
+
+if __name__ == '__main__':
+    main()
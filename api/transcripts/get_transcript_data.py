@@ -41,6 +41,7 @@ def main():
         raise ValueError("'Level' param not defined properly. Please chose 'section' or 'transcript'.")
 
     qs.logger.info('GETting all transcript data for each student enrollment...', cc_print=True)
+    q.get_transcripts([i['Student ID'] for i in csv_transcript_data])
     for csv_student in qs.bar(csv_transcript_data):
         student_id = csv_student['Student ID']
 
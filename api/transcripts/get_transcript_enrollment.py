@@ -36,6 +36,7 @@ def main():
     if 'Student ID' not in csv_student_report_cycles.cols:
         raise ValueError("'Student ID' column required.")
 
+    q.get_transcripts([i['Student ID'] for i in csv_student_report_cycles])
     for csv_student in qs.bar(csv_student_report_cycles):
         student_id = csv_student['Student ID']
         if 'Full Name' in csv_student:
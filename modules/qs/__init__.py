@@ -9,7 +9,16 @@ import messages
 
 # import __all__ from modules
 from rest_foundation import *
+from concurrency import *
+from pipeline import *
+from journal import *
+from request_plan import *
+from read_routing import *
+from multi_school import *
+from field_profiles import *
 from csv_tools import *
+from name_resolution import *
+from table import *
 from util import *
 from rate_limiting import *
 from rest_request_wrappers import *
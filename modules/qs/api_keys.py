@@ -4,6 +4,7 @@ which is stored in ~/API keys.json
 """
 
 import json
+import threading
 import qs
 import os
 
@@ -12,6 +13,9 @@ SAMPLE_API_KEY_STORE = {
     "qs:live:qstools": "qstools.053904ef-90c1-3f94-bc84-cc95168f4f20"
 }
 
+# guards the read-modify-write of the key store file
+_lock = threading.RLock()
+
 
 def set(key, api_key):
     """Set the key/api_key in the API key store.
@@ -23,10 +27,11 @@ def set(key, api_key):
         api_key: the value to store
     """
     if api_key:
-        db = _get_db()
-        db_key = _generate_key(key)
-        db[db_key] = api_key
-        _save_db(db)
+        with _lock:
+            db = _get_db()
+            db_key = _generate_key(key)
+            db[db_key] = api_key
+            _save_db(db)
     else:
         raise ValueError("'{}' isn't a valid API key".format(api_key))
 
@@ -47,20 +52,27 @@ def get(key):
         raise KeyError("{} isn't a key in the API key store.".format(key))
 
 
+def keys():
+    """All of the keys in the API key store, colon-delimited as stored."""
+    return sorted(_get_db())
+
+
 def remove(key):
     """Remove a key from the key store"""
-    db = _get_db()
-    db_key = _generate_key(key)
-    if db_key in db:
-        del db[db_key]
-        _save_db(db)
-        print "Removed {} from the API key store".format(db_key)
-    else:
-        raise KeyError("{} isn't a key in the API key store.".format(key))
+    with _lock:
+        db = _get_db()
+        db_key = _generate_key(key)
+        if db_key in db:
+            del db[db_key]
+            _save_db(db)
+            print "Removed {} from the API key store".format(db_key)
+        else:
+            raise KeyError("{} isn't a key in the API key store.".format(key))
 
 
 def invalidate():
-    os.remove(_get_path())
+    with _lock:
+        os.remove(_get_path())
 
 
 def _generate_key(str_or_list_key):
@@ -87,18 +99,21 @@ def _get_db():
     """Open and return the entire API key db. If the db isn't found,
     _create_db() is called
     """
-    _create_db_if_necessary()
-    with open(_get_path()) as f:
-        return json.load(f)
+    with _lock:
+        _create_db_if_necessary()
+        with open(_get_path()) as f:
+            return json.load(f)
 
 
 def _save_db(db):
-    """Save the db to disk. Just as in _get_db(), if the db isn't found,
-    _create_db() is called firstrna
+    """Save the db to disk. It's written to a temporary file that then
+    replaces the db, so a reader (even in another process) never sees a half
+    written db.
     """
-    _create_db_if_necessary()
-    with open(_get_path(), 'w') as f:
+    temp_path = '{}.{}.tmp'.format(_get_path(), os.getpid())
+    with open(temp_path, 'w') as f:
         json.dump(db, f, indent=4, sort_keys=True)
+    os.rename(temp_path, _get_path())
 
 
 def _create_db_if_necessary():
@@ -0,0 +1,146 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Run blocking work, such as API requests, across a bounded pool of threads.
+
+Rate limiting still happens per server in qs.rate_limiting, so the pool only
+overlaps the time spent waiting on the network - it doesn't get around the
+limits of the server.
+
+CPU bound work, like transforming every row of a big CSV, doesn't get faster
+with threads. process_imap runs it across a pool of processes instead.
+"""
+
+import itertools
+import multiprocessing
+import sys
+from collections import deque
+from multiprocessing.pool import ThreadPool
+import qs
+
+DEFAULT_WORKERS = 5
+
+# the number of items process_imap sends to a process at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+# process_imap waits on results with a timeout, since without one Ctrl-C
+# can't interrupt the wait in Python 2
+_RESULT_TIMEOUT = 60 * 60 * 24
+
+
+def concurrent_map(func, items, workers=DEFAULT_WORKERS, desc=None):
+    """Like map(func, items), but func is called from a pool of threads.
+
+    Results are returned in the same order as items. If any call raises
+    (including the SystemExit from qs.logger.critical), the exception is
+    re-raised here, in the calling thread.
+
+    Args:
+        workers: the max number of calls to func running at once.
+        desc: if supplied, show a qs.bar with this description.
+    """
+    return [
+        result for _, result
+        in concurrent_imap(func, items, workers=workers, desc=desc)
+    ]
+
+
+def concurrent_imap(func, items, workers=DEFAULT_WORKERS, desc=None,
+        ordered=True):
+    """Generator version of concurrent_map that yields (item, result) tuples
+    as soon as they're ready.
+
+    Since the results are consumed in the calling thread, it's safe to add
+    them to a cache (or anything else that isn't thread safe) as they come in.
+    If the generator is stopped early, no further calls to func are started.
+
+    Args:
+        ordered: if False, results are yielded in the order they finish
+            instead of the order of items.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    pool = ThreadPool(max(1, min(workers, len(items))))
+    try:
+        call = _CapturingCall(func)
+        outcomes = (
+            pool.imap(call, items)
+            if ordered
+            else pool.imap_unordered(call, items))
+        if desc is not None:
+            outcomes = qs.bar(outcomes, desc=desc, total=len(items))
+
+        for item, exc_info, result in outcomes:
+            if exc_info:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            yield item, result
+    finally:
+        pool.terminate()
+
+
+class _CapturingCall(object):
+    """Wrap func so that every exception, even SystemExit, is passed back to
+    the calling thread instead of killing the worker thread.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, item):
+        try:
+            return item, None, self.func(item)
+        except BaseException:
+            return item, sys.exc_info(), None
+
+
+def process_imap(func, items, processes=None, chunk_size=None):
+    """Like itertools.imap(func, items), but func is called in a pool of
+    processes, for CPU bound work that threads can't speed up.
+
+    Items are sent to the pool in chunks, with at most two chunks per process
+    waiting at a time, so items can be a generator of more than fits in
+    memory. Results are yielded in the same order as items. If func raises,
+    the exception is re-raised here.
+
+    func, items and results are pickled to pass them between processes, so
+    func must be a module level function (not a lambda or method).
+
+    Args:
+        processes: the number of worker processes. Defaults to the number of
+            CPUs. With 1, func is just called in this process.
+        chunk_size: the number of items sent to a process at a time. Defaults
+            to DEFAULT_CHUNK_SIZE.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    if processes == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        pending = deque()
+        for chunk in _chunks(items, chunk_size or DEFAULT_CHUNK_SIZE):
+            pending.append(pool.apply_async(_map_chunk, (func, chunk)))
+            if len(pending) >= processes * 2:
+                for result in pending.popleft().get(_RESULT_TIMEOUT):
+                    yield result
+        while pending:
+            for result in pending.popleft().get(_RESULT_TIMEOUT):
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_chunk(func, chunk):
+    return [func(item) for item in chunk]
@@ -1,7 +1,26 @@
 #!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Reading and writing CSVs.
 
+qs.CSV reads a whole CSV into memory. For CSVs too big for that, read with
+qs.iter_csv (or qs.CSV(filepath, stream=True)) and write with qs.CSVWriter,
+which both handle one row at a time:
+
+    with qs.CSVWriter(output_path, ['Name', 'Grade']) as writer:
+        for row in qs.iter_csv(input_path, required_cols=['Name', 'Grade']):
+            writer.writerow(row)
+
+To fill in the repeated values a pivot table leaves blank, stream its rows
+through qs.forward_fill(csv, qs.pivot_cols_to_fill(csv, csv.cols)).
+
+To read only some rows of a big CSV, like csv[-1] or csv[1000:1100],
+qs.IndexedCSV(filepath) parses just those rows, using a saved index of where
+each row starts.
+"""
+
+import array
 import csv
 import json
+import mmap
 import os
 from collections import OrderedDict
 import qs
@@ -25,7 +44,9 @@ def write_csv(rows, filepath, overwrite=False, column_headers=None):
 
     By default, the column headers will be alphabetically sorted.
 
-    To specify custom column headers/sorting, supply the column_headers arg
+    To specify custom column headers/sorting, supply the column_headers arg.
+    With column_headers, rows can be any iterable, such as a generator, and
+    each row is written as it's produced.
 
     By default, the filepath is made unique using the default behavior of
     qs.unique_path.
@@ -49,39 +70,221 @@ def write_csv(rows, filepath, overwrite=False, column_headers=None):
             column_headers.update(row.keys())
         column_headers = sorted(list(column_headers))
 
-    if overwrite is False:
-        filepath = qs.unique_path(filepath, extension='csv')
+    with CSVWriter(filepath, column_headers, overwrite=overwrite) as writer:
+        writer.writerows(rows)
 
+
+def iter_csv(filepath, required_cols=None, encoding=None):
+    """Read a CSV one row at a time, so it never has to fit in memory.
+
+    Yields the same rows as iterating over qs.CSV(filepath): dicts with
+    unicode keys and values, skipping empty rows.
+
+    Args:
+        required_cols: a list of columns the CSV must have. If any are
+            missing, a ValueError is raised before any rows are read.
+        encoding: the encoding of the file. By default, it's detected from
+            the start of the file with qs.detect_encoding.
+    """
+    encoding = encoding or qs.detect_encoding(filepath)
+    with open(filepath, 'rU') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        _check_cols(header, required_cols, filepath)
+        # decoded once, instead of for every row
+        keys = [_sanitized(col, encoding) for col in header]
+        for values in reader:
+            if _is_empty_row(values, len(keys)):
+                continue
+            yield _row_dict(keys, values, encoding)
+
+
+def pivot_cols_to_fill(rows, cols):
+    """The columns of a pivot table that forward_fill should fill: every
+    column in cols up to the first one with no empty cells. Blank cells after
+    that column are blank data, not repeated values left out.
+
+    Reads the rows once, so they can be a streaming CSV (but not a one-time
+    generator that's needed again for forward_fill).
+    """
+    has_empty = set()
+    for row in rows:
+        for col in cols:
+            if not row.get(col):
+                has_empty.add(col)
+    to_fill = []
+    for col in cols:
+        if col not in has_empty:
+            break
+        to_fill.append(col)
+    return to_fill
+
+
+def forward_fill(rows, cols):
+    """Fill in each empty cell in cols with the last value above it in the
+    same column, like filling in a pivot table. Cells before a column's first
+    value are left empty.
+
+    A generator that fills each row in place and yields it, keeping only the
+    last value of each column, so it works on a streaming CSV or any other
+    iterable of dicts without reading them all into memory.
+    """
+    last_vals = dict.fromkeys(cols)
     for row in rows:
-        _sanitized_row_for_csv(row)
+        for col in cols:
+            val = row.get(col)
+            if val:
+                last_vals[col] = val
+            else:
+                row[col] = last_vals[col]
+        yield row
+
+
+class CSVWriter(object):
+    """Writes a CSV one row at a time, as rows are produced.
+
+    Rows are dicts like in write_csv, and must only have keys in
+    column_headers. Use it as a context manager (or call close()):
 
-    with open(filepath, 'w') as f:
-        writer = csv.DictWriter(f, column_headers)
-        writer.writeheader()
+        with qs.CSVWriter('output.csv', ['Name', 'Grade']) as writer:
+            writer.writerow({'Name': 'Jane', 'Grade': 'A'})
+
+    Args:
+        column_headers: the columns to write, in order.
+        overwrite: by default, the filepath is made unique with
+            qs.unique_path. To overwrite the file at filepath, set overwrite
+            to True.
+
+    Attributes:
+        filepath: the path being written to.
+    """
+
+    def __init__(self, filepath, column_headers, overwrite=False):
+        filepath = os.path.expanduser(filepath)
+        if overwrite is False:
+            filepath = qs.unique_path(filepath, extension='csv')
+        self.filepath = filepath
+        self._file = open(filepath, 'w')
+        self._writer = csv.DictWriter(
+            self._file, [_encoded(i) for i in column_headers])
+        self._writer.writeheader()
+
+    def writerow(self, row):
+        self._writer.writerow(_sanitized_row_for_csv(row))
+
+    def writerows(self, rows):
         for row in rows:
-            writer.writerow(row)
+            self.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
-def dict_to_csv(data_dict, cols):
+def dict_to_csv(data_dict, cols, filepath, overwrite=False):
     """Take a data dict and write it to disk as a CSV.
-    Can then be opened up as a CSV obj.
+    Can then be opened up as a CSV obj. Returns the filepath it was written
+    to.
+
+    This is the reverse of CSVTree.tree(): each path from the root to a leaf
+    is a row, and a leaf that's a list is a row for each of its values.
 
     Args:
         cols: columns to write to CSV. Each level of dict should be a column
     """
-    # TODO: implement. Essentially is the reverse of CSV.as_tree()
+    with CSVWriter(filepath, cols, overwrite) as writer:
+        writer.writerows(_tree_rows(data_dict, cols))
+    return writer.filepath
+
+
+def _tree_rows(data_dict, cols):
+    """The rows of a tree from CSVTree.tree(), one at a time."""
+    branch_cols, leaf_col = cols[:-1], cols[-1]
+    # (node, the values of its parents) pairs, so deep trees don't recurse
+    stack = [(data_dict, ())]
+    while stack:
+        node, path = stack.pop()
+        depth = len(path)
+        children = sorted(node.iteritems(), reverse=True)
+        if depth < len(branch_cols) - 1:
+            stack.extend((child, path + (key,)) for key, child in children)
+            continue
+        for key, leaf in reversed(children):
+            row = dict(zip(branch_cols, path + (key,)))
+            for val in leaf if isinstance(leaf, list) else [leaf]:
+                row[leaf_col] = val
+                yield dict(row)
 
 
 def _sanitized_row_for_csv(row):
+    """A copy of row with every value as a str, ready for a csv writer."""
+    sanitized = {}
     for key, val in row.iteritems():
+        key = _encoded(key)
         if not val:
-            row[key] = ''
+            sanitized[key] = ''
         elif type(val) is list:
-            row[key] = FLATTEN_DELIM.join([str(i for i in val)])
+            sanitized[key] = FLATTEN_DELIM.join([str(i) for i in val])
+        elif isinstance(val, unicode):
+            sanitized[key] = _encoded(val)
         elif type(val) is not str:
-            row[key] = str(val)
+            sanitized[key] = str(val)
+        else:
+            sanitized[key] = val
+    return sanitized
+
+
+def _encoded(val):
+    return val.encode('utf-8') if isinstance(val, unicode) else val
+
+
+def _sanitized(val, encoding=None):
+    """Decode a key or value read from a CSV into unicode."""
+    if not isinstance(val, basestring):
+        return val
+    if isinstance(val, unicode):
+        return val
+    elif val:
+        return qs.unicode_decode(val, encoding)
+    else:
+        return None
+
+
+def _row_dict(keys, values, encoding):
+    """A row of values read from a CSV, as a dict of the same sanitized
+    values that csv.DictReader rows have: values past the last key are a list
+    under None, and keys without a value are None.
+    """
+    row = dict(zip(keys, [_sanitized(val, encoding) for val in values]))
+    if len(values) > len(keys):
+        row[None] = values[len(keys):]
+    for key in keys[len(values):]:
+        row[key] = None
     return row
 
+
+def _is_empty_row(values, key_count):
+    # a row with more values than keys has a list of them under None, which
+    # csv.DictReader rows kept even when they're all empty
+    return not any(values) and len(values) <= key_count
+
+
+def _check_cols(cols, required_cols, filepath):
+    missing = [i for i in required_cols or [] if i not in cols]
+    if missing:
+        raise ValueError('{} is missing required columns: {}'.format(
+            filepath, ', '.join(missing)))
+
+
+def _read_header(filepath):
+    with open(filepath, 'rU') as f:
+        return next(csv.reader(f), [])
+
 # ===============
 # = CSV Classes =
 # ===============
@@ -97,10 +300,25 @@ class CSV(object):
     columns.
 
     Empty rows are removed.
+
+    With stream=True, rows aren't loaded into memory. Instead, each time the
+    CSV is iterated over, its rows are read from disk one at a time (see
+    iter_csv), so self.rows and self.values stay empty and the CSV has no
+    len() or indexing.
+
+    Args:
+        required_cols: a list of columns the CSV must have. If any are
+            missing, a ValueError is raised before any rows are read.
+        encoding: the encoding of the file. By default, it's detected once
+            from the start of the file, and self.encoding is set to it.
     """
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, stream=False, required_cols=None,
+            encoding=None):
         self.filepath = filepath
+        self.stream = stream
+        self.required_cols = required_cols
+        self.encoding = encoding
         self.values = []
         self.cols = []
         self.rows = []
@@ -110,24 +328,17 @@ class CSV(object):
         self.read()
 
     def read(self):
-        with open(self.filepath, 'rU') as f:
-            self.cols = csv.reader(f).next()
-            f.seek(0)
-            raw_csv = csv.DictReader(f)
-
-            for row in raw_csv:
-                if not any(v for k, v in row.iteritems()):
-                    continue
-
-                row = {
-                    self._sanitized(key): self._sanitized(val)
-                    for key, val in row.iteritems()
-                }
-                self.rows.append(row)
-                self.values += row.values()
-
+        self.cols = _read_header(self.filepath)
+        _check_cols(self.cols, self.required_cols, self.filepath)
+        self.encoding = self.encoding or qs.detect_encoding(self.filepath)
+        if self.stream:
             return True
 
+        for row in iter_csv(self.filepath, encoding=self.encoding):
+            self.rows.append(row)
+            self.values += row.values()
+        return True
+
     def save(self, filepath=None, overwrite=False):
         """Save the CSV to disk. Returns the filepath of the saved file."""
         self._prepare_for_saving()
@@ -137,7 +348,7 @@ class CSV(object):
             'csv')
 
         write_csv(
-            self.rows,
+            iter(self),
             output_filepath,
             overwrite=True,
             column_headers=self.cols
@@ -158,15 +369,41 @@ class CSV(object):
     def get_json(self):
         return qs.dumps(self.rows)
 
+    def map_rows(self, func, filepath=None, cols=None, overwrite=False,
+            processes=None, chunk_size=None):
+        """Write func(row) for every row to a CSV, in order, and return the
+        filepath it was written to. Rows that func returns None for are left
+        out.
+
+        func is called in a pool of processes (see qs.process_imap), so it
+        must be a module level function. Rows are read, transformed and
+        written a chunk at a time, so with stream=True the CSV never has to
+        fit in memory.
+
+        Args:
+            filepath: where to write the CSV. Defaults to this CSV's filepath.
+            cols: the columns of the new CSV, in order. Defaults to self.cols.
+            overwrite: by default, the filepath is made unique with
+                qs.unique_path. With overwrite, the file at filepath is
+                replaced, but only once every row is written.
+            processes: the number of processes. Defaults to the number of
+                CPUs.
+            chunk_size: the number of rows sent to a process at a time.
+        """
+        filepath = os.path.expanduser(filepath or self.filepath)
+        # write next to the file being replaced, so it isn't truncated while
+        # it's being read, then move it there
+        output_filepath = qs.unique_path(filepath) if overwrite else filepath
+        rows = qs.process_imap(func, self, processes, chunk_size)
+        with CSVWriter(output_filepath, cols or self.cols) as writer:
+            writer.writerows(row for row in rows if row is not None)
+        if overwrite:
+            os.rename(writer.filepath, filepath)
+            return filepath
+        return writer.filepath
+
     def _sanitized(self, key):
-        if not isinstance(key, basestring):
-            return key
-        if isinstance(key, unicode):
-            return key
-        elif key:
-            return qs.unicode_decode(key)
-        else:
-            return None
+        return _sanitized(key, self.encoding)
 
     def _prepare_for_saving(self):
         """Processes the rows for saving"""
@@ -188,14 +425,24 @@ class CSV(object):
 
     def __iter__(self):
         """iterating returns each row, one at a time"""
+        if self.stream:
+            return iter_csv(self.filepath, encoding=self.encoding)
         return iter(self.rows)
 
     def __len__(self):
+        self._check_not_streaming()
         return len(self.rows)
 
     def __getitem__(self, index):
+        self._check_not_streaming()
         return self.rows[index]
 
+    def _check_not_streaming(self):
+        if self.stream:
+            raise TypeError(
+                'A streaming CSV can only be iterated over. Use '
+                'qs.CSV(filepath) to load all of its rows.')
+
 
 class CSVFromJSONFile(CSV):
 
@@ -240,103 +487,96 @@ class CSVTree(CSV):
     Name | Subject | Grade
     -->
     {'Name': {'Subject': Grade}}
-    """
 
-    def tree(self, cols=None, rows_key='_rows'):
-        cols = cols or self.cols
+    The tree is built in one pass over the rows, so it works with
+    stream=True for large CSVs. dict_to_csv() turns a tree back into a CSV.
+    """
 
-        root = self._child_dict(self.rows, cols[0])
-        for _, new_current in root.iteritems():
-            self._process_branch(new_current, 1)
-        return root
+    def tree(self, cols=None):
+        """A nested dict of the values in cols, like
+        {col1 value: {col2 value: ... {second last col value: last col value}}}
 
-    def _child_dict(rows, col):
-        """make a dict from rows, with dict for each key in the column
+        If rows with the same branch have different values in the last
+        column, its leaf is a list of them (in the order they're found), and
+        one warning is logged for all such leaves. If none of them have a
+        value, the leaf is None.
 
-        the value of each key is the rows in rows that have the same val in
-        col as the key
+        Args:
+            cols: the columns to nest, in order. Defaults to self.cols. Needs
+                at least two: one for the branches, and one for the leaves.
         """
-        return {
-            row[col]: {rows_key: [
-                child
-                for child in rows
-                if child[col] == row[col]]}
-            for row in rows
-        }
-
-    def _process_branch(current, col_index):
-        """recursively process a branch all the way to the leaves
-        args:
-            current: the current node to add nodes to, sibling to _row
-            col_index: the index in cols that children will be from
-            rows_key: the key in current that holds all the valid rows
-        """
-        rows = current[rows_key]
-        col = cols[col_index]
-        current.update(child_dict(rows, col))
-
-        for key, new_current in current.iteritems():
-            if key == rows_key: continue
-
-            new_col_index = col_index + 1
-            new_col = cols[new_col_index]
-            if new_col_index == len(cols) - 1:
-                process_leaf(current, key, col, new_col)
+        cols = cols or self.cols
+        if len(cols) < 2:
+            raise ValueError(
+                'A tree needs at least two columns, not {}'.format(cols))
+        branch_cols, leaf_col = cols[:-1], cols[-1]
+
+        # each leaf is an OrderedDict of its distinct values until every row
+        # is read, so checking for duplicates doesn't rescan the leaf
+        root = {}
+        leaves = []
+        for row in self:
+            node = root
+            for col in branch_cols[:-1]:
+                node = node.setdefault(row.get(col), {})
+            key = row.get(branch_cols[-1])
+            if key not in node:
+                node[key] = OrderedDict()
+                leaves.append((node, key))
+            val = row.get(leaf_col)
+            if val is not None:
+                node[key][val] = True
+
+        lists = []
+        for node, key in leaves:
+            vals = node[key].keys()
+            if len(vals) == 1:
+                node[key] = vals[0]
+            elif not vals:
+                node[key] = None
             else:
-                process_branch(new_current, new_col_index)
+                node[key] = vals
+                lists.append(key)
+        if lists:
+            qs.logger.warning(
+                '{} leaves have more than one {}, so they are lists'.format(
+                    len(lists), leaf_col),
+                lists[:10])
+        return root
 
-        del current[rows_key]
 
-    def _process_leaf(current, key, node_col, leaf_col):
-        matching_vals = [
-            row[leaf_col]
-            for row in current[rows_key]
-            if leaf_col in row and row[node_col] == key
-        ]
-        matching_vals = list(set(matching_vals))
-        if len(matching_vals) == 1:
-            matching_vals = matching_vals[0]
-        elif len(matching_vals) == 0:
-            print "Warning: leaf is empty:\n{}".format(current[rows_key])
-        else:
-            print "Warning: leaf is list:\n{}".format(current[rows_key])
-        current[key] = matching_vals
+class CSVMatch(CSV):
+    """A CSV for finding rows by their values.
 
+    Lookups use hash indexes of {value: rows}, one per column plus one for
+    every column at once, so each lookup is O(1). Each index is built the
+    first time it's needed, from the rows at that time - call reindex() after
+    changing self.rows.
 
-class CSVMatch(CSV):
+    With use_sanitized, values are matched ignoring case and extra
+    whitespace, so ' jane  DOE' matches 'Jane Doe'. Matching rows are always
+    returned as they are in the CSV.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._indexes = {}
+        super(CSVMatch, self).__init__(*args, **kwargs)
 
     def row_for_key_val(self, key, val, use_sanitized=False):
         """
-        returns a list of matching rows
+        returns the row with val in the key column, or None if there isn't one
         args
             key: the column name on the CSV
             value: the value to match in that column
-            use_sanitized: match using the cleaned list.
+            use_sanitized: match ignoring case and extra whitespace.
                  note: still returns the raw data, not the cleaned data
 
-        if there are multiple matches:
-            returns the first match
-            raises MultipleMatchError
+        if there are multiple matches, raises MultipleMatchError
         """
-
-        # TODO: This doesn't work right now, copy from row_for_val
-        values = self.values
-        rows = self.rows
-        if use_sanitized:
-            values = self.cleaned_values
-            rows = self.cleaned_rows
-
-        if not val or val not in values: return
-
-        match = None
-        for row in rows:
-            if row[key] == val:
-                match = row
-                if match:
-                    raise MultipleMatchError()
-                if use_sanitized:
-                    match = self.row_for_sanitizeded(match)
-        return match
+        if not val:
+            return None
+        return self._single_match(
+            val, self._index(key, use_sanitized), use_sanitized)
 
     def row_for_val(self, val, use_sanitized=False, multiple_ok=False):
         """
@@ -344,35 +584,17 @@ class CSVMatch(CSV):
         args:
             multiple_ok
                 will return a list if there are multiple matches
-                otherwise raise a ValueError
+                otherwise raise a MultipleMatchError
         """
-        values = self.cleaned_values if use_sanitized else self.values
-        rows = self.cleaned_rows if use_sanitized else self.rows
-
-        if not val or val not in values: return
-
-        matches = [
-            row for row
-            in rows
-            if val in row.values()
-        ]
-
-        if use_sanitized:
-            matches = [
-                self.row_for_sanitizeded(cleaned)
-                for cleaned in matches
-            ]
-
-        if len(matches) > 1:
-            if multiple_ok:
-                return matches
-            else:
-                raise ValueError(
-                    "Multiple matches for value: {}\nmatches: {}".format(
-                        val,
-                        qs.dumps(matches)
-                    ))
-        return matches[0]
+        if not val:
+            return None
+        index = self._index(None, use_sanitized)
+        if multiple_ok:
+            matches = index.get(_match_value(val, use_sanitized), [])
+            if len(matches) > 1:
+                return list(matches)
+            return matches[0] if matches else None
+        return self._single_match(val, index, use_sanitized)
 
     def row_for_object(self, match_function, object):
         """
@@ -385,8 +607,62 @@ class CSVMatch(CSV):
             if match_function(row, object):
                 return row
 
+    def reindex(self):
+        """Forget the indexes, so they're rebuilt from self.rows."""
+        self._indexes = {}
 
-class MultipleMatchError(Exception):
+    def _single_match(self, val, index, use_sanitized):
+        matches = index.get(_match_value(val, use_sanitized), [])
+        if len(matches) > 1:
+            raise MultipleMatchError(val, matches)
+        return matches[0] if matches else None
+
+    def _index(self, key, use_sanitized):
+        """The index of {value: rows} for the key column, or for every column
+        if key is None. Built the first time it's asked for.
+        """
+        index_key = (key, use_sanitized)
+        if index_key not in self._indexes:
+            self._check_not_streaming()
+            if key is not None and self.rows and key not in self.rows[0]:
+                raise KeyError("'{}' isn't a column in {}".format(
+                    key, self.filepath))
+            self._indexes[index_key] = _build_index(
+                self.rows, key, use_sanitized)
+        return self._indexes[index_key]
+
+
+def _build_index(rows, key, use_sanitized):
+    index = {}
+    for row in rows:
+        if key is not None:
+            vals = [row.get(key)]
+        else:
+            # extra cells past the last column are a list under None
+            vals = [v for k, v in row.iteritems() if k is not None]
+        matched = set()
+        for val in vals:
+            if not val:
+                continue
+            val = _match_value(val, use_sanitized)
+            # a row with the same value in two columns is one match
+            if val in matched:
+                continue
+            matched.add(val)
+            index.setdefault(val, []).append(row)
+    return index
+
+
+def _match_value(val, use_sanitized):
+    if use_sanitized and isinstance(val, basestring):
+        return ' '.join(val.split()).lower()
+    return val
+
+
+class MultipleMatchError(ValueError):
+    """Raised by CSVMatch when a value that should match one row matches
+    more than one.
+    """
 
     def __init__(self, val, matches):
         self.val = val
@@ -396,3 +672,166 @@ class MultipleMatchError(Exception):
         return "Multiple matches for value: {}\nmatches:{}".format(
             self.val,
             qs.dumps(self.matches))
+
+
+class IndexedCSV(CSV):
+    """A CSV that reads rows by their index, without parsing the rest.
+
+    The first time a file is opened, it's scanned once for the byte offset
+    of each row, and the offsets are saved next to it in a sidecar index
+    file (filepath + INDEX_EXTENSION). Later opens load the offsets from
+    the sidecar, as long as the CSV hasn't changed since. The file is
+    memory mapped, so csv[i] or csv[i:j] seeks to those rows and parses only
+    them:
+
+        csv = qs.IndexedCSV('enrollments.csv')
+        last_row = csv[-1]
+        page = csv[1000:1100]
+
+    Rows are the same as qs.CSV's: dicts with unicode keys and values, with
+    empty rows skipped (so csv[i] is qs.CSV(filepath)[i]). Like a streaming
+    CSV, self.rows stays empty, and iterating reads every row in order.
+
+    Args:
+        save_index: set to False to not write the sidecar index file.
+
+    Attributes:
+        index_filepath: the path of the sidecar index.
+    """
+
+    INDEX_EXTENSION = '.rowindex'
+
+    def __init__(self, filepath, required_cols=None, encoding=None,
+            save_index=True):
+        self.index_filepath = filepath + self.INDEX_EXTENSION
+        self.save_index = save_index
+        self._file = None
+        self._map = None
+        self._offsets = array.array('l')
+        super(IndexedCSV, self).__init__(
+            filepath, stream=True, required_cols=required_cols,
+            encoding=encoding)
+
+    def read(self):
+        super(IndexedCSV, self).read()
+        self._keys = [self._sanitized(col) for col in self.cols]
+        self._file = open(self.filepath, 'rb')
+        if not os.fstat(self._file.fileno()).st_size:
+            return True
+        self._map = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map.find('\n') == -1 and self._map.find('\r') != -1:
+            self.close()
+            raise ValueError(
+                "{} has \\r line endings, which IndexedCSV can't read. Use "
+                "qs.CSV instead.".format(self.filepath))
+        self._offsets = self._load_index()
+        if self._offsets is None:
+            self._offsets = _row_offsets(self._map, len(self.cols))
+            if self.save_index:
+                self._write_index()
+        return True
+
+    def close(self):
+        """Close the memory map and file."""
+        if self._map:
+            self._map.close()
+        if self._file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [
+                self._row_at(self._offsets[i])
+                for i in xrange(*index.indices(len(self)))
+            ]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('row index out of range')
+        return self._row_at(self._offsets[index])
+
+    def _row_at(self, offset):
+        self._map.seek(offset)
+        # qs.CSV reads in universal newlines mode, so \r\n in a quoted
+        # value is read as \n
+        values = [
+            val.replace('\r\n', '\n')
+            for val in next(csv.reader(_lines(self._map)))
+        ]
+        return _row_dict(self._keys, values, self.encoding)
+
+    def _index_header(self):
+        """What the sidecar index must start with to match the CSV."""
+        stat = os.stat(self.filepath)
+        return '{} {} {}\n'.format(
+            self._offsets.typecode, stat.st_size, repr(stat.st_mtime))
+
+    def _load_index(self):
+        """The offsets saved in the sidecar, or None if they're missing or
+        out of date.
+        """
+        try:
+            with open(self.index_filepath, 'rb') as f:
+                if f.readline() != self._index_header():
+                    return None
+                offsets = array.array(self._offsets.typecode)
+                offsets.fromstring(f.read())
+                return offsets
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_index(self):
+        try:
+            with open(self.index_filepath, 'wb') as f:
+                f.write(self._index_header())
+                self._offsets.tofile(f)
+        except (IOError, OSError) as e:
+            qs.logger.warning(
+                "Couldn't save the row index for {}".format(self.filepath),
+                str(e))
+
+
+def _lines(mapped):
+    """Lines from the current position of a memory map, for a csv.reader."""
+    while True:
+        line = mapped.readline()
+        if not line:
+            return
+        yield line
+
+
+def _row_offsets(mapped, key_count):
+    """The byte offsets of each row after the header that iter_csv doesn't
+    skip.
+    """
+    offsets = array.array('l')
+    mapped.seek(0)
+    if mapped.find('"') == -1:
+        # without quotes, no row spans more than one line
+        mapped.readline()
+        start = mapped.tell()
+        for line in _lines(mapped):
+            if line.strip(',\r\n') or line.count(',') >= key_count:
+                offsets.append(start)
+            start = mapped.tell()
+        return offsets
+
+    lines = _lines(mapped)
+    reader = csv.reader(lines)
+    next(reader, None)
+    start = mapped.tell()
+    for values in reader:
+        if not _is_empty_row(values, key_count):
+            offsets.append(start)
+        start = mapped.tell()
+    return offsets
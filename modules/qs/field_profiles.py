@@ -0,0 +1,133 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Named projections of QS records, and tracking of which fields a script
+actually reads.
+
+Most callers only read a few fields of each student or section, but every
+call like q.get_students() copies every field of every cached record. Pass
+projection (a profile name from PROFILES or a list of fields) to only copy
+those fields:
+
+    students = q.get_students(projection='id_and_name')
+
+The QS API's fields param only adds fields to the defaults, so a projection
+doesn't change what's requested - if a profile needs a non-default field,
+also pass it with fields.
+
+To find the fields a script needs, turn on tracking and check the suggestions
+at the end:
+
+    tracker = q.track_keys()
+    main(q)
+    qs.logger.info('Suggested profiles', tracker.suggest(), cc_print=True)
+"""
+
+import threading
+import qs
+
+PROFILES = {
+    'id': ['id'],
+    'id_and_name': ['id', 'fullName'],
+    'enrollment': ['id', 'fullName', 'smsClassSubjectSetIdList'],
+    'section_names': ['id', 'sectionName', 'classId', 'semesterId'],
+}
+
+
+def projection_fields(projection):
+    """The list of fields for projection, which is either the name of a
+    profile in PROFILES or a list of fields.
+    """
+    if str(projection) == projection:
+        if projection not in PROFILES:
+            raise ValueError("'{}' isn't a profile in qs.PROFILES".format(
+                projection))
+        return PROFILES[projection]
+    elif type(projection) is not list:
+        raise TypeError('projection must be a profile name or list, not '
+            '{}'.format(type(projection)))
+    return projection
+
+
+class KeyTracker(object):
+    """Records which keys are read from records, by resource.
+
+    Attributes:
+        used: a dict of {resource: set of keys read}.
+    """
+
+    def __init__(self):
+        self.used = {}
+        self._lock = threading.Lock()
+
+    def record(self, resource, keys):
+        with self._lock:
+            self.used.setdefault(resource, set()).update(keys)
+
+    def suggest(self):
+        """A projection for each resource that was read from:
+        {'student': ['fullName', 'id'], ...}
+        """
+        with self._lock:
+            return {
+                resource: sorted(keys)
+                for resource, keys in self.used.iteritems()
+            }
+
+
+class TrackedDict(dict):
+    """A dict that tells a KeyTracker which of its keys are read. Reading
+    every key (by iterating, copying, etc.) records all of them.
+    """
+
+    def __init__(self, data, tracker, resource):
+        super(TrackedDict, self).__init__(data)
+        self._tracker = tracker
+        self._resource = resource
+
+    def _read(self, key):
+        self._tracker.record(self._resource, [key])
+
+    def _read_all(self):
+        self._tracker.record(self._resource, dict.keys(self))
+
+    def __getitem__(self, key):
+        self._read(key)
+        return super(TrackedDict, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        self._read(key)
+        return super(TrackedDict, self).get(key, default)
+
+    def __contains__(self, key):
+        self._read(key)
+        return super(TrackedDict, self).__contains__(key)
+
+    def has_key(self, key):
+        return key in self
+
+    def __iter__(self):
+        self._read_all()
+        return super(TrackedDict, self).__iter__()
+
+    def keys(self):
+        self._read_all()
+        return super(TrackedDict, self).keys()
+
+    def values(self):
+        self._read_all()
+        return super(TrackedDict, self).values()
+
+    def items(self):
+        self._read_all()
+        return super(TrackedDict, self).items()
+
+    def iteritems(self):
+        self._read_all()
+        return super(TrackedDict, self).iteritems()
+
+    def itervalues(self):
+        self._read_all()
+        return super(TrackedDict, self).itervalues()
+
+    def copy(self):
+        self._read_all()
+        return dict(super(TrackedDict, self).items())
@@ -0,0 +1,194 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""A write-ahead journal so that scripts that POST can be safely rerun.
+
+Many POSTs (like post_assignment) aren't idempotent, so rerunning a script
+that died halfway through creates duplicates. A Journal records, in a JSON
+lines file, when each step starts and what it returned, so a rerun with the
+same journal skips the steps that already finished and reuses their results.
+
+Example:
+    journal = qs.Journal('upload.journal.jsonl')
+    for section_id in journal.bar(section_ids):
+        assignment = journal.run(
+            qs.make_id(section_id, 'assignment'),
+            q.post_assignment, section_id, 'Quiz', date, 10)
+        journal.run(
+            qs.make_id(section_id, 'grades'),
+            q.post_grades, section_id, assignment['id'], grades)
+
+Using it is opt in - scripts that don't make a Journal work as before.
+"""
+
+import os
+import json
+import time
+import threading
+import qs
+
+_STARTED = 'started'
+_DONE = 'done'
+_FAILED = 'failed'
+
+
+class Journal(object):
+    """A journal of the steps of a run, stored at path.
+
+    Each line of the file is a JSON object like:
+        {"key": "12345:assignment", "status": "done", "result": {...},
+         "time": 1430000000.0}
+    and the last line for a key is its current status. The file is appended
+    to (and synced) before and after every step, so it is up to date even if
+    the process is killed.
+
+    Steps that were started but never finished in an earlier run might or
+    might not have happened on the server. They are logged as a warning when
+    the journal is loaded and run again.
+
+    Args:
+        path: the file for the journal. If it exists, the run resumes from it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._cut_off = False
+        self._load()
+
+        self.interrupted = sorted(
+            key for key, entry in self._entries.iteritems()
+            if entry['status'] == _STARTED)
+        if self.interrupted:
+            qs.logger.warning(
+                'Some steps were started but not finished in an earlier run '
+                'and will run again. Check that they weren\'t duplicated.',
+                {'journal': self.path, 'steps': self.interrupted})
+
+    def done(self, key):
+        """Whether the step with key finished successfully."""
+        entry = self._entries.get(_clean_key(key))
+        return entry is not None and entry['status'] == _DONE
+
+    def result(self, key):
+        """The recorded result of the step with key, or None if it isn't
+        done.
+        """
+        entry = self._entries.get(_clean_key(key))
+        if entry is not None and entry['status'] == _DONE:
+            return entry.get('result')
+        return None
+
+    def run(self, key, func, *args, **kwargs):
+        """Call func(*args, **kwargs) as the step with key, unless it already
+        finished, in which case its recorded result is returned instead.
+
+        The result of func must be serializable as JSON, since it is what a
+        later run gets back. If func raises (including the SystemExit from
+        qs.logger.critical), the failure is recorded and the exception is
+        re-raised. Failed steps are run again by later runs.
+
+        qs requests that fail without critical=True return None instead of
+        raising, so a step that returns None is recorded as failed too, and
+        raises a StepFailedError.
+
+        Safe to call from multiple threads, as long as the keys differ.
+        """
+        key = _clean_key(key)
+        if self.done(key):
+            return self.result(key)
+
+        self._write(key, _STARTED)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._write(key, _FAILED, error=repr(e))
+            raise
+        if result is None:
+            self._write(key, _FAILED, error='returned None')
+            raise StepFailedError(key)
+        self._write(key, _DONE, result=result)
+        return result
+
+    def pending(self, items, key=None):
+        """Return the items that aren't done yet, in order.
+
+        Args:
+            key: a function that gives the journal key for an item. Defaults
+                to the item itself.
+        """
+        key = key or (lambda item: item)
+        return [item for item in items if not self.done(key(item))]
+
+    def bar(self, items, key=None, desc=''):
+        """Like qs.bar(items), but only yields the items that aren't done.
+        The bar counts the items that are already done, so a resumed run
+        starts where the last one left off.
+
+        Args:
+            key: as in `.pending()`.
+        """
+        items = list(items)
+        pending = self.pending(items, key)
+        return qs.bar(
+            pending,
+            desc=desc,
+            total=len(items),
+            initial=len(items) - len(pending))
+
+    def __len__(self):
+        """The number of steps that are done."""
+        return sum(1 for i in self._entries.itervalues()
+            if i['status'] == _DONE)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        line = ''
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut off by the process being killed mid-write
+                    continue
+                self._entries[entry['key']] = entry
+        self._cut_off = bool(line) and not line.endswith('\n')
+
+    def _write(self, key, status, **extra):
+        entry = {'key': key, 'status': status, 'time': time.time()}
+        entry.update(extra)
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                if self._cut_off:
+                    f.write('\n')
+                    self._cut_off = False
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[key] = json.loads(line)
+
+
+class StepFailedError(Exception):
+    """Raised by Journal.run when a step returns None, like a qs request that
+    failed.
+    """
+
+    def __init__(self, key):
+        super(StepFailedError, self).__init__(key)
+        self.key = key
+
+    def __str__(self):
+        return "Step {} returned None, so it's recorded as failed".format(
+            self.key)
+
+
+def _clean_key(key):
+    """Keys are stored as JSON strings, so tuples of strings and ints become
+    qs.make_id style ids and ints become strings.
+    """
+    if type(key) is tuple:
+        key = qs.make_id(*key)
+    if type(key) is str:
+        return key.decode('utf-8')
+    return unicode(key)
@@ -10,6 +10,7 @@ import random
 import os
 import traceback
 import syslog
+import threading
 import qs
 
 QS_INFO = 35
@@ -18,13 +19,29 @@ has_been_configured = False
 file_out = False
 silent = False
 
+# held while configuring, so concurrent first logs only configure once
+_config_lock = threading.RLock()
+
 
 def config(sender, print_only=False, log_filename=None):
     """mirrors Logging.basicConfig(), especially setting the output stream
     sender should be sender's __file__
     file will be based on sender's name unless log_filename is specified
+
+    Like logging.basicConfig(), this does nothing if logging has already been
+    configured, such as by qs.run_script_for_schools before the script runs.
     """
-    global has_been_configured, file_out
+    global has_been_configured
+
+    with _config_lock:
+        if has_been_configured:
+            return
+        _config(sender, print_only, log_filename)
+        has_been_configured = True
+
+
+def _config(sender, print_only, log_filename):
+    global file_out
 
     file_out = not print_only
     # for logging INFO events while ignoring usual INFO level logs
@@ -42,7 +59,6 @@ def config(sender, print_only=False, log_filename=None):
         print("Logging to file:\n{}".format(log_path))
 
     syslog.openlog(LOG_SENDER)
-    has_been_configured = True
 
 
 def info(description, data={}, is_response=False, is_request=False, cc_print=False):
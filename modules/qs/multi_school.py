@@ -0,0 +1,166 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Run the same work for many schools at once, each in its own process.
+
+Every school gets a separate process, so it has its own QSAPIWrapper, caches,
+rate limiter and logger. Each school also gets its own directory under
+output_dir, which is the working directory while it runs. Its log goes to
+logs/ in that directory, its printed output goes to output.txt, and any files
+it writes with relative paths land there too. When every school is done, a
+report of which schools succeeded and how long each took is logged and saved
+as school_report.csv in output_dir.
+
+Example:
+    def count_students(q):
+        return len(q.get_students())
+
+    qs.run_for_schools(count_students, ['school1', 'school2'])
+
+To run an existing script (like add_student_ids.py) for each school, use
+qs.run_script_for_schools, or api/run_for_schools.py from the command line.
+"""
+
+import os
+import sys
+import time
+import runpy
+import logging
+import traceback
+from multiprocessing import Pool
+import qs
+
+DEFAULT_PROCESSES = 4
+
+
+def stored_schoolcodes(server='live'):
+    """The schoolcodes with API keys in the API key store for server."""
+    prefix = 'qs:{}:'.format(server)
+    return sorted(
+        key[len(prefix):]
+        for key in qs.api_keys.keys()
+        if key.startswith(prefix))
+
+
+def run_for_schools(func, schoolcodes=None, args=(), server='live',
+        output_dir='.', processes=DEFAULT_PROCESSES):
+    """Call func(q, *args) for each school, with q a QSAPIWrapper for that
+    school, across a pool of processes.
+
+    func and args must be picklable, so func has to be defined at the top
+    level of a module. Exceptions (and SystemExit from qs.logger.critical)
+    only stop the school they happen in.
+
+    Args:
+        schoolcodes: the schools to run for. Defaults to every school in the
+            API key store for server.
+        output_dir: the directory to make a directory per school in.
+    Returns:
+        A list with a dict for each school, in the order of schoolcodes:
+        {
+            'schoolcode': 'someschool',
+            'successful': True,
+            'seconds': 12.5,
+            'result': ...,  # what func returned, None if it failed
+            'error': None,  # the traceback if it failed
+        }
+    """
+    schoolcodes = schoolcodes or stored_schoolcodes(server)
+    output_dir = os.path.abspath(output_dir)
+    tasks = [
+        (schoolcode, func, args, server, output_dir)
+        for schoolcode in schoolcodes
+    ]
+
+    start = time.time()
+    # a fresh process for every school, so loggers aren't shared
+    pool = Pool(max(1, min(processes, len(tasks))), maxtasksperchild=1)
+    try:
+        runs = list(qs.bar(
+            pool.imap(_run_for_school, tasks),
+            desc='Schools',
+            total=len(tasks)))
+    finally:
+        pool.terminate()
+
+    _report(runs, output_dir, time.time() - start)
+    return runs
+
+
+def run_script_for_schools(script_path, script_args=(), **kwargs):
+    """Run a script for each school, as if it was run from the command line
+    with the schoolcode as its first argument:
+
+        ./script_path {schoolcode} {script_args...}
+
+    Any '{schoolcode}' in script_args is replaced with the schoolcode, and
+    arguments that are paths to existing files (relative to the current
+    directory) are made absolute, since the script runs in the school's
+    directory.
+
+    kwargs are passed on to run_for_schools.
+    """
+    return run_for_schools(
+        _run_script,
+        args=(os.path.abspath(script_path), list(script_args), os.getcwd()),
+        **kwargs)
+
+
+def _run_script(q, script_path, script_args, original_dir):
+    sys.argv = [script_path, q.schoolcode]
+    for arg in script_args:
+        arg = arg.replace('{schoolcode}', q.schoolcode)
+        path = os.path.join(original_dir, arg)
+        sys.argv.append(path if os.path.exists(path) else arg)
+    runpy.run_path(script_path, run_name='__main__')
+
+
+def _run_for_school(task):
+    """Run one school's work in this (fresh) process."""
+    schoolcode, func, args, server, output_dir = task
+    school_dir = os.path.join(output_dir, schoolcode)
+    if not os.path.exists(school_dir):
+        os.makedirs(school_dir)
+    os.chdir(school_dir)
+    sys.stdout = open('output.txt', 'a')
+
+    # forget any logging config inherited from the parent process
+    logging.root.handlers = []
+    qs.logger.has_been_configured = False
+    qs.logger.config(school_dir, log_filename=schoolcode)
+    run = {
+        'schoolcode': schoolcode,
+        'successful': False,
+        'result': None,
+        'error': None,
+    }
+    start = time.time()
+    try:
+        run['result'] = func(qs.API(schoolcode, server), *args)
+        run['successful'] = True
+    except BaseException:
+        run['error'] = traceback.format_exc()
+        qs.logger.error('Failed for school', {
+            'schoolcode': schoolcode,
+            'error': run['error'],
+        })
+    run['seconds'] = round(time.time() - start, 2)
+    sys.stdout.flush()
+    return run
+
+
+def _report(runs, output_dir, seconds):
+    failed = [i['schoolcode'] for i in runs if not i['successful']]
+    qs.logger.info('Ran for schools', {
+        'schools': len(runs),
+        'successful': len(runs) - len(failed),
+        'failed': failed,
+        'seconds': round(seconds, 2),
+    }, cc_print=True)
+    qs.write_csv(
+        [{
+            'Schoolcode': i['schoolcode'],
+            'Successful': i['successful'],
+            'Seconds': i['seconds'],
+            'Error': (i['error'] or '').strip().split('\n')[-1],
+        } for i in runs],
+        os.path.join(output_dir, 'school_report.csv'),
+        column_headers=['Schoolcode', 'Successful', 'Seconds', 'Error'])
@@ -0,0 +1,185 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Match names from a spreadsheet to students or teachers in the database.
+
+Build a NameResolver once from the records, then resolve each name:
+
+    resolver = qs.NameResolver(q.get_students(projection='id_and_name'))
+    match = resolver.resolve('jane  doe')
+    if match:
+        student_id = match['record']['id']
+
+Names are compared after NFC normalization, case folding and collapsing
+whitespace, and "Last, First" and "First Last" are the same name. Names that
+don't match exactly fall back to a fuzzy match on shared letter trigrams, so
+near misses like "Jon Smith" for "Smith, John" are found with a confidence
+below 1.
+"""
+
+import itertools
+import re
+import unicodedata
+from collections import defaultdict
+import qs
+
+# the lowest confidence that a fuzzy match is returned for
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# a fuzzy match must beat the next best by this much, or it's ambiguous
+_AMBIGUITY_MARGIN = 0.05
+
+# fuzzy candidates come from the rarest trigrams of a name, so common
+# trigrams (like in "son") don't make every record a candidate
+_CANDIDATE_TRIGRAMS = 4
+
+_NO_NAMES = frozenset()
+
+# names with all but one word of a name are only narrowed down further if
+# there are more than this many
+_CANDIDATES = 10
+
+
+class NameResolver(object):
+    """An index of records by name, for resolving names to records.
+
+    Args:
+        records: a list of dicts, like students from q.get_students().
+        name_key: the key in each record with its name.
+        min_confidence: the lowest confidence to return a fuzzy match for.
+        ignore_case: if False, names only match with the same case.
+
+    Attributes:
+        duplicates: a dict of {name: records} for names that more than one
+            record has. These names are never matched.
+    """
+
+    def __init__(self, records, name_key='fullName',
+            min_confidence=DEFAULT_MIN_CONFIDENCE, ignore_case=True):
+        self.min_confidence = min_confidence
+        self.ignore_case = ignore_case
+        self._by_name = defaultdict(list)
+        for record in records:
+            self._by_name[self._canonical(record[name_key])].append(record)
+        self.duplicates = {
+            name: matches
+            for name, matches in self._by_name.iteritems()
+            if len(matches) > 1
+        }
+
+        # {word: set of names with it} and {trigram: set of names with it}
+        self._names_by_word = defaultdict(set)
+        self._names_by_trigram = defaultdict(set)
+        self._trigrams = {}
+        for name in self._by_name:
+            if name in self.duplicates:
+                continue
+            for word in name.split():
+                self._names_by_word[word].add(name)
+            self._trigrams[name] = _trigrams(name)
+            for trigram in self._trigrams[name]:
+                self._names_by_trigram[trigram].add(name)
+
+    def resolve(self, name):
+        """The record for name, or None if there's no match (or it's
+        ambiguous). Returns a dict like:
+        {
+            'record': {...},  # the matching record
+            'confidence': 1.0,  # 1 for exact matches, less for fuzzy ones
+        }
+        """
+        if not name:
+            return None
+        canonical = self._canonical(name)
+        if canonical in self.duplicates:
+            return None
+        matches = self._by_name.get(canonical)
+        if matches:
+            return {'record': matches[0], 'confidence': 1.0}
+        return self._fuzzy_match(canonical)
+
+    def _canonical(self, name):
+        return _canonical(name, self.ignore_case)
+
+    def _fuzzy_match(self, canonical):
+        trigrams = _trigrams(canonical)
+        scores = sorted(
+            (_similarity(trigrams, self._trigrams[i]), i)
+            for i in self._candidates(canonical))
+        if not scores:
+            return None
+        confidence, best = scores[-1]
+        if confidence < self.min_confidence:
+            return None
+        if (len(scores) > 1 and
+                confidence - scores[-2][0] < _AMBIGUITY_MARGIN):
+            return None
+        return {
+            'record': self._by_name[best][0],
+            'confidence': round(confidence, 3),
+        }
+
+    def _candidates(self, canonical):
+        """The names worth scoring as fuzzy matches for canonical.
+
+        A near miss usually has every word right but one, so the candidates
+        are the names with all but one of its words, narrowed to those with
+        a word like the other one if there are many. Names where no word
+        matches fall back to the names like the whole name. It's all set
+        intersections, so only a few names are scored.
+        """
+        words = canonical.split()
+        names_by_word = [self._names_by_word.get(i, _NO_NAMES) for i in words]
+        candidates = set()
+        if len(words) > 1:
+            for i, word in enumerate(words):
+                other_names = sorted(
+                    names_by_word[:i] + names_by_word[i + 1:], key=len)
+                names = other_names[0].intersection(*other_names[1:])
+                if len(names) > _CANDIDATES:
+                    names = self._names_like(word, names)
+                candidates |= names
+        return candidates or self._names_like(canonical)
+
+    def _names_like(self, text, within=None):
+        """The names sharing at least two of the rarest trigrams of text,
+        out of the names in within if it's supplied.
+        """
+        rarest = sorted(
+            (self._names_by_trigram[i] for i in _trigrams(text)
+                if i in self._names_by_trigram),
+            key=len)[:_CANDIDATE_TRIGRAMS]
+        if within is not None:
+            rarest = [within & i for i in rarest]
+        names = set()
+        for trigram_names, other_names in itertools.combinations(rarest, 2):
+            names |= trigram_names & other_names
+        if not names and rarest:
+            names = rarest[0]
+        return names
+
+
+def _canonical(name, ignore_case=True):
+    """The name as 'first last', NFC normalized and case folded."""
+    if not isinstance(name, unicode):
+        name = qs.unicode_decode(name, 'utf-8')
+    name = unicodedata.normalize('NFC', name)
+    if ignore_case:
+        name = name.lower()
+    if ',' in name:
+        last, first = name.split(',', 1)
+        name = u'{} {}'.format(first, last)
+    return u' '.join(re.split(r'[\s.,]+', name)).strip()
+
+
+def _trigrams(canonical):
+    """The trigrams of each word in the name, so word order doesn't matter."""
+    return {
+        padded[i:i + 3]
+        for padded in (u' ' + word + u' ' for word in canonical.split())
+        for i in xrange(len(padded) - 2)
+    }
+
+
+def _similarity(trigrams, other_trigrams):
+    """The Dice coefficient of two sets of trigrams, from 0 to 1."""
+    shared = len(trigrams & other_trigrams)
+    return 2.0 * shared / (len(trigrams) + len(other_trigrams))
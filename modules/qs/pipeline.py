@@ -0,0 +1,97 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Run create-then-fill workflows, where a request needs the result of an
+earlier one, such as POSTing grades to an assignment that was just created.
+
+Work is split into chains. The steps in a chain run in order, and each step
+gets the result of the step before it. Separate chains run concurrently, and
+a failure in one chain stops only that chain.
+
+Example:
+    chains = [
+        qs.Chain(section_id)
+        .then(lambda _: q.post_assignment(section_id, 'Quiz', date, 10))
+        .then(lambda quiz: q.post_grades(section_id, quiz['id'], grades))
+        for section_id, grades in grades_by_section.iteritems()
+    ]
+    results = qs.run_chains(chains)
+"""
+
+import qs
+
+
+class Chain(object):
+    """An ordered list of steps to run one after another.
+
+    Args:
+        name: identifies the chain in its ChainResult, such as a section id.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.steps = []
+
+    def then(self, func):
+        """Add a step. func is called with the result of the previous step
+        (None for the first step). Returns the chain so calls can be chained.
+        """
+        self.steps.append(func)
+        return self
+
+    def run(self):
+        """Run the steps in order, stopping at the first that raises."""
+        result = ChainResult(self.name)
+        previous = None
+        for step in self.steps:
+            try:
+                previous = step(previous)
+            except BaseException as e:
+                result.error = e
+                qs.logger.error('Chain failed', {
+                    'chain': self.name,
+                    'completed steps': len(result.results),
+                    'error': repr(e),
+                })
+                break
+            result.results.append(previous)
+        return result
+
+    def __len__(self):
+        return len(self.steps)
+
+
+class ChainResult(object):
+    """The outcome of running a Chain.
+
+    Attributes:
+        name: the name of the chain.
+        results: the result of each step that completed, in order.
+        error: the exception that stopped the chain, or None.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.results = []
+        self.error = None
+
+    @property
+    def successful(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<ChainResult {} {}>'.format(
+            self.name,
+            'successful' if self.successful else 'failed')
+
+
+def run_chains(chains, workers=qs.DEFAULT_WORKERS, desc=None):
+    """Run chains concurrently, with up to `workers` chains at once.
+
+    Returns a list of ChainResults in the same order as chains. Exceptions
+    from steps (even SystemExit from qs.logger.critical) are caught and stored
+    on the ChainResult, so every chain gets to run.
+    """
+    return qs.concurrent_map(
+        lambda chain: chain.run(),
+        chains,
+        workers=workers,
+        desc=desc)
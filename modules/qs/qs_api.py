@@ -1,14 +1,27 @@
 #!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
 
 import re
-import copy
 import json
+import atexit
+import time
+import itertools
 import qs
 
+# the most grades to POST for an assignment in a single request
+DEFAULT_GRADE_CHUNK_SIZE = 500
+
 
 class QSAPIWrapper(qs.APIWrapper):
     """An API Wrapper specific for the QuickSchools API.
 
+    A QSAPIWrapper can be shared by any number of threads. Its caches lock
+    around every read and write, and when threads ask for the same uncached
+    list at once (like get_students()), only one requests it and the rest
+    wait for its result. The rate limiter, logger and API key store are also
+    safe to use from many threads. What isn't guaranteed is ordering between
+    threads: two threads POSTing to the same resource can't rely on which
+    goes first.
+
     Attributes:
         live: Whether or not this is accessing the live QS server (or backup).
         schoolcode: The schoolcode that this wrapper is accessing.
@@ -28,19 +41,52 @@ class QSAPIWrapper(qs.APIWrapper):
             live
             backup
             local
+        dry_run: if True, POST, PUT and DELETE requests aren't made. They're
+            counted in self.plan and given a fake successful response
+            instead. See qs.request_plan.
+        snapshot: in a dry run, the path of a JSON file to answer GETs from
+            (and save GETs to), as a qs.Snapshot. New GETs are written to it
+            when the wrapper exits as a context manager, or else when the
+            script exits.
+        request_budget: the most requests this wrapper can make (or plan, in
+            a dry run). Going over raises qs.RequestBudgetExceeded.
+        read_routing: a qs.ReadRouting to send GETs that can use slightly
+            out of date data to the backup server. Only used if server is
+            live. The API key for the backup is taken from the API key store
+            (['qs', 'backup', schoolcode]) if it's there, otherwise the live
+            key is used.
 
     Methods that involve an API call have a set of kwargs that can be applied:
         critical: If True, then logger.critical will be called upon failure.
+        priority: qs.INTERACTIVE, qs.NORMAL (the default) or qs.BACKGROUND.
+            When requests are waiting on the rate limit, higher priority ones
+            go first. Bulk methods (like post_grades_for_assignments) default
+            to qs.BACKGROUND, so lookups made meanwhile aren't stuck behind
+            them.
         fields: A list or string of fields to add to the 'fields' param.
         use_cache: (request-specific) If False, the cache will be ignored and
             reset for that resource.
         by_id: (request with list result specific) If True, return the data in
             a dict with {id: dict} values.
+        projection: (cached result specific) Only include these fields in the
+            returned dicts, as a list or a profile name from qs.PROFILES. See
+            qs.field_profiles.
     """
 
-    def __init__(self, access_key='qstools', server='live'):
+    def __init__(self, access_key='qstools', server='live', dry_run=False,
+            snapshot=None, request_budget=None, read_routing=None):
         self._access_key = access_key
         self.server = server
+        self.read_routing = read_routing if server == 'live' else None
+        self._backup_api_key = None
+        self._api_key_saved = False
+        self.dry_run = dry_run
+        self.plan = qs.RequestPlan(request_budget)
+        self._snapshot = (
+            qs.Snapshot(snapshot) if dry_run and snapshot else None)
+        if self._snapshot:
+            atexit.register(self._snapshot.flush)
+        self._fake_ids = itertools.count(1)
 
         self._teacher_cache = qs.ListWithIDCache(sort_key='fullName')
         self._semester_cache = qs.ListWithIDCache()
@@ -48,8 +94,9 @@ class QSAPIWrapper(qs.APIWrapper):
         self._parent_cache = qs.ListWithIDCache(sort_key='fullName')
         self._section_cache = qs.ListWithIDCache(sort_key='sectionName')
         self._section_enrollment_cache = qs.ListWithIDCache()
+        self._student_enrollment_cache = qs.ListWithIDCache()
         self._assignment_cache = qs.ListWithIDCache(sort_key='name')
-        self._grade_cache = qs.ListWithIDCache(id_key='_qstools_id')
+        self._grade_cache = qs.GradeCache()
         self._report_cycle_cache = qs.ListWithIDCache()
         self._report_card_cache = qs.ListWithIDCache(id_key='_qstools_id')
         self._transcript_cache = qs.ListWithIDCache(id_key='studentId')
@@ -60,6 +107,13 @@ class QSAPIWrapper(qs.APIWrapper):
 
         self._parse_access_key()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self._snapshot:
+            self._snapshot.flush()
+
     # =====================
     # = Semesters & Years =
     # =====================
@@ -67,12 +121,13 @@ class QSAPIWrapper(qs.APIWrapper):
     def get_semesters(self, **kwargs):
         """GET all semesters from /semesters."""
         cache = self._semester_cache
-        if _should_make_request(cache, **kwargs):
-            request = self._request('GET all semesters',
-                '/semesters',
-                **kwargs)
-            semesters = self._make_request(request, **kwargs)
-            cache.add(semesters)
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request('GET all semesters',
+                    '/semesters',
+                    **kwargs)
+                semesters = self._make_request(request, **kwargs)
+                cache.add(semesters)
         return cache.get(**kwargs)
 
     @qs.clean_arg
@@ -114,9 +169,10 @@ class QSAPIWrapper(qs.APIWrapper):
         Only gets classes from the current semester, as per the API docs.
         """
         cache = self._class_cache
-        if _should_make_request(cache, **kwargs):
-            request = self._request('GET classes', '/classes', **kwargs)
-            cache.add(self._make_request(request, **kwargs))
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request('GET classes', '/classes', **kwargs)
+                cache.add(self._make_request(request, **kwargs))
         return cache.get(**kwargs)
 
     @qs.clean_arg
@@ -153,9 +209,10 @@ class QSAPIWrapper(qs.APIWrapper):
     def get_teachers(self, **kwargs):
         """GET teachers via the /teachers endpoint."""
         cache = self._teacher_cache
-        if _should_make_request(cache, **kwargs):
-            request = self._request('GET teachers', '/teachers', **kwargs)
-            cache.add(self._make_request(request, **kwargs))
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request('GET teachers', '/teachers', **kwargs)
+                cache.add(self._make_request(request, **kwargs))
         return cache.get(**kwargs)
 
     def get_teacher(self, teacher_id, **kwargs):
@@ -211,11 +268,14 @@ class QSAPIWrapper(qs.APIWrapper):
             if kwargs.get('by_id') is True:
                 students = qs.dict_list_to_dict(students)
             return students
-        elif _should_make_request(cache, **kwargs):
-            request = self._request('GET all students', '/students', **kwargs)
-            request.params = {'search': search}
-            students = self._make_request(request, **kwargs)
-            cache.add(students)
+
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request(
+                    'GET all students', '/students', **kwargs)
+                request.params = {'search': search}
+                students = self._make_request(request, **kwargs)
+                cache.add(students)
         return cache.get(**kwargs)
 
     @qs.clean_arg
@@ -246,10 +306,12 @@ class QSAPIWrapper(qs.APIWrapper):
     def get_parents(self, **kwargs):
         """GET a list of all parents from /parents."""
         cache = self._parent_cache
-        if _should_make_request(cache, **kwargs):
-            request = self._request('GET all parents', '/parents', **kwargs)
-            parents = self._make_request(request, **kwargs)
-            cache.add(parents)
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request(
+                    'GET all parents', '/parents', **kwargs)
+                parents = self._make_request(request, **kwargs)
+                cache.add(parents)
         return cache.get(**kwargs)
 
     @qs.clean_arg
@@ -289,23 +351,27 @@ class QSAPIWrapper(qs.APIWrapper):
             semester_id = qs.clean_id(semester_id)
             kwargs.update({'cache_filter': {'semesterId': semester_id}})
 
-            if _should_make_request(cache, **kwargs):
-                request = self._request(
-                    'GET sections from semester',
-                    '/sections',
-                    **kwargs)
-                request.params.update({'semesterId': semester_id})
-                sections = self._make_request(request, **kwargs)
-                if not sections:
-                    return []
-                mark_sections(sections, semester_id)
-                cache.add(sections)
-
-        elif _should_make_request(cache, **kwargs):
-            request = self._request('GET sections', '/sections', **kwargs)
-            sections = self._make_request(request, **kwargs)
-            mark_sections(sections, self.get_active_semester_id())
-            cache.add(sections)
+            with cache.filling():
+                if _should_make_request(cache, **kwargs):
+                    request = self._request(
+                        'GET sections from semester',
+                        '/sections',
+                        **kwargs)
+                    request.params.update({'semesterId': semester_id})
+                    sections = self._make_request(request, **kwargs)
+                    if not sections:
+                        return []
+                    mark_sections(sections, semester_id)
+                    cache.add(sections)
+
+        else:
+            with cache.filling():
+                if _should_make_request(cache, **kwargs):
+                    request = self._request(
+                        'GET sections', '/sections', **kwargs)
+                    sections = self._make_request(request, **kwargs)
+                    mark_sections(sections, self.get_active_semester_id())
+                    cache.add(sections)
 
         if all_semesters is True:
             active_only = False
@@ -461,25 +527,16 @@ class QSAPIWrapper(qs.APIWrapper):
         """POST to create a new section. teacher_id should be a single
         teacher id or a list of teacher ids.
         """
-        teacher_ids = teacher_ids if type(teacher_id) is list else [teacher_id]
-
-        request = self._request('POST new section', '/sections', **kwargs)
-        request.verb = qs.POST
-        request.params = {'fields': 'smsAcademicSemesterId'}
-        request.request_data = {
-            'classId': class_id,
-            'sectionName': section_name,
-            'sectionCode': section_code,
-            'creditHours': credit_hours,
-            'teacherIds': json.dumps(teacher_ids)
-        }
+        request = self._post_section_request(section_name, section_code,
+            class_id, teacher_id, credit_hours, **kwargs)
         response = self._make_request(request, **kwargs)
         if request.successful is True:
             response['semesterId'] = response['smsAcademicSemesterId']
             self._section_cache.add(response)
         return response
 
-    def post_sections(self, sections_dict, print_log=False, **kwargs):
+    def post_sections(self, sections_dict, print_log=False,
+            workers=qs.DEFAULT_WORKERS, **kwargs):
         """POST to create a new sections from a dict of section
         information. Teacher_id should be a single teacher id or a list
         of teacher ids. The print_log param is to log and print section_code
@@ -488,32 +545,67 @@ class QSAPIWrapper(qs.APIWrapper):
         Dict structure should be as such:
         {'section_code':  {'section_name': section_name,
                            'section_code': section_code,
-                           'class_id:': class_id,
+                           'class_id': class_id,
                            'teacher_id': teacher_id,
                            'credit_hours': credit_hours}}
         Note: credit_hours is optional
-        """
-        for section in qs.bar(sections_dict):
-            new_sect = sections_dict[section]
-
-            if 'credit_hours' in new_sect:
-                new_section = self.post_section(section_name=new_sect['section_name'],
-                                                section_code=new_sect['section_code'],
-                                                class_id=new_sect['class_id'],
-                                                teacher_id=new_sect['teacher_id'],
-                                                credit_hours=new_sect['credit_hours'])
-            else:
-                new_section = self.post_section(section_name=new_sect['section_name'],
-                                                section_code=new_sect['section_code'],
-                                                class_id=new_sect['class_id'],
-                                                teacher_id=new_sect['teacher_id'])
 
+        All of the sections are validated before any are POSTed, and a
+        ValueError lists every invalid one. The POSTs are then made
+        concurrently by up to `workers` threads, and the new sections are
+        added to the section cache together.
+
+        Returns:
+            A dict of {key in sections_dict: new section id}. The id is None
+            for any section that failed to POST.
+        """
+        kwargs.setdefault('priority', qs.BACKGROUND)
+        invalid = {}
+        for key, new_sect in sections_dict.iteritems():
+            problems = _section_problems(new_sect)
+            if problems:
+                invalid[key] = problems
+        if invalid:
+            raise ValueError(
+                'Invalid sections, so none were POSTed:\n{}'.format(
+                    qs.dumps(invalid)))
+
+        def request_section(key):
+            new_sect = sections_dict[key]
+            request = self._post_section_request(
+                new_sect['section_name'],
+                new_sect['section_code'],
+                new_sect['class_id'],
+                new_sect['teacher_id'],
+                new_sect.get('credit_hours', 1),
+                **kwargs)
+            response = self._make_request(request, **kwargs)
+            return response if request.successful is True else None
+
+        new_sections = []
+        section_ids = {}
+        posted = qs.concurrent_imap(
+            request_section,
+            sections_dict.keys(),
+            workers=workers,
+            desc='',
+            ordered=False)
+        for key, new_section in posted:
+            if not new_section:
+                section_ids[key] = None
+                continue
+
+            new_section['semesterId'] = new_section['smsAcademicSemesterId']
+            new_sections.append(new_section)
+            section_ids[key] = new_section['id']
             if print_log:
                 qs.logger.info({"section name": new_section['sectionName'],
-                                "class name": new_section['className'],
+                                "class name": new_section.get('className'),
                                 "id": new_section['id']}, cc_print=True)
 
-        return None
+        if new_sections:
+            self._section_cache.add(new_sections)
+        return section_ids
 
     @qs.clean_arg
     def update_section(self, section_id, section_dict, **kwargs):
@@ -563,6 +655,8 @@ class QSAPIWrapper(qs.APIWrapper):
         #TODO: by default return the 'students' list, not the full API obj
         """
         self._update_section_enrollment_cache()
+        if kwargs.get('semester_id'):
+            self.get_semester_enrollments(kwargs['semester_id'])
         by_id = kwargs.get('by_id')
 
         section_enrollment_kwargs = qs.merge(kwargs, {'by_id': False})
@@ -590,18 +684,65 @@ class QSAPIWrapper(qs.APIWrapper):
         if cached:
             return cached
         else:
-            request = self._request(
-                'GET section enrollment for non-active section',
-                '/sectionenrollments/{}'.format(section_id),
-                **kwargs)
-            students = self._make_request(request, **kwargs)['students']
-            section_enrollments = {'id': section_id, 'students': []}
-            section_enrollments['students'] = [
-                self._enrollment_dict(i) for i in students
-            ]
-            cache.add(section_enrollments)
+            cache.add(self._request_section_enrollment(section_id, **kwargs))
         return cache.get(section_id, **kwargs)
 
+    @qs.clean_arg
+    def get_semester_enrollments(self, semester_id,
+            workers=qs.DEFAULT_WORKERS, **kwargs):
+        """GET section enrollments for every section in a semester.
+
+        The active semester is covered by the /students endpoint, as in
+        `.get_section_enrollments()`. Any other semester needs a
+        /sectionenrollments request per section, so those are made
+        concurrently by up to `workers` threads. Each section is cached as
+        soon as it arrives, so if a run is interrupted, calling this again only
+        requests the sections that are still missing.
+
+        Also updates the by-student index that `.get_student_enrollment()`
+        uses for this semester.
+
+        Returns a list of section enrollment dicts, or a dict by section id if
+        by_id is True.
+        """
+        cache = self._section_enrollment_cache
+        by_id = kwargs.pop('by_id', False)
+        use_cache = kwargs.pop('use_cache', True)
+
+        sections = self.get_sections(semester_id=semester_id) or []
+        section_ids = [qs.clean_id(i['id']) for i in sections]
+
+        if semester_id == self.get_active_semester_id():
+            self._update_section_enrollment_cache(use_cache=use_cache)
+        else:
+            cached = cache.get(by_id=True) or {}
+            to_request = [
+                i for i in section_ids
+                if use_cache is False or i not in cached
+            ]
+
+            def request_enrollment(section_id):
+                return self._request_section_enrollment(section_id, **kwargs)
+
+            enrollments = qs.concurrent_imap(
+                request_enrollment,
+                to_request,
+                workers=workers,
+                ordered=False)
+            for _, section_enrollment in enrollments:
+                cache.add(section_enrollment)
+
+        cached = cache.get(by_id=True) or {}
+        semester_enrollments = [
+            cached[i] for i in section_ids if i in cached
+        ]
+        self._index_student_enrollments(semester_id, semester_enrollments)
+
+        if by_id:
+            return qs.dict_list_to_dict(semester_enrollments)
+        else:
+            return semester_enrollments
+
     def get_student_enrollments(self, **kwargs):
         """GET the section enrollment by student, for all students/sections.
         Accepts the same kwargs as `.get_sections()` for determining which
@@ -657,7 +798,19 @@ class QSAPIWrapper(qs.APIWrapper):
         """GET the sections a specific student is enrolled in, by ID.
         Accepts the same kwargs as `.get_sections()` for determining which
         sections to show.
+
+        If semester_id is supplied, the answer comes from the by-student index
+        built by `.get_semester_enrollments()`.
         """
+        semester_id = kwargs.get('semester_id')
+        if semester_id:
+            semester_id = qs.clean_id(semester_id)
+            index = self._student_enrollment_cache.get(semester_id)
+            if index is None:
+                self.get_semester_enrollments(semester_id)
+                index = self._student_enrollment_cache.get(semester_id)
+            return index['students'].get(student_id)
+
         enrollments = self.get_student_enrollments(by_id=True, **kwargs)
         return enrollments.get(student_id)
 
@@ -665,13 +818,16 @@ class QSAPIWrapper(qs.APIWrapper):
     def post_section_enrollment(self, section_id, student_ids, **kwargs):
         """POST enrollment to enroll all students in student ids to
         section_id. section_ids should be a list of student ids."""
-        request = self._request(
-            'POST section enrollment',
-            '/sectionenrollments/{}'.format(section_id),
+        request = self._section_enrollment_request(
+            qs.POST,
+            section_id,
+            student_ids,
             **kwargs)
-        request.request_data = {'studentIds': json.dumps(student_ids)}
-        request.verb = qs.POST
-        return self._make_request(request, **kwargs)
+        response = self._make_request(request, **kwargs)
+        if request.successful:
+            self._section_enrollment_cache.invalidate(section_id)
+            self._student_enrollment_cache.invalidate()
+        return response
 
     @qs.clean_arg
     def delete_section_enrollments(self, section_id, student_ids,
@@ -686,19 +842,94 @@ class QSAPIWrapper(qs.APIWrapper):
         elif len(student_ids) == 0:
             raise ValueError("student_ids can't be empty list")
 
-        request = self._request(
-            'DELETE section enrollments',
-            '/sectionenrollments/{}'.format(section_id),
+        request = self._section_enrollment_request(
+            qs.DELETE,
+            section_id,
+            student_ids,
             **kwargs)
-        request.verb = qs.DELETE
-        request.request_data = {
-            'studentIds': json.dumps(student_ids)
-        }
         response = self._make_request(request, **kwargs)
         if request.successful:
             self._section_enrollment_cache.invalidate(section_id)
+            self._student_enrollment_cache.invalidate()
         return response
 
+    def sync_section_enrollments(self, desired_enrollments,
+            remove_extra=False, workers=qs.DEFAULT_WORKERS, **kwargs):
+        """Make section enrollment match desired_enrollments with as few
+        requests as possible.
+
+        The desired enrollment is diffed against the current (cached)
+        enrollment, so only the students that are missing from a section are
+        POSTed, and a section that already matches gets no request at all.
+        The POSTs and DELETEs are made concurrently by up to `workers`
+        threads. Running the same sync again is a no-op.
+
+        Args:
+            desired_enrollments: A dict of {section_id: [student_id, ...]}.
+            remove_extra: If True, students enrolled in a section that aren't
+                in its desired list are unenrolled. Otherwise extra students
+                are left alone.
+        Returns:
+            A summary dict:
+            {
+                'added': {section_id: [student_id, ...], ...},
+                'removed': {section_id: [student_id, ...], ...},
+                'unchanged': [section_id, ...],
+                'failed': [
+                    {'verb': 'POST', 'section id': ..., 'student ids': [...]},
+                    ...
+                ]
+            }
+        """
+        kwargs.setdefault('priority', qs.BACKGROUND)
+        desired = {
+            qs.clean_id(section_id): {qs.clean_id(i) for i in student_ids}
+            for section_id, student_ids in desired_enrollments.iteritems()
+        }
+        current = self._current_section_enrollments(
+            desired.keys(),
+            workers=workers)
+
+        operations = []
+        summary = {'added': {}, 'removed': {}, 'unchanged': [], 'failed': []}
+        for section_id, student_ids in desired.iteritems():
+            to_add = sorted(student_ids - current[section_id])
+            to_remove = (
+                sorted(current[section_id] - student_ids)
+                if remove_extra
+                else [])
+            if to_add:
+                operations.append((qs.POST, section_id, to_add))
+            if to_remove:
+                operations.append((qs.DELETE, section_id, to_remove))
+            if not to_add and not to_remove:
+                summary['unchanged'].append(section_id)
+
+        def make_operation(operation):
+            request = self._section_enrollment_request(*operation, **kwargs)
+            self._make_request(request, **kwargs)
+            return request.successful
+
+        results = qs.concurrent_imap(
+            make_operation,
+            operations,
+            workers=workers,
+            ordered=False)
+        for (verb, section_id, student_ids), successful in results:
+            if successful:
+                key = 'added' if verb == qs.POST else 'removed'
+                summary[key][section_id] = student_ids
+                self._section_enrollment_cache.invalidate(section_id)
+            else:
+                summary['failed'].append({
+                    'verb': verb,
+                    'section id': section_id,
+                    'student ids': student_ids,
+                })
+        if operations:
+            self._student_enrollment_cache.invalidate()
+        return summary
+
     @qs.clean_arg
     def delete_section_enrollment(self, section_id, student_id, **kwargs):
         """DELETE enrollment for a single student in a single section"""
@@ -882,7 +1113,9 @@ class QSAPIWrapper(qs.APIWrapper):
             student_id: Filter the grades for an existing section or assignment
                 down to a specific student id.
 
-        #TODO: Assembla #2219 is now deployed, so section_id can be None
+        To GET the grades for every section in a semester, use
+        `.get_all_grades()` instead of calling this per section.
+
         #TODO: include some way to not get final grades
 
         Note that since grades do not have API
@@ -896,7 +1129,11 @@ class QSAPIWrapper(qs.APIWrapper):
         student_id = qs.clean_id(student_id) if student_id else None
 
         kwargs['cache_filter'] = {'sectionId': section_id}
-        if _should_make_request(cache, **kwargs):
+        loaded_by_get_all = (
+            section_id in cache.complete_sections and
+            kwargs.get('use_cache') is not False and
+            not kwargs.get('fields'))
+        if not loaded_by_get_all and _should_make_request(cache, **kwargs):
             request = self._request('GET all grades for a section',
                 '/grades',
                 **kwargs)
@@ -904,10 +1141,7 @@ class QSAPIWrapper(qs.APIWrapper):
             grades = self._make_request(request, **kwargs)
             for grade in grades:
                 grade['sectionId'] = section_id
-                grade['_qstools_id'] = qs.make_id(
-                    grade['studentId'],
-                    grade['assignmentId'],
-                    grade['sectionId'])
+                self._add_grade_cache_id(grade)
             cache.add(grades)
 
         if assignment_id:
@@ -916,7 +1150,56 @@ class QSAPIWrapper(qs.APIWrapper):
             kwargs['cache_filter'].update({'studentId': student_id})
         return cache.get(**kwargs)
 
-    def post_grades(self, section_id, assignment_id, grades, **kwargs):
+    def get_all_grades(self, semester_id=None, **kwargs):
+        """GET the grades for every section in a semester at once.
+
+        Since Assembla #2219, /grades doesn't need a sectionId, so instead of
+        a request per section this pages through all of the semester's grades
+        (1000 per request) and adds them to the grade cache in one pass.
+        Afterwards, `.get_grades()` for any section in that semester is
+        answered from the cache, including sections without any grades.
+
+        Args:
+            semester_id: The semester to GET grades from. Defaults to the
+                active semester.
+        Returns:
+            A list of all of the grades, each with its sectionId.
+        """
+        cache = self._grade_cache
+        semester_id = (
+            qs.clean_id(semester_id)
+            if semester_id
+            else self.get_active_semester_id())
+        section_ids = {
+            qs.clean_id(i['id'])
+            for i in self.get_sections(semester_id=semester_id) or []
+        }
+
+        if (kwargs.get('use_cache') is False or kwargs.get('fields') or
+                not section_ids <= cache.complete_sections):
+            def grades_request():
+                request = self._request(
+                    'GET all grades for a semester',
+                    '/grades',
+                    **kwargs)
+                request.params['semesterId'] = semester_id
+                request.fields.append('sectionId')
+                return request
+
+            grades = self._make_paged_request(grades_request, **kwargs)
+            for grade in grades:
+                grade['sectionId'] = qs.clean_id(grade['sectionId'])
+                self._add_grade_cache_id(grade)
+            cache.add(grades)
+            cache.complete_sections.update(section_ids)
+
+        return [
+            grade for grade in cache.get() or []
+            if grade['sectionId'] in section_ids
+        ]
+
+    def post_grades(self, section_id, assignment_id, grades, chunk_size=None,
+            **kwargs):
         """POST grades to /grades endpoint.
 
         grades arg should be dict like at
@@ -928,22 +1211,197 @@ class QSAPIWrapper(qs.APIWrapper):
                 marks: ...
             }
         ]
+
+        If chunk_size is supplied, the grades are POSTed chunk_size at a time
+        and a list of the responses is returned.
+
+        If the section's grades are cached, the posted grades are updated in
+        the cache; grades for other assignments stay cached.
         """
+        section_id = qs.clean_id(section_id)
         assignment_id = qs.clean_id(assignment_id)
 
-        request = self._request('POST grades for assignment',
-            '/grades',
+        responses, posted, _ = self._post_grade_chunks(
+            section_id,
+            assignment_id,
+            grades,
+            chunk_size,
             **kwargs)
-        request.verb = qs.POST
-        request.request_data = {
-            'sectionId': section_id,
-            'assignmentId': assignment_id,
-            'grades': json.dumps(grades)
-        }
-        response = self._make_request(request, **kwargs)
-        if request.successful is True:
-            self._grade_cache.invalidate()
-        return response
+        self._update_grade_cache(section_id, assignment_id, posted)
+        return responses if chunk_size else responses[0]
+
+    def post_grades_for_assignments(self, uploads,
+            chunk_size=DEFAULT_GRADE_CHUNK_SIZE, workers=qs.DEFAULT_WORKERS,
+            **kwargs):
+        """POST the grades for many assignments at once.
+
+        Each assignment's grades are POSTed chunk_size at a time, in order,
+        while different assignments are POSTed concurrently by up to `workers`
+        threads. The grade cache is updated for the affected assignments only,
+        as in `.post_grades()`.
+
+        Args:
+            uploads: an iterable of (section_id, assignment_id, grades)
+                tuples, with grades as in `.post_grades()`.
+        Returns:
+            A summary dict:
+            {
+                'assignments': 12,
+                'grades': 3400,
+                'seconds': 28.2,
+                'grades per second': 120.6,
+                'failed': [
+                    {'section id': ..., 'assignment id': ..., 'grades': [...]},
+                    ...
+                ]
+            }
+        """
+        kwargs.setdefault('priority', qs.BACKGROUND)
+        uploads = [
+            (qs.clean_id(section_id), qs.clean_id(assignment_id), grades)
+            for section_id, assignment_id, grades in uploads
+        ]
+        start = time.time()
+
+        def post_upload(upload):
+            section_id, assignment_id, grades = upload
+            return self._post_grade_chunks(
+                section_id,
+                assignment_id,
+                grades,
+                chunk_size,
+                **kwargs)
+
+        summary = {'assignments': len(uploads), 'grades': 0, 'failed': []}
+        results = qs.concurrent_imap(
+            post_upload,
+            uploads,
+            workers=workers,
+            ordered=False)
+        for (section_id, assignment_id, _), (_, posted, failed) in results:
+            self._update_grade_cache(section_id, assignment_id, posted)
+            summary['grades'] += len(posted)
+            if failed:
+                summary['failed'].append({
+                    'section id': section_id,
+                    'assignment id': assignment_id,
+                    'grades': failed,
+                })
+
+        summary['seconds'] = round(time.time() - start, 2)
+        summary['grades per second'] = (
+            round(summary['grades'] / summary['seconds'], 2)
+            if summary['seconds']
+            else None)
+        qs.logger.info('POSTed grades for assignments', summary)
+        return summary
+
+    def post_assignments_with_grades(self, assignments,
+            chunk_size=DEFAULT_GRADE_CHUNK_SIZE, workers=qs.DEFAULT_WORKERS,
+            **kwargs):
+        """POST new assignments, each followed by its grades.
+
+        Each section's assignments are POSTed in order, each followed by its
+        grades (chunk_size at a time), as a qs.Chain. Different sections run
+        concurrently, so grades for one section are POSTed while another
+        section's assignment is still being created. If a request for a
+        section fails, the rest of that section is skipped but other sections
+        carry on.
+
+        Args:
+            assignments: an iterable of dicts like:
+                {
+                    'section_id': ...,
+                    'name': ...,
+                    'date': 'YYYY-MM-DD',
+                    'total_marks_possible': ...,
+                    'column_category_id': ...,  # optional
+                    'grading_scale_id': ...,    # optional
+                    'grades': [{'studentId': ..., 'marks': ...}, ...]
+                }
+        Returns:
+            A list with a dict for each assignment, in the order given:
+            {
+                'section id': ...,
+                'name': ...,
+                'assignment id': ...,  # None if it wasn't POSTed
+                'grades posted': 25,
+                'grades failed': [...],  # grades that weren't POSTed
+            }
+        """
+        kwargs.setdefault('priority', qs.BACKGROUND)
+        assignments = list(assignments)
+        by_section = {}
+        for assignment in assignments:
+            section_id = qs.clean_id(assignment['section_id'])
+            by_section.setdefault(section_id, []).append(assignment)
+
+        def post_assignment(section_id, assignment):
+            def step(_):
+                new_assignment = self.post_assignment(
+                    section_id,
+                    assignment['name'],
+                    assignment['date'],
+                    assignment['total_marks_possible'],
+                    assignment.get('column_category_id'),
+                    assignment.get('grading_scale_id'),
+                    **kwargs)
+                # a failed POST returns None, which ends the section's chain
+                if not new_assignment or 'id' not in new_assignment:
+                    raise qs.StepFailedError(
+                        (section_id, 'POST assignment', assignment['name']))
+                return new_assignment
+            return step
+
+        def post_grades(section_id, assignment):
+            def step(new_assignment):
+                assignment_id = qs.clean_id(new_assignment['id'])
+                _, posted, failed = self._post_grade_chunks(
+                    section_id,
+                    assignment_id,
+                    assignment['grades'],
+                    chunk_size,
+                    **kwargs)
+                self._update_grade_cache(section_id, assignment_id, posted)
+                return assignment_id, posted, failed
+            return step
+
+        chains = []
+        for section_id, section_assignments in by_section.iteritems():
+            chain = qs.Chain(section_id)
+            for assignment in section_assignments:
+                chain.then(post_assignment(section_id, assignment))
+                chain.then(post_grades(section_id, assignment))
+            chains.append(chain)
+
+        # step results alternate: new assignment, (assignment id, posted,
+        # failed), new assignment, ...
+        outcomes = {}
+        for result in qs.run_chains(chains, workers=workers, desc=''):
+            for i, assignment in enumerate(by_section[result.name]):
+                steps = result.results[2 * i:2 * i + 2]
+                created = steps[0] if steps else None
+                if len(steps) == 2:
+                    outcomes[id(assignment)] = steps[1]
+                elif isinstance(created, dict) and 'id' in created:
+                    outcomes[id(assignment)] = (
+                        qs.clean_id(created['id']),
+                        [],
+                        assignment['grades'])
+
+        summaries = []
+        for assignment in assignments:
+            assignment_id, posted, failed = outcomes.get(
+                id(assignment),
+                (None, [], assignment['grades']))
+            summaries.append({
+                'section id': qs.clean_id(assignment['section_id']),
+                'name': assignment['name'],
+                'assignment id': assignment_id,
+                'grades posted': len(posted),
+                'grades failed': failed,
+            })
+        return summaries
 
     def post_assignment_with_grades(self, section_id, assignment_name,
             assignment_date, total_marks_possible, category_id, grading_scale_id,
@@ -1031,28 +1489,117 @@ class QSAPIWrapper(qs.APIWrapper):
 
         cache_id = self._rc_id_for_cache(student_id, report_cycle_id)
         if _should_make_request(cache, **kwargs):
-            uri = '/students/{}/reportcards/{}'.format(
+            rc = self._request_report_card(
                 student_id,
-                report_cycle_id)
-            request = self._request(
-                'GET a report card by student and report cycle',
-                uri,
+                report_cycle_id,
                 **kwargs)
-            rc = self._make_request(request, **kwargs)
-            rc['studentId'] = student_id
-            rc['reportCycleId'] = report_cycle_id
-            rc['_qstools_id'] = cache_id
             self._report_card_cache.add(rc)
         return cache.get(cache_id, **kwargs)
 
+    def get_report_cards(self, student_report_cycle_ids,
+            workers=qs.DEFAULT_WORKERS, **kwargs):
+        """GET the report cards for many students and report cycles at once.
+
+        Duplicate pairs are only requested once, pairs that are already cached
+        aren't requested at all, and the rest are requested concurrently by up
+        to `workers` threads. Every report card ends up in the cache, so later
+        calls to `.get_report_card()` for them don't make a request.
+
+        Args:
+            student_report_cycle_ids: an iterable of
+                (student_id, report_cycle_id) tuples. A report_cycle_id of
+                None means the active report cycle.
+        Returns:
+            A list of report cards (see `.get_report_card()`) in the order of
+            student_report_cycle_ids, without duplicates. If by_id is True, a
+            dict by `qs.make_id(student_id, report_cycle_id)` instead.
+        """
+        cache = self._report_card_cache
+        by_id = kwargs.pop('by_id', False)
+        use_cache = kwargs.pop('use_cache', True)
+
+        pairs = []
+        seen = set()
+        active_report_cycle_id = None
+        for student_id, report_cycle_id in student_report_cycle_ids:
+            if report_cycle_id is None:
+                active_report_cycle_id = (
+                    active_report_cycle_id or
+                    self.get_active_report_cycle()['id'])
+                report_cycle_id = active_report_cycle_id
+            pair = (qs.clean_id(student_id), qs.clean_id(report_cycle_id))
+            if pair not in seen:
+                seen.add(pair)
+                pairs.append(pair)
+
+        cached = cache.get(by_id=True) or {}
+        to_request = [
+            pair for pair in pairs
+            if use_cache is False or self._rc_id_for_cache(*pair) not in cached
+        ]
+
+        def request_report_card(pair):
+            return self._request_report_card(*pair, **kwargs)
+
+        report_cards = qs.concurrent_imap(
+            request_report_card,
+            to_request,
+            workers=workers,
+            ordered=False)
+        for _, rc in report_cards:
+            cache.add(rc)
+
+        cached = cache.get(by_id=True) or {}
+        cache_ids = [self._rc_id_for_cache(*pair) for pair in pairs]
+        if by_id:
+            return {i: cached[i] for i in cache_ids}
+        else:
+            return [cached[i] for i in cache_ids]
+
+    def iter_report_card_section_level(self, student_report_cycle_ids,
+            identifiers=None, **kwargs):
+        """Generate flat rows of section-level report card data, one per
+        student, report cycle and section, such as:
+        {
+            'studentId': '300794',
+            'reportCycleId': '12345',
+            'sectionId': '694520',
+            'marks': '100',
+            ...
+        }
+
+        The report cards are downloaded with `.get_report_cards()`, which
+        takes the same args.
+
+        Args:
+            identifiers: A list of report card identifiers to include in each
+                row. Defaults to all of them.
+        """
+        report_cards = self.get_report_cards(
+            student_report_cycle_ids,
+            **kwargs)
+        for rc in report_cards:
+            for section_id, values in rc['sectionLevel'].iteritems():
+                row = {
+                    'studentId': rc['studentId'],
+                    'reportCycleId': rc['reportCycleId'],
+                    'sectionId': section_id,
+                }
+                if identifiers is None:
+                    row.update(values)
+                else:
+                    row.update({i: values.get(i) for i in identifiers})
+                yield row
+
     def get_report_cycles(self, **kwargs):
         """GET all report cycles, which are then used to get report cards."""
         cache = self._report_cycle_cache
-        if _should_make_request(cache, **kwargs):
-            request = self._request('GET all report cycles',
-                '/reportcycles',
-                **kwargs)
-            cache.add(self._make_request(request, **kwargs))
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                request = self._request('GET all report cycles',
+                    '/reportcycles',
+                    **kwargs)
+                cache.add(self._make_request(request, **kwargs))
         return cache.get(**kwargs)
 
     def get_active_report_cycle(self):
@@ -1106,15 +1653,94 @@ class QSAPIWrapper(qs.APIWrapper):
         cache = self._transcript_cache
         kwargs['identifier'] = student_id
         if _should_make_request(cache, **kwargs):
-            request = self._request(
-                'GET transcript for a student id',
-                '/transcripts/{}'.format(student_id),
-                **kwargs)
-            transcript = self._make_request(request, **kwargs)
-            transcript['studentId'] = student_id
-            cache.add(transcript)
+            cache.add(self._request_transcript(student_id, **kwargs))
         return cache.get(**kwargs)
 
+    def get_transcripts(self, student_ids, workers=qs.DEFAULT_WORKERS,
+            **kwargs):
+        """GET the transcripts for many students at once.
+
+        Transcripts that aren't cached yet are requested concurrently by up to
+        `workers` threads, and all of them end up in the cache.
+
+        Returns a list of transcripts in the order of student_ids, without
+        duplicates, or a dict by student id if by_id is True.
+        """
+        cache = self._transcript_cache
+        by_id = kwargs.pop('by_id', False)
+        use_cache = kwargs.pop('use_cache', True)
+
+        unique_ids = []
+        seen = set()
+        for student_id in student_ids:
+            student_id = qs.clean_id(student_id)
+            if student_id not in seen:
+                seen.add(student_id)
+                unique_ids.append(student_id)
+
+        cached = cache.get(by_id=True) or {}
+        to_request = [
+            i for i in unique_ids
+            if use_cache is False or i not in cached
+        ]
+
+        def request_transcript(student_id):
+            return self._request_transcript(student_id, **kwargs)
+
+        transcripts = qs.concurrent_imap(
+            request_transcript,
+            to_request,
+            workers=workers,
+            ordered=False)
+        for _, transcript in transcripts:
+            cache.add(transcript)
+
+        cached = cache.get(by_id=True) or {}
+        if by_id:
+            return {i: cached[i] for i in unique_ids}
+        else:
+            return [cached[i] for i in unique_ids]
+
+    def iter_transcript_values(self, student_ids, identifiers=None,
+            **kwargs):
+        """Generate a flat row for every value on the students' transcripts:
+        {
+            'studentId': '300794',
+            'sectionId': '694520',
+            'identifier': 'marks',
+            'value': '100'
+        }
+
+        Transcript-level values have a sectionId of None. The transcripts are
+        downloaded once with `.get_transcripts()`, which takes the same args,
+        so any number of identifiers can be exported from the same download.
+
+        Args:
+            identifiers: A list of transcript identifiers to include. Defaults
+                to all of them.
+        """
+        identifiers = set(identifiers) if identifiers is not None else None
+
+        def rows(student_id, section_id, values):
+            for identifier, value in values.iteritems():
+                if identifiers is None or identifier in identifiers:
+                    yield {
+                        'studentId': student_id,
+                        'sectionId': section_id,
+                        'identifier': identifier,
+                        'value': value,
+                    }
+
+        for transcript in self.get_transcripts(student_ids, **kwargs):
+            student_id = transcript['studentId']
+            transcript_level = transcript.get('transcriptLevel') or {}
+            for row in rows(student_id, None, transcript_level):
+                yield row
+            section_level = transcript.get('sectionLevel') or {}
+            for section_id, values in section_level.iteritems():
+                for row in rows(student_id, section_id, values):
+                    yield row
+
     @qs.clean_arg
     def post_transcript_section_level(self, student_id, section_level_data, **kwargs):
         """POST transcript semester data for a given student and section. 
@@ -1210,6 +1836,23 @@ class QSAPIWrapper(qs.APIWrapper):
         }
         return self._make_request(request, **kwargs)
 
+    # ================
+    # = Key tracking =
+    # ================
+
+    def track_keys(self):
+        """Start recording which keys are read from the dicts that this
+        wrapper returns from its caches. Returns the qs.KeyTracker, whose
+        .suggest() gives a projection per cache, such as 'student'.
+        """
+        tracker = qs.KeyTracker()
+        for name, cache in self.__dict__.iteritems():
+            if (name.endswith('_cache') and
+                    isinstance(cache, qs.ListWithIDCache)):
+                resource = name[len('_'):-len('_cache')]
+                cache.key_tracker = (tracker, resource)
+        return tracker
+
     # =============
     # = Protected =
     # =============
@@ -1245,17 +1888,80 @@ class QSAPIWrapper(qs.APIWrapper):
         if critical:
             request.critical = kwargs['critical']
 
+        if kwargs.get('priority') is not None:
+            request.priority = kwargs['priority']
+
         if fields:
             if str(fields) == fields:
                 fields = [fields]
             request.fields += fields
 
+        if self.read_routing and self.read_routing.use_backup(request):
+            request.base_url = qs.QSBackupRequest.base_url
+            request.set_api_key(self._get_backup_api_key())
+
+        self.plan.add(request)
+        if self.dry_run:
+            return self._make_dry_run_request(request)
+
         request.make_request()
 
-        if request.successful:
+        if request.successful and not self._api_key_saved:
             qs.api_keys.set(self._api_key_store_key_path(), self.api_key)
+            self._api_key_saved = True
+        return request.data
+
+    def _make_dry_run_request(self, request):
+        """Make a request in a dry run: fake anything that changes data,
+        and answer GETs from the snapshot if possible.
+        """
+        request._before_request()
+        if request.verb in qs.MUTATING_VERBS:
+            request.successful = True
+            request.return_type = 'Single Object'
+            request.data = qs.merge(
+                request.request_data,
+                {'id': 'dry-run-{}'.format(next(self._fake_ids))})
+            if request.dry_run_response:
+                request.data.update(request.dry_run_response())
+            qs.logger.info('Dry run, so not made', request._log_dict())
+        elif not (self._snapshot and self._snapshot.fill(request)):
+            request.make_request()
+            if self._snapshot:
+                self._snapshot.save(request)
         return request.data
 
+    def _make_paged_request(self, request_factory, **kwargs):
+        """Make a request for a paged list and return the items from every
+        page.
+
+        The first page tells how many pages there are, and the rest are then
+        requested concurrently.
+
+        Args:
+            request_factory: a function that returns a new prepared (but not
+                yet made) QSRequest for the list.
+            kwargs: the **kwargs passed to the function that called this.
+        """
+        def request_page(page):
+            request = request_factory()
+            request.paged = True
+            request.params['page'] = page
+            data = self._make_request(request, **kwargs) or []
+            return request, data
+
+        first_request, items = request_page(1)
+        if first_request.paging_info is None:
+            return items
+
+        number_of_pages = int(first_request.paging_info['number_of_pages'])
+        other_pages = qs.concurrent_map(
+            request_page,
+            range(2, number_of_pages + 1))
+        for _, data in other_pages:
+            items += data
+        return items
+
     @qs.clean_arg
     def _make_single_request(self, identifier, base_uri, request_all_method,
             request_description, **kwargs):
@@ -1302,6 +2008,15 @@ class QSAPIWrapper(qs.APIWrapper):
     def _api_key_store_key_path(self):
         return ['qs', self.server, self.schoolcode]
 
+    def _get_backup_api_key(self):
+        if self._backup_api_key is None:
+            try:
+                self._backup_api_key = qs.api_keys.get(
+                    ['qs', 'backup', self.schoolcode])
+            except KeyError:
+                self._backup_api_key = self.api_key
+        return self._backup_api_key
+
     def _enrollment_dict(self, student):
         student_id = student.get('id') or student.get('smsStudentStubId')
         return {
@@ -1310,53 +2025,279 @@ class QSAPIWrapper(qs.APIWrapper):
             'fullName': student['fullName'],
         }
 
+    def _request_section_enrollment(self, section_id, **kwargs):
+        """Request a single section's enrollment from /sectionenrollments.
+
+        Doesn't touch the cache, so it's safe to call from worker threads.
+        """
+        request = self._request(
+            'GET section enrollment for non-active section',
+            '/sectionenrollments/{}'.format(section_id),
+            **kwargs)
+        students = self._make_request(request, **kwargs)['students']
+        return {
+            'id': section_id,
+            'students': [self._enrollment_dict(i) for i in students]
+        }
+
+    def _post_section_request(self, section_name, section_code, class_id,
+            teacher_id, credit_hours, **kwargs):
+        """Return a prepared request to POST a new section"""
+        teacher_ids = teacher_id if type(teacher_id) is list else [teacher_id]
+
+        request = self._request('POST new section', '/sections', **kwargs)
+        request.verb = qs.POST
+        request.params = {'fields': 'smsAcademicSemesterId'}
+        request.request_data = {
+            'classId': class_id,
+            'sectionName': section_name,
+            'sectionCode': section_code,
+            'creditHours': credit_hours,
+            'teacherIds': json.dumps(teacher_ids)
+        }
+        # new sections are made in the active semester
+        request.dry_run_response = lambda: {
+            'smsAcademicSemesterId': self.get_active_semester_id(),
+        }
+        return request
+
+    def _section_enrollment_request(self, verb, section_id, student_ids,
+            **kwargs):
+        """Return a prepared POST or DELETE request for student_ids in the
+        section.
+        """
+        description = {
+            qs.POST: 'POST section enrollment',
+            qs.DELETE: 'DELETE section enrollments',
+        }[verb]
+        request = self._request(
+            description,
+            '/sectionenrollments/{}'.format(section_id),
+            **kwargs)
+        request.verb = verb
+        request.request_data = {'studentIds': json.dumps(student_ids)}
+        return request
+
+    def _current_section_enrollments(self, section_ids, workers):
+        """Return {section_id: set of enrolled student ids} for section_ids.
+
+        Sections that aren't cached yet (from non-active semesters) are
+        requested concurrently.
+        """
+        cache = self._section_enrollment_cache
+        self._update_section_enrollment_cache()
+        cached = cache.get(by_id=True) or {}
+        to_request = [i for i in section_ids if i not in cached]
+
+        def request_enrollment(section_id):
+            return self._request_section_enrollment(section_id)
+
+        enrollments = qs.concurrent_imap(
+            request_enrollment,
+            to_request,
+            workers=workers,
+            ordered=False)
+        for _, section_enrollment in enrollments:
+            cache.add(section_enrollment)
+
+        cached = cache.get(by_id=True) or {}
+        return {
+            i: {qs.clean_id(j['id']) for j in cached[i]['students']}
+            for i in section_ids
+        }
+
+    def _index_student_enrollments(self, semester_id, section_enrollments):
+        """Cache the sections each student takes in a semester, as
+        {'id': semester_id, 'students': {student_id: [section_id, ...]}}
+        """
+        by_student = {}
+        for section_enrollment in section_enrollments:
+            for student in section_enrollment['students']:
+                if student['id'] not in by_student:
+                    by_student[student['id']] = []
+                by_student[student['id']].append(section_enrollment['id'])
+        self._student_enrollment_cache.add({
+            'id': semester_id,
+            'students': by_student,
+        })
+
     def _update_section_enrollment_cache(self, **kwargs):
         """Update the section enrollments cache based on the /students
         endpoint. This only updates the cache for the current semester.
         """
         cache = self._section_enrollment_cache
-        if _should_make_request(cache, **kwargs):
-            students = self.get_students(fields='smsClassSubjectSetIdList')
-            section_enrollments = {}
-
-            for student in students:
-                for section_id in student['smsClassSubjectSetIdList']:
+        with cache.filling():
+            if _should_make_request(cache, **kwargs):
+                students = self.get_students(
+                    fields='smsClassSubjectSetIdList',
+                    projection='enrollment')
+                section_enrollments = {}
+
+                for student in students:
+                    for section_id in student['smsClassSubjectSetIdList']:
+                        if section_id not in section_enrollments:
+                            section_enrollments[section_id] = []
+                        section_enrollments[section_id].append(
+                            self._enrollment_dict(student)
+                        )
+                for section in self.get_sections(projection='id'):
+                    section_id = section['id']
                     if section_id not in section_enrollments:
                         section_enrollments[section_id] = []
-                    section_enrollments[section_id].append(
-                        self._enrollment_dict(student)
-                    )
-            for section in self.get_sections():
-                section_id = section['id']
-                if section_id not in section_enrollments:
-                    section_enrollments[section_id] = []
-
-            enrollment_list = [
-                {'id': k, 'students': v}
-                for k, v in section_enrollments.iteritems()
-            ]
-            cache.add(enrollment_list)
+
+                enrollment_list = [
+                    {'id': k, 'students': v}
+                    for k, v in section_enrollments.iteritems()
+                ]
+                cache.add(enrollment_list)
+
+    def _add_grade_cache_id(self, grade):
+        grade['_qstools_id'] = qs.make_id(
+            grade['studentId'],
+            grade['assignmentId'],
+            grade['sectionId'])
+
+    def _request_report_card(self, student_id, report_cycle_id, **kwargs):
+        """Request a single report card. Doesn't touch the cache, so it's safe
+        to call from worker threads.
+        """
+        uri = '/students/{}/reportcards/{}'.format(student_id, report_cycle_id)
+        request = self._request(
+            'GET a report card by student and report cycle',
+            uri,
+            **kwargs)
+        rc = self._make_request(request, **kwargs)
+        rc['studentId'] = student_id
+        rc['reportCycleId'] = report_cycle_id
+        rc['_qstools_id'] = self._rc_id_for_cache(student_id, report_cycle_id)
+        return rc
+
+    def _request_transcript(self, student_id, **kwargs):
+        """Request a single transcript. Doesn't touch the cache, so it's safe
+        to call from worker threads.
+        """
+        request = self._request(
+            'GET transcript for a student id',
+            '/transcripts/{}'.format(student_id),
+            **kwargs)
+        transcript = self._make_request(request, **kwargs)
+        transcript['studentId'] = student_id
+        return transcript
+
+    def _post_grade_chunks(self, section_id, assignment_id, grades,
+            chunk_size, **kwargs):
+        """POST grades for an assignment, chunk_size at a time. Doesn't touch
+        the cache, so it's safe to call from worker threads.
+
+        Returns:
+            (responses, posted grades, grades that failed to POST)
+        """
+        responses = []
+        posted = []
+        failed = []
+        for chunk in qs.chunks(grades, chunk_size):
+            request = self._request('POST grades for assignment',
+                '/grades',
+                **kwargs)
+            request.verb = qs.POST
+            request.request_data = {
+                'sectionId': section_id,
+                'assignmentId': assignment_id,
+                'grades': json.dumps(chunk)
+            }
+            responses.append(self._make_request(request, **kwargs))
+            if request.successful is True:
+                posted += chunk
+            else:
+                failed += chunk
+        return responses, posted, failed
+
+    def _update_grade_cache(self, section_id, assignment_id, grades):
+        """Update the cached grades for an assignment with grades that were
+        just POSTed. Nothing is cached unless the section's grades are already
+        cached, since the cache would then look like it had all of them.
+        """
+        cache = self._grade_cache
+        cached = cache.get(by_id=True, cache_filter={'sectionId': section_id})
+        if not grades or (not cached and
+                section_id not in cache.complete_sections):
+            return
+
+        cached = cached or {}
+        updated = []
+        for grade in grades:
+            grade_id = qs.make_id(
+                grade['studentId'],
+                assignment_id,
+                section_id)
+            entry = cached.get(grade_id) or {}
+            entry.update(grade)
+            entry.update({
+                'studentId': grade['studentId'],
+                'assignmentId': assignment_id,
+                'sectionId': section_id,
+                '_qstools_id': grade_id,
+            })
+            updated.append(entry)
+        cache.add(updated)
 
     def _rc_id_for_cache(self, student_id, report_cycle_id):
         return qs.make_id(student_id, report_cycle_id)
 
     def _assignments_with_grades(self, **kwargs):
         """Add the the 'grades' key to each assignment in assignments.
-        Returns a copy of assignments with the 'grades' key inserted."""
-        by_id = kwargs.get('by_id')
-        assignments = copy.deepcopy(self._assignment_cache.get(**kwargs))
 
-        if by_id is True:
-            assignments = qs.dict_to_dict_list(assignments)
-        for assignment in assignments:
-            assignment['grades'] = self.get_grades(
-                assignment['sectionId'],
-                assignment['id'])
-        if by_id is True:
-            assignments = qs.dict_list_to_dict(assignments)
+        The grades for each section are requested once and joined to the
+        assignments by assignmentId. The cache already returns copies of the
+        assignments, so adding 'grades' doesn't modify the cache.
+        """
+        by_id = kwargs.get('by_id')
+        assignments = self._assignment_cache.get(**kwargs)
+        if not assignments:
+            return assignments
+
+        assignment_list = (
+            qs.dict_to_dict_list(assignments)
+            if by_id is True
+            else assignments)
+
+        grades_by_assignment = {}
+        section_ids = {i['sectionId'] for i in assignment_list}
+        for section_id in section_ids:
+            for grade in self.get_grades(section_id) or []:
+                assignment_id = qs.clean_id(grade['assignmentId'])
+                if assignment_id not in grades_by_assignment:
+                    grades_by_assignment[assignment_id] = []
+                grades_by_assignment[assignment_id].append(grade)
+
+        for assignment in assignment_list:
+            assignment['grades'] = grades_by_assignment.get(
+                qs.clean_id(assignment['id']))
         return assignments
 
 
+def _section_problems(section_dict):
+    """Return a list of the problems with a section dict for post_sections,
+    or an empty list if it's valid.
+    """
+    problems = []
+    for key in ['section_name', 'section_code', 'class_id', 'teacher_id']:
+        if not section_dict.get(key):
+            problems.append('missing {}'.format(key))
+
+    class_id = section_dict.get('class_id')
+    if class_id and not qs.is_valid_id(class_id, check_only=True):
+        problems.append('invalid class_id: {}'.format(class_id))
+
+    teacher_ids = section_dict.get('teacher_id') or []
+    if type(teacher_ids) is not list:
+        teacher_ids = [teacher_ids]
+    for teacher_id in teacher_ids:
+        if not qs.is_valid_id(teacher_id, check_only=True):
+            problems.append('invalid teacher_id: {}'.format(teacher_id))
+    return problems
+
+
 def _should_make_request(cache, **kwargs):
     """Whether or not a new QS API request should be made, based on cache
     status and kwargs.
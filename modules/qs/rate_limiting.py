@@ -1,7 +1,16 @@
 #!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
-"""Limit request rates on REST servers by request base URL."""
+"""Limit request rates on REST servers by request base URL.
+
+Requests that have to wait for the rate limit wait in priority lanes: when a
+slot opens up, an INTERACTIVE request goes before a NORMAL one, which goes
+before a BACKGROUND one. So a quick lookup isn't stuck behind thousands of
+bulk POSTs. To make sure background work is never starved, a lane that has
+been passed over _MAX_SKIPS times in a row gets the next slot.
+"""
 
 import time
+import threading
+import collections
 import requests
 import qs
 
@@ -11,18 +20,34 @@ _QS_BACKUP_LIMIT = 100
 _QS_BACKUP_WAIT_TIME = 0
 _GITHUB_LIMIT_HEADER = 'X-RateLimit-Remaining'
 
+# request priorities, from first to last in line
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+_PRIORITIES = [INTERACTIVE, NORMAL, BACKGROUND]
+
+# a waiting lane gets a slot after being passed over this many times in a row
+_MAX_SKIPS = 4
+
 
 # {server_id: _ServerWithKnownLimit}
 _servers = {}
 
+# held while creating _servers
+_lock = threading.RLock()
 
-def register_request(request_url):
+
+def register_request(request_url, priority=NORMAL):
     """Process a request that's about to me made, which will automatically
     trigger a wait (or whatever else for that server) when appropriate
+
+    Args:
+        priority: INTERACTIVE, NORMAL or BACKGROUND. Decides which waiting
+            request gets to go next.
     """
     server = get_server(request_url)
     if server:
-        server.register_request(request_url)
+        server.register_request(request_url, priority)
 
 
 def register_response(response):
@@ -38,6 +63,15 @@ def register_response(response):
         server.register_response(response)
 
 
+def estimate_wait(request_url, request_count):
+    """Estimate the seconds that rate limiting will spend waiting while
+    request_count requests are made at request_url, based on the limits
+    configured here. Servers without a known limit are estimated at 0.
+    """
+    server = get_server(request_url)
+    return server.estimate_wait(request_count) if server else 0
+
+
 def get_server(url):
     _init_servers()
     if 'quickschools' in url:
@@ -61,7 +95,13 @@ def get_server(url):
 
 def _init_servers():
     global _servers
-    _servers = _servers or {
+    with _lock:
+        _servers = _servers or _new_servers()
+    return _servers
+
+
+def _new_servers():
+    return {
         'qs_live': _ServerWithWait(
             'qs_live',
             _QS_LIVE_LIMIT,
@@ -76,7 +116,6 @@ def _init_servers():
         'httpbin': _Server('httpbin'),
         'localhost': _Server('localhost'),
     }
-    return _servers
 
 
 class _Server(object):
@@ -86,12 +125,18 @@ class _Server(object):
         self.identifier = identifier
         self.request_count = 0
         self.response_count = 0
+        self._lock = threading.RLock()
 
-    def register_request(self, request_url):
-        self.request_count += 1
+    def register_request(self, request_url, priority=NORMAL):
+        with self._lock:
+            self.request_count += 1
 
     def register_response(self, response):
-        self.response_count += 1
+        with self._lock:
+            self.response_count += 1
+
+    def estimate_wait(self, request_count):
+        return 0
 
 
 class _ServerWithLimit(_Server):
@@ -125,24 +170,88 @@ class _ServerWithKnownLimit(_ServerWithLimit):
         self._limit = limit
         super(_ServerWithKnownLimit, self).__init__(identifier)
 
-    def register_request(self, request_url):
-        super(_ServerWithKnownLimit, self).register_request(request_url)
-        if self.request_count >= self._limit:
-            self.request_count = 0
-            self._limit_reached()
+    def register_request(self, request_url, priority=NORMAL):
+        with self._lock:
+            super(_ServerWithKnownLimit, self).register_request(request_url)
+            if self.request_count >= self._limit:
+                self.request_count = 0
+                self._limit_reached()
 
 
 class _ServerWithWait(_ServerWithKnownLimit):
-    """A server that requires waits between calls, such as QS."""
+    """A server that allows `limit` requests every `wait_time` seconds, such
+    as QS.
+
+    Requests over the limit wait for the next window, and are let through in
+    priority order (see the module docstring).
+    """
 
     def __init__(self, identifier, limit, wait_time):
         """Wait time is in seconds"""
         self._wait_time = wait_time
+        self._slots = threading.Condition(threading.Lock())
+        self._window_start = None
+        self._window_count = 0
+        # {priority: deque of waiting tickets}
+        self._lanes = {i: collections.deque() for i in _PRIORITIES}
+        self._skips = {i: 0 for i in _PRIORITIES}
         super(_ServerWithWait, self).__init__(identifier, limit)
 
+    def register_request(self, request_url, priority=NORMAL):
+        _Server.register_request(self, request_url)
+        self._acquire_slot(priority)
+
+    def _acquire_slot(self, priority):
+        """Wait until this request's turn, then take a slot in the window."""
+        ticket = object()
+        with self._slots:
+            self._lanes[priority].append(ticket)
+            while True:
+                wait = self._seconds_until_slot()
+                if wait <= 0 and self._next_ticket() is ticket:
+                    self._take_slot(priority)
+                    self._slots.notify_all()
+                    return
+                self._slots.wait(wait if wait > 0 else None)
+
+    def _seconds_until_slot(self):
+        if (self._window_start is None or self._window_count < self._limit):
+            return 0
+        return self._window_start + self._wait_time - time.time()
+
+    def _next_ticket(self):
+        """The ticket at the front of the lane that goes next: the most
+        passed over lane if it has reached _MAX_SKIPS, otherwise the highest
+        priority lane with anything waiting.
+        """
+        waiting = [i for i in _PRIORITIES if self._lanes[i]]
+        starved = [i for i in waiting if self._skips[i] >= _MAX_SKIPS]
+        if starved:
+            lane = max(starved, key=lambda i: self._skips[i])
+        else:
+            lane = waiting[0]
+        return self._lanes[lane][0]
+
+    def _take_slot(self, priority):
+        self._lanes[priority].popleft()
+        for i in _PRIORITIES:
+            self._skips[i] = (
+                0 if i == priority or not self._lanes[i]
+                else self._skips[i] + 1)
+
+        now = time.time()
+        if (self._window_start is None or
+                now - self._window_start >= self._wait_time):
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+
     def _limit_reached(self):
         time.sleep(self._wait_time)
 
+    def estimate_wait(self, request_count):
+        return request_count // self._limit * self._wait_time
+
 
 class _HeaderBasedServer(_ServerWithLimit):
     """A server where action is taken based on the headers of responses"""
@@ -156,12 +265,13 @@ class _HeaderBasedServer(_ServerWithLimit):
         self.remaining = None
         super(_HeaderBasedServer, self).__init__(identifier)
 
-    def register_request(self, request_url):
+    def register_request(self, request_url, priority=NORMAL):
         super(_HeaderBasedServer, self).register_request(request_url)
         if self._should_terminate:
             self._limit_reached()
 
     def register_response(self, response):
-        super(_HeaderBasedServer, self).register_response(response)
-        self.remaining = response.headers[self._remaining_header_field]
-        self._should_terminate = self.remaining != '0'
+        with self._lock:
+            super(_HeaderBasedServer, self).register_response(response)
+            self.remaining = response.headers[self._remaining_header_field]
+            self._should_terminate = self.remaining != '0'
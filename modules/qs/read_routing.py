@@ -0,0 +1,94 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Send GETs that don't need up-to-the-minute data to the backup server.
+
+The live server is rate limited to 5 requests per second, but the backup
+server (smartschoolcentral) isn't, so read-heavy scripts finish much faster
+by reading from the backup. The backup is a copy of live that is behind by up
+to backup_lag seconds, so each resource has a max age: how out of date its
+data can be. A GET goes to the backup only if the backup is recent enough for
+its resource.
+
+Example:
+    # everything but grades can be up to a day old
+    routing = qs.ReadRouting(max_ages={'grades': 0})
+    q = qs.API(schoolcode, read_routing=routing)
+
+Writes always go to live. Once a resource is written to, later GETs for it
+(and for the resources in DEPENDENT_RESOURCES that show its data) go to live
+too, so that a script reads its own writes. Since it's the same
+QSAPIWrapper either way, there's one cache no matter where data came from.
+"""
+
+import re
+import threading
+import qs
+
+# how far behind live the backup server is assumed to be, in seconds
+DEFAULT_BACKUP_LAG = 24 * 60 * 60
+
+# {resource: resources whose GETs include its data}, so writing to a resource
+# also sends reads of these to live. Active semester enrollments are read
+# from /students (smsClassSubjectSetIdList), grades and assignments are read
+# together, and deleting a section deletes its enrollments.
+DEPENDENT_RESOURCES = {
+    'sectionenrollments': ['students'],
+    'grades': ['assignments'],
+    'assignments': ['grades'],
+    'sections': ['sectionenrollments', 'students'],
+}
+
+
+class ReadRouting(object):
+    """A policy for which GETs can be made at the backup server.
+
+    Resources are named by the last part of the URI that isn't an id, so
+    /students/{id}/reportcards/{id} is 'reportcards' and /sections/{id} is
+    'sections'.
+
+    Attributes:
+        counts: the number of requests routed to each server, like
+            {'live': 3, 'backup': 120}.
+
+    Args:
+        backup_lag: how many seconds behind live the backup can be.
+        max_ages: a dict of {resource: seconds}, the most out of date that
+            data for the resource can be. Resources with a max age less than
+            backup_lag are always read from live.
+        default_max_age: the max age for resources not in max_ages. None means
+            any age is fine.
+    """
+
+    def __init__(self, backup_lag=DEFAULT_BACKUP_LAG, max_ages=None,
+            default_max_age=None):
+        self.backup_lag = backup_lag
+        self.max_ages = max_ages or {}
+        self.default_max_age = default_max_age
+        self.counts = {'live': 0, 'backup': 0}
+        self._written = set()
+        self._lock = threading.RLock()
+
+    def use_backup(self, request):
+        """Whether request should be made at the backup server. Also records
+        writes, so call it for every request.
+        """
+        resource = _resource(request.uri)
+        with self._lock:
+            if request.verb in qs.MUTATING_VERBS:
+                self._written.add(resource)
+                self._written.update(DEPENDENT_RESOURCES.get(resource, []))
+                backup = False
+            else:
+                backup = (
+                    resource not in self._written and
+                    self._fresh_enough(resource))
+            self.counts['backup' if backup else 'live'] += 1
+        return backup
+
+    def _fresh_enough(self, resource):
+        max_age = self.max_ages.get(resource, self.default_max_age)
+        return max_age is None or max_age >= self.backup_lag
+
+
+def _resource(uri):
+    parts = [i for i in uri.split('/') if i and not re.match(r'^\d+$', i)]
+    return parts[-1] if parts else ''
@@ -0,0 +1,195 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Count and plan the requests that a QSAPIWrapper makes, for dry runs and
+request budgets.
+
+Every QSAPIWrapper has a RequestPlan at `.plan` that counts its requests by
+endpoint. With `qs.API(schoolcode, dry_run=True)`, nothing is POSTed, PUT or
+DELETEd - those requests are only added to the plan and get a fake successful
+response - so a script can be run first to see what it would do:
+
+    q = qs.API(schoolcode, dry_run=True, snapshot='school.snapshot.json')
+    main(q)
+    qs.logger.info('Plan', q.plan.summary(), cc_print=True)
+
+GETs in a dry run are made as usual (they don't change anything and the
+script needs their data), unless a snapshot is given, in which case they are
+answered from the snapshot when possible and saved to it otherwise. The
+snapshot is written when the wrapper is used as a context manager and exits,
+or else when the script exits:
+
+    with qs.API(schoolcode, dry_run=True, snapshot='school.json') as q:
+        main(q)
+"""
+
+import re
+import json
+import os
+import threading
+import qs
+
+# a guess at how long a QS request takes, not counting rate limiting waits
+DEFAULT_SECONDS_PER_REQUEST = 0.3
+
+
+class RequestBudgetExceeded(Exception):
+    """Raised when a request would go over a QSAPIWrapper's request_budget."""
+
+    def __init__(self, budget, request):
+        self.budget = budget
+        self.request = request
+        super(RequestBudgetExceeded, self).__init__(
+            'Request budget of {} reached at {}'.format(budget, request))
+
+
+class RequestPlan(object):
+    """A count of requests, by verb and endpoint.
+
+    Endpoints have their ids replaced with {id}, so /sections/123/assignments
+    and /sections/456/assignments are counted together as
+    /sections/{id}/assignments.
+
+    Args:
+        budget: if supplied, the most requests that can be added. Adding
+            another raises RequestBudgetExceeded.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.counts = {}
+        self._urls = {}
+        self._lock = threading.RLock()
+
+    def add(self, request):
+        """Count a request that's about to be made (or faked)."""
+        with self._lock:
+            if self.budget is not None and len(self) >= self.budget:
+                raise RequestBudgetExceeded(self.budget, request)
+            key = (request.verb, _endpoint(request.uri))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self._urls[request.base_url] = (
+                self._urls.get(request.base_url, 0) + 1)
+
+    def estimated_seconds(self,
+            seconds_per_request=DEFAULT_SECONDS_PER_REQUEST):
+        """Estimate how long making the planned requests takes: the waits from
+        qs.rate_limiting plus seconds_per_request for each request.
+        """
+        with self._lock:
+            waits = sum(
+                qs.rate_limiting.estimate_wait(url, count)
+                for url, count in self._urls.iteritems())
+            return waits + len(self) * seconds_per_request
+
+    def summary(self, seconds_per_request=DEFAULT_SECONDS_PER_REQUEST):
+        """A dict summarizing the plan, like:
+        {
+            'requests': 41,
+            'estimated seconds': 20.3,
+            'by endpoint': {
+                'GET /sections': 1,
+                'POST /sections/{id}/assignments': 40,
+            }
+        }
+        """
+        with self._lock:
+            return {
+                'requests': len(self),
+                'estimated seconds': round(
+                    self.estimated_seconds(seconds_per_request), 1),
+                'by endpoint': {
+                    '{} {}'.format(verb, uri): count
+                    for (verb, uri), count in self.counts.iteritems()
+                },
+            }
+
+    def __len__(self):
+        with self._lock:
+            return sum(self.counts.itervalues())
+
+
+class Snapshot(object):
+    """Responses to GETs saved in a JSON file, to answer the GETs of later dry
+    runs without making them.
+
+    Saved responses are kept in memory until flush(), so a run with a lot of
+    GETs writes the file once rather than once per GET. Using the snapshot
+    as a context manager flushes it at the end:
+
+        with qs.Snapshot('school.snapshot.json') as snapshot:
+            ...
+
+    Args:
+        path: the JSON file for the snapshot. It's created if it doesn't
+            exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._responses = {}
+        self._unsaved = False
+        if os.path.exists(path):
+            with open(path) as f:
+                self._responses = json.load(f)
+
+    def fill(self, request):
+        """Fill the request's response data from the snapshot, as if it was
+        made. Returns False if the snapshot doesn't have it.
+        """
+        saved = self._responses.get(_snapshot_key(request))
+        if saved is None:
+            return False
+        request.successful = True
+        request.data = saved['data']
+        request.return_type = saved['return_type']
+        request.paging_info = saved['paging_info']
+        return True
+
+    def save(self, request):
+        """Save the response of a successful request that was just made. It's
+        written to the file by the next flush().
+        """
+        if not request.successful:
+            return
+        with self._lock:
+            self._responses[_snapshot_key(request)] = {
+                'data': request.data,
+                'return_type': request.return_type,
+                'paging_info': request.paging_info,
+            }
+            self._unsaved = True
+
+    def flush(self):
+        """Write the saved responses to the file, if there are new ones. It's
+        written to a temporary file that then replaces the snapshot, so an
+        interrupted write never leaves a half written snapshot.
+        """
+        with self._lock:
+            if not self._unsaved:
+                return
+            temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+            qs.write(qs.dumps(self._responses, sort=True), temp_path)
+            os.rename(temp_path, self.path)
+            self._unsaved = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+
+def _endpoint(uri):
+    """The uri with its ids replaced by {id}."""
+    return re.sub(r'/\d+(?=/|$)', '/{id}', uri)
+
+
+def _snapshot_key(request):
+    params = {
+        k: v for k, v in request._full_params().iteritems()
+        if k != 'apiKey'
+    }
+    return '{} {}?{}'.format(
+        request.verb,
+        request.uri,
+        '&'.join('{}={}'.format(k, params[k]) for k in sorted(params)))
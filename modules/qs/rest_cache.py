@@ -3,6 +3,7 @@
 in memory.
 """
 
+import threading
 import qs
 
 
@@ -12,22 +13,45 @@ class RestCache(object):
     Note that the objects returned are often the actual _data object, so
     generally the objects should be treated as read only to prevent corrupting
     the cache.
+
+    Reads and writes hold self._lock, so a cache can be shared by worker
+    threads (see qs.concurrency and qs.pipeline).
     """
 
     def __init__(self):
         self._data = None
+        self._lock = threading.RLock()
+        self._fill_lock = threading.RLock()
+
+    def filling(self):
+        """A lock to hold while checking whether the cache is missing data
+        and requesting it, so that when threads ask for the same missing data
+        at once, only one of them requests it and the rest use the result:
+
+            with cache.filling():
+                if cache.get() is None:
+                    cache.add(request_everything())
+            return cache.get()
+
+        It's separate from the lock for reads and writes, so other threads
+        can still read what's cached during the request.
+        """
+        return self._fill_lock
 
     def get(self):
         """Retrieve the entire cache."""
-        return self._data
+        with self._lock:
+            return self._data
 
     def add(self, data):
         """Add data to the cache."""
-        self._data = data
+        with self._lock:
+            self._data = data
 
     def invalidate(self, **kwargs):
         """Invalidate the cache."""
-        self._data = None
+        with self._lock:
+            self._data = None
 
 
 class ListWithIDCache(RestCache):
@@ -40,6 +64,10 @@ class ListWithIDCache(RestCache):
         sort_key: An optional key to sort entries by when getting them.
         ignore_key: any key in a contained dictionary that begins with
             ignore_key will be removed from any values returned.
+
+    Attributes:
+        key_tracker: a (qs.KeyTracker, resource name) tuple. If set, returned
+            dicts record which of their keys are read.
     """
 
     def __init__(self, id_key='id', sort_key=None, ignore_key='_'):
@@ -47,8 +75,10 @@ class ListWithIDCache(RestCache):
         self._sort_key = sort_key
         self._id_key = id_key
         self.ignore_key = '_'
+        self.key_tracker = None
 
-    def get(self, identifier=None, by_id=False, cache_filter=None, **kwargs):
+    def get(self, identifier=None, by_id=False, cache_filter=None,
+            projection=None, **kwargs):
         """Return a flattened list of the data or a single entry by id if id is
         specified. Note that identifier is cleaned here, so don't clean in
         calling function.
@@ -65,53 +95,62 @@ class ListWithIDCache(RestCache):
             cache_filter: A dict to filter the return value on. If this is
                 provided, only dicts that contain the items in cache_filter
                 will be returned. Example: `{'classId': '12345'}`
+            projection: only include these fields in the returned dicts, as
+                a list or a profile name from qs.PROFILES.
         """
-        if self._data is None:
-            return None
-
-        filtered_data = self._filter_for_output()
-        if by_id is True:
-            return _filter_dict(filtered_data, cache_filter) or None
-        elif identifier:
-            return filtered_data.get(qs.clean_id(identifier))
-        else:
-            return_list = qs.dict_to_dict_list(filtered_data)
-            if self._sort_key:
-                return_list = sorted(
-                    return_list,
-                    key=lambda x: x[self._sort_key])
-            return _filter_list(return_list, cache_filter) or None
+        with self._lock:
+            if self._data is None:
+                return None
+
+            fields = qs.projection_fields(projection) if projection else None
+            if by_id is True:
+                matches = _filter_dict(self._data, cache_filter)
+                return {
+                    k: self._for_output(v, fields)
+                    for k, v in matches.iteritems()
+                } or None
+            elif identifier:
+                entry = self._data.get(qs.clean_id(identifier))
+                return self._for_output(entry, fields) if entry else entry
+            else:
+                matches = _filter_list(self._data.values(), cache_filter)
+                if self._sort_key:
+                    matches = sorted(matches, key=lambda x: x[self._sort_key])
+                return [self._for_output(i, fields) for i in matches] or None
 
     def add(self, new_data):
         """Add to the cache with a list or single dict. Like list.append."""
-        if not new_data:
-            qs.logger.warning("new_data is None, so noop")
-            return
-        if type(new_data) not in [dict, list]:
-            raise TypeError('new_data must be a dict or list, not {}'.format(
-                type(new_data)))
-        elif (type(new_data) is list and not
-                all(type(i) is dict for i in new_data)):
-            raise TypeError('new_data must contain only dicts')
-        elif type(new_data) is dict:
-            new_data = [new_data]
-
-        if not self._data:
-            self._data = {}
-        cleaned_input = {qs.clean_id(i[self._id_key]): i for i in new_data}
-        self._data.update(cleaned_input)
+        with self._lock:
+            if not new_data:
+                qs.logger.warning("new_data is None, so noop")
+                return
+            if type(new_data) not in [dict, list]:
+                raise TypeError(
+                    'new_data must be a dict or list, not {}'.format(
+                        type(new_data)))
+            elif (type(new_data) is list and not
+                    all(type(i) is dict for i in new_data)):
+                raise TypeError('new_data must contain only dicts')
+            elif type(new_data) is dict:
+                new_data = [new_data]
+
+            if not self._data:
+                self._data = {}
+            cleaned_input = {qs.clean_id(i[self._id_key]): i for i in new_data}
+            self._data.update(cleaned_input)
 
     def invalidate(self, key=None):
         """Invalidate either the entire cache or just a single key.
 
         If key is provided and not in the cache, nothing is invalidated
         """
-        if not self._data: return
-        if key:
-            if key in self._data:
-                del self._data[qs.clean_id(key)]
-        else:
-            super(ListWithIDCache, self).invalidate()
+        with self._lock:
+            if not self._data: return
+            if key:
+                if key in self._data:
+                    del self._data[qs.clean_id(key)]
+            else:
+                super(ListWithIDCache, self).invalidate()
 
     def has_fields(self, fields):
         """Determine whether or not all of the cached data has all the fields
@@ -119,35 +158,72 @@ class ListWithIDCache(RestCache):
 
         Returns False if self._data is none.
         """
-        if str(fields) == fields:
-            fields = [fields]
-        elif type(fields) is not list:
-            raise TypeError('Fields must be a list or string')
-        if not self._data:
-            return False
-
-        for field in fields:
-            if not all(field in d for k, d in self._data.iteritems()):
+        with self._lock:
+            if str(fields) == fields:
+                fields = [fields]
+            elif type(fields) is not list:
+                raise TypeError('Fields must be a list or string')
+            if not self._data:
                 return False
-        return True
+
+            for field in fields:
+                if not all(field in d for k, d in self._data.iteritems()):
+                    return False
+            return True
 
     def has_entry_with_subset(self, items):
         """Determine whether or not one of the entries in the cache has the
         items from items. Items should be in a dict, such as {id: 12345}.
         """
-        for _, datum in self._data.iteritems():
-            if _dict_has_subset(datum, items):
-                return True
-        return False
-
-    def _filter_for_output(self):
-        filtered_data = {}
-        for outer_key, outer_val in self._data.iteritems():
-            filtered_data[outer_key] = {}
-            for inner_key, inner_val in outer_val.iteritems():
-                if type(inner_key) != str or not inner_key.startswith('_'):
-                    filtered_data[outer_key][inner_key] = inner_val
-        return filtered_data
+        with self._lock:
+            for _, datum in self._data.iteritems():
+                if _dict_has_subset(datum, items):
+                    return True
+            return False
+
+    def _for_output(self, entry, fields=None):
+        """A copy of a cached dict to return, without ignored keys or only
+        with fields if supplied.
+        """
+        if fields:
+            output = {k: entry[k] for k in fields if k in entry}
+        else:
+            output = {
+                k: v for k, v in entry.iteritems()
+                if type(k) != str or not k.startswith(self.ignore_key)
+            }
+        if self.key_tracker:
+            output = qs.TrackedDict(output, *self.key_tracker)
+        return output
+
+
+class GradeCache(ListWithIDCache):
+    """A ListWithIDCache of grades that also knows which sections have all of
+    their grades cached, even those without any grades.
+
+    Attributes:
+        complete_sections: the ids of the sections whose grades were all
+            added at once. It's cleared along with the cache, so the cache
+            is never thought to have every grade for a section when it
+            doesn't.
+    """
+
+    def __init__(self):
+        super(GradeCache, self).__init__(id_key='_qstools_id')
+        self.complete_sections = set()
+
+    def invalidate(self, key=None):
+        """Invalidate either the entire cache or just a single grade, and the
+        sections that no longer have all of their grades cached.
+        """
+        with self._lock:
+            if key:
+                grade = (self._data or {}).get(qs.clean_id(key))
+                if grade:
+                    self.complete_sections.discard(grade.get('sectionId'))
+            else:
+                self.complete_sections.clear()
+            super(GradeCache, self).invalidate(key)
 
 
 def _filter_dict(dict_to_filter, subset):
@@ -11,6 +11,7 @@ GET = 'GET'
 PUT = 'PUT'
 POST = 'POST'
 DELETE = 'DELETE'
+MUTATING_VERBS = [PUT, POST, DELETE]
 
 
 class RestRequest(object):
@@ -42,6 +43,13 @@ class RestRequest(object):
         request_data: A dictionary of request-specific data to include.
         critical: A boolean indicating whether or not to exit if this request
             fails.
+        priority: qs.INTERACTIVE, qs.NORMAL or qs.BACKGROUND, for which lane
+            the request waits in when the server is rate limited. See
+            qs.rate_limiting.
+        dry_run_response: for a request that changes data, None or a function
+            that returns fields to add to its faked response in a dry run
+            (see qs.API's dry_run), for fields the server would add that the
+            caller reads.
         Silent: A boolean indicating whether or not this request should be
             logged or stay silent.
         verb: The HTTP verb to use, in all caps, such as: 'GET' or 'POST'
@@ -77,6 +85,8 @@ class RestRequest(object):
         self.headers = {}
         self.silent = True if kwargs.get('silent') is True else False
         self.critical = False
+        self.priority = qs.NORMAL
+        self.dry_run_response = None
         self.verb = 'GET'
 
         self.response = None
@@ -97,7 +107,7 @@ class RestRequest(object):
         self._before_request()
         self._log_before()
 
-        qs.rate_limiting.register_request(self._full_url())
+        qs.rate_limiting.register_request(self._full_url(), self.priority)
         self.response = requests.request(
             self.verb,
             self._full_url(),
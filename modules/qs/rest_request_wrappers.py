@@ -23,6 +23,8 @@ class QSRequest(qs.RestRequest):
         return_type: The return type, such as Flat List, Single Object, etc.
         fields: A list to add to the request in the 'fields' param.
         paging_info: Info extracted for paginated lists on total items, etc.
+        paged: If True, this request is for a single page of a paged list
+            (set with the 'page' param), so more than one page is expected.
     """
     base_params = {'itemsPerPage': 1000}
     base_url = 'https://api.quickschools.com/sms/v1'
@@ -30,6 +32,7 @@ class QSRequest(qs.RestRequest):
     def __init__(self, description, uri, **kwargs):
         self.return_type = None
         self.paging_info = None
+        self.paged = False
         self.fields = []
 
         super(QSRequest, self).__init__(description, uri, **kwargs)
@@ -67,10 +70,10 @@ class QSRequest(qs.RestRequest):
         qs.logger.critical("Unrecognized response data type", parsed)
 
     def _after_response(self):
-        """For now, until QSPaginatedRequest is implemented, exit if more than
-        1000 entries are received
+        """Unless this request is paged, exit if more than 1000 entries are
+        received
         """
-        if (self.return_type == 'Paged List' and
+        if (self.return_type == 'Paged List' and not self.paged and
                 int(self.paging_info['number_of_pages']) > 1):
             qs.logger.critical('Receieved too may responses', self._log_dict())
 
@@ -10,7 +10,7 @@ import itertools
 
 
 def status_bar(iterable, desc='', total=None, leave=True, file=sys.stderr,
-        mininterval=0.5, miniters=1):
+        mininterval=0.5, miniters=1, initial=0):
     """Status bar for iterables, using tqdm: github.com/noamraph/tqdm
 
     Get an iterable object, and return an iterator which acts exactly like the
@@ -25,6 +25,9 @@ def status_bar(iterable, desc='', total=None, leave=True, file=sys.stderr,
         finished iterating over all elements.
         If less than mininterval seconds or miniters iterations have passed
         since the last progress meter update, it is not updated again.
+        'initial' is the number of iterations already finished before this
+        one started, such as when resuming with a qs.Journal. The meter
+        starts there, and the rate only counts iterations from this run.
     """
 
     def format_interval(t):
@@ -43,7 +46,8 @@ def status_bar(iterable, desc='', total=None, leave=True, file=sys.stderr,
             total = None
 
         elapsed_str = format_interval(elapsed)
-        rate = '%5.2f' % (n / elapsed) if elapsed else '?'
+        done_here = n - initial
+        rate = '%5.2f' % (done_here / elapsed) if elapsed else '?'
 
         if total:
             frac = float(n) / total
@@ -54,7 +58,9 @@ def status_bar(iterable, desc='', total=None, leave=True, file=sys.stderr,
 
             percentage = '%3d%%' % (frac * 100)
 
-            left_str = format_interval(elapsed / n * (total - n)) if n else '?'
+            left_str = (
+                format_interval(elapsed / done_here * (total - n))
+                if done_here else '?')
 
             return '|%s| %d/%d %s [elapsed: %s left: %s, %s iters/sec]' % (
                 bar, n, total, percentage, elapsed_str, left_str, rate)
@@ -86,11 +92,11 @@ def status_bar(iterable, desc='', total=None, leave=True, file=sys.stderr,
     prefix = desc + ': ' if desc else ''
 
     sp = StatusPrinter(file)
-    sp.print_status(prefix + format_meter(0, total, 0))
+    sp.print_status(prefix + format_meter(initial, total, 0))
 
     start_t = last_print_t = time.time()
-    last_print_n = 0
-    n = 0
+    last_print_n = initial
+    n = initial
     for obj in iterable:
         yield obj
         # Now the object was created and processed, so we can print the meter.
@@ -0,0 +1,351 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""A column-oriented table, for large CSVs and API datasets.
+
+A list of row dicts repeats every key in every row, and filtering or grouping
+it is a Python loop over all of the dicts. A Table keeps one column per key
+instead. String columns are dictionary encoded: each distinct value is stored
+once, and rows only hold an integer code for it. Number columns are typed
+arrays. Conditions on a string column are checked once per distinct value,
+and grouping compares codes instead of strings.
+
+    table = qs.Table.from_csv(qs.CSV('enrollments.csv'))
+    math = table.where('Subject', lambda subject: 'Math' in subject)
+    counts = math.group_by(['Student ID'], {'Sections': (None, 'count')})
+    counts.save('math sections.csv')
+
+Tables don't change once they're made - where(), group_by(), etc. all return
+new tables.
+"""
+
+import array
+from collections import OrderedDict
+import qs
+
+# group_by aggregations, as functions of a list of values
+_AGGREGATIONS = {
+    'count': len,
+    'sum': sum,
+    'min': min,
+    'max': max,
+    'mean': lambda values: float(sum(values)) / len(values),
+    'first': lambda values: values[0],
+}
+
+
+class Table(object):
+    """A table of columns. Make one with from_rows, from_csv or from_cache.
+
+    Attributes:
+        cols: the column names, in order.
+    """
+
+    def __init__(self, columns):
+        """columns is an OrderedDict of {name: column}, all the same length."""
+        self._columns = columns
+        self.cols = columns.keys()
+
+    @classmethod
+    def from_rows(cls, rows, cols=None, numeric_cols=()):
+        """Make a table from an iterable of dicts, like the rows passed to
+        qs.write_csv. It's read in one pass, so rows can be a generator.
+
+        Columns where every value is an int or float are stored as numbers.
+        Other values (including None for keys a row doesn't have) are
+        dictionary encoded.
+
+        Args:
+            cols: the order of the columns. Keys that aren't in cols are added
+                after them, in the order they're found.
+            numeric_cols: columns of numeric strings (like those read from a
+                CSV) to parse into numbers. Empty cells become None, which
+                keeps the column dictionary encoded.
+        """
+        columns = OrderedDict((col, _EncodedColumn()) for col in cols or [])
+        length = 0
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns[key] = _EncodedColumn([None] * length)
+            for col, column in columns.iteritems():
+                val = row.get(col)
+                if col in numeric_cols:
+                    val = _number(val)
+                column.append(val)
+            length += 1
+        return cls(OrderedDict(
+            (col, column.as_numeric() or column)
+            for col, column in columns.iteritems()))
+
+    @classmethod
+    def from_csv(cls, csv, numeric_cols=()):
+        """Make a table from a qs.CSV, which can be streaming."""
+        return cls.from_rows(csv, csv.cols, numeric_cols)
+
+    @classmethod
+    def from_cache(cls, cache, numeric_cols=(), **kwargs):
+        """Make a table from what's in a qs.ListWithIDCache. kwargs are passed
+        to cache.get(), like cache_filter.
+        """
+        return cls.from_rows(cache.get(**kwargs) or [], None, numeric_cols)
+
+    def column(self, col):
+        """The values in the column, as a list."""
+        column = self._columns[col]
+        return [column[i] for i in xrange(len(self))]
+
+    def where(self, col, func):
+        """A table of the rows where func(value in col) is truthy."""
+        column = self._columns[col]
+        return self.take(column.indexes_where(func))
+
+    def where_in(self, col, values):
+        """A table of the rows with a value in col that's in values."""
+        values = set(values)
+        return self.where(col, lambda val: val in values)
+
+    def sort_by(self, cols, reverse=False):
+        """A table of the rows sorted by the values in cols."""
+        columns = [self._columns[col] for col in cols]
+        indexes = sorted(
+            xrange(len(self)),
+            key=lambda i: [column[i] for column in columns],
+            reverse=reverse)
+        return self.take(indexes)
+
+    def group_by(self, cols, aggregations=None):
+        """A table with a row for each distinct combination of values in
+        cols, in the order they're first found.
+
+        Args:
+            aggregations: a dict of {new column: (column, aggregation)} to add
+                to each group's row. aggregation is one of 'count', 'sum',
+                'min', 'max', 'mean' or 'first', applied to the values of
+                column in the group. For 'count', column can be None.
+        """
+        aggregations = aggregations or {}
+        for col, how in aggregations.itervalues():
+            if how not in _AGGREGATIONS:
+                raise ValueError(
+                    "'{}' isn't an aggregation, options: {}".format(
+                        how, ', '.join(sorted(_AGGREGATIONS))))
+
+        key_columns = [self._columns[col] for col in cols]
+        groups = OrderedDict()
+        for i in xrange(len(self)):
+            key = tuple(column.key(i) for column in key_columns)
+            if key not in groups:
+                groups[key] = array.array('l')
+            groups[key].append(i)
+
+        def group_row(indexes):
+            first = indexes[0]
+            row = {col: self._columns[col][first] for col in cols}
+            for new_col, (col, how) in aggregations.iteritems():
+                if col is None:
+                    values = indexes
+                else:
+                    column = self._columns[col]
+                    values = [column[i] for i in indexes]
+                row[new_col] = _AGGREGATIONS[how](values)
+            return row
+
+        return Table.from_rows(
+            (group_row(indexes) for indexes in groups.itervalues()),
+            list(cols) + sorted(aggregations))
+
+    def join(self, other, on, how='inner', suffix='_2'):
+        """Join other onto this table by the values in the columns on (a
+        column name or list of them).
+
+        Every pair of rows with the same values in on makes a row, with the
+        columns of this table, then the other columns of other. If a column
+        of other has the same name as one here, suffix is added to it.
+
+        Args:
+            how: 'inner' to only keep rows with a match in other, or 'left'
+                to keep every row here, with None for other's columns if
+                there's no match.
+        """
+        if how not in ('inner', 'left'):
+            raise ValueError("how must be 'inner' or 'left', not {}".format(
+                how))
+        on = [on] if isinstance(on, basestring) else list(on)
+
+        other_rows = {}
+        other_key_columns = [other._columns[col] for col in on]
+        for i in xrange(len(other)):
+            key = tuple(column[i] for column in other_key_columns)
+            other_rows.setdefault(key, []).append(i)
+
+        indexes = array.array('l')
+        other_indexes = []
+        key_columns = [self._columns[col] for col in on]
+        for i in xrange(len(self)):
+            key = tuple(column[i] for column in key_columns)
+            matches = other_rows.get(key)
+            if matches:
+                for match in matches:
+                    indexes.append(i)
+                    other_indexes.append(match)
+            elif how == 'left':
+                indexes.append(i)
+                other_indexes.append(None)
+
+        columns = self.take(indexes)._columns
+        missing = how == 'left' and None in other_indexes
+        for col in other.cols:
+            if col in on:
+                continue
+            new_col = col + suffix if col in columns else col
+            columns[new_col] = other._columns[col].take(
+                other_indexes, missing)
+        return Table(columns)
+
+    def take(self, indexes):
+        """A table of the rows at indexes, in that order."""
+        return Table(OrderedDict(
+            (col, column.take(indexes))
+            for col, column in self._columns.iteritems()))
+
+    def save(self, filepath, overwrite=False):
+        """Save the table as a CSV. Returns the filepath it was saved to."""
+        with qs.CSVWriter(filepath, self.cols, overwrite) as writer:
+            writer.writerows(self)
+        return writer.filepath
+
+    def __iter__(self):
+        """Iterating gives each row as a dict."""
+        return (self[i] for i in xrange(len(self)))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return {
+            col: column[index]
+            for col, column in self._columns.iteritems()
+        }
+
+    def __len__(self):
+        if not self._columns:
+            return 0
+        return len(next(self._columns.itervalues()))
+
+    def __repr__(self):
+        return '<Table of {} rows: {}>'.format(len(self), ', '.join(
+            repr(i) for i in self.cols))
+
+
+class _EncodedColumn(object):
+    """A dictionary encoded column: each row holds the index of its value in
+    self.values.
+    """
+
+    def __init__(self, values=(), dictionary=None):
+        if dictionary is None:
+            self.values = []
+            self._codes_by_value = {}
+        else:
+            self.values, self._codes_by_value = dictionary
+        self.codes = array.array('l')
+        for val in values:
+            self.append(val)
+
+    def append(self, val):
+        self.codes.append(self._code(val))
+
+    def key(self, index):
+        return self.codes[index]
+
+    def indexes_where(self, func):
+        matching = {
+            code for code, val in enumerate(self.values) if func(val)
+        }
+        return array.array('l', (
+            i for i, code in enumerate(self.codes) if code in matching))
+
+    def take(self, indexes, missing=False):
+        """A column of the values at indexes. If missing, indexes can have
+        None for rows with a value of None.
+        """
+        codes = self.codes
+        if missing:
+            # a copy of the dictionary, so None isn't added to this one
+            column = _EncodedColumn(dictionary=(
+                list(self.values), dict(self._codes_by_value)))
+            none_code = column._code(None)
+            column.codes.extend(
+                none_code if i is None else codes[i] for i in indexes)
+        else:
+            column = _EncodedColumn(
+                dictionary=(self.values, self._codes_by_value))
+            column.codes.extend(codes[i] for i in indexes)
+        return column
+
+    def as_numeric(self):
+        """This column as a _NumericColumn, or None if any of its values
+        aren't numbers.
+        """
+        values = self.values
+        if not values or not all(_is_number(i) for i in values):
+            return None
+        typecode = 'l' if all(type(i) in (int, long) for i in values) else 'd'
+        return _NumericColumn(
+            array.array(typecode, (values[code] for code in self.codes)))
+
+    def _code(self, val):
+        code = self._codes_by_value.get(val)
+        if code is None:
+            code = len(self.values)
+            self.values.append(val)
+            self._codes_by_value[val] = code
+        return code
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class _NumericColumn(object):
+    """A column of numbers in a typed array."""
+
+    def __init__(self, numbers):
+        self.numbers = numbers
+
+    def key(self, index):
+        return self.numbers[index]
+
+    def indexes_where(self, func):
+        return array.array('l', (
+            i for i, val in enumerate(self.numbers) if func(val)))
+
+    def take(self, indexes, missing=False):
+        if missing:
+            return _EncodedColumn(
+                None if i is None else self.numbers[i] for i in indexes)
+        return _NumericColumn(array.array(
+            self.numbers.typecode, (self.numbers[i] for i in indexes)))
+
+    def __getitem__(self, index):
+        return self.numbers[index]
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+def _is_number(val):
+    return type(val) in (int, long, float)
+
+
+def _number(val):
+    """Parse a numeric string (or None/'') into an int, float or None."""
+    if val is None or _is_number(val):
+        return val
+    val = val.strip()
+    if not val:
+        return None
+    try:
+        return int(val)
+    except ValueError:
+        return float(val)
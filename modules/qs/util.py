@@ -23,6 +23,10 @@ import datetime
 import requests
 import chardet
 
+# the number of bytes of a file that detect_encoding reads
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
 def dumps(arbitry_obj, sort=False, indent=4):
     """Dumps like json.dumps. Note that by default, list order is not
     maintained and non JSON objects are printed as their __str__.
@@ -84,6 +88,18 @@ def dict_to_dict_list(large_dict):
     return [v for k, v in large_dict.iteritems()]
 
 
+def chunks(items, size=None):
+    """Split the list items into lists of at most size items. If size is None,
+    the whole list is a single chunk.
+
+    Example usage: qs.chunks([1, 2, 3], 2) == [[1, 2], [3]]
+    """
+    items = list(items)
+    if not size:
+        return [items]
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 def rand_str(size=6, chars=string.letters + string.digits):
     """http://stackoverflow.com/a/2257449/1628796"""
     return ''.join(random.choice(chars) for _ in range(size))
@@ -380,13 +396,41 @@ def is_ascii(string):
     return all(ord(character) < 128 for character in string)
 
 
-def unicode_decode(string):
-    """Detects encoding and decodes a unicode encoded string."""
-    encoding = chardet.detect(string)['encoding']
-    raw_unicode = unicode(string, encoding)
+def unicode_decode(string, encoding=None):
+    """Decodes a string into NFC normalized unicode.
+
+    Detecting the encoding is slow, so if many strings share an encoding
+    (like the cells of a file, see detect_encoding), pass it as encoding. The
+    encoding is only detected if it isn't supplied or the string isn't valid
+    in it.
+    """
+    raw_unicode = None
+    if encoding:
+        try:
+            raw_unicode = unicode(string, encoding)
+        except UnicodeDecodeError:
+            pass
+    if raw_unicode is None:
+        encoding = chardet.detect(string)['encoding']
+        raw_unicode = unicode(string, encoding)
     return unicodedata.normalize('NFC', raw_unicode)
 
 
+def detect_encoding(filepath, sample_size=ENCODING_SAMPLE_SIZE):
+    """Detect the encoding of a file from its first sample_size bytes, for
+    unicode_decode.
+
+    A sample that's all ASCII is reported as UTF-8, since that also decodes
+    ASCII and is the most likely encoding for anything later in the file.
+    """
+    with open(filepath, 'rb') as f:
+        sample = f.read(sample_size)
+    encoding = chardet.detect(sample)['encoding']
+    if not encoding or encoding.lower() == 'ascii':
+        return 'utf-8'
+    return encoding
+
+
 def parse_datestring(datestring):
     """Parse the datestring using the normal QS date format into a date obj.
 
@@ -0,0 +1,86 @@
+"""Test the concurrency module"""
+
+import time
+import threading
+import qs
+from nose.tools import *
+
+
+def test_concurrent_map_keeps_order():
+    def slow_double(i):
+        time.sleep(0.01 * (5 - i))
+        return i * 2
+    assert_equals(qs.concurrent_map(slow_double, range(5)), [0, 2, 4, 6, 8])
+
+
+def test_concurrent_map_empty():
+    assert_equals(qs.concurrent_map(lambda x: x, []), [])
+
+
+def test_concurrent_map_is_bounded():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def track(i):
+        with lock:
+            running.append(i)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(i)
+
+    qs.concurrent_map(track, range(20), workers=3)
+    assert_less_equal(max(peak), 3)
+
+
+def test_concurrent_imap_unordered_yields_items():
+    results = dict(qs.concurrent_imap(lambda x: x + 1, range(5),
+        ordered=False))
+    assert_equals(results, {0: 1, 1: 2, 2: 3, 3: 4, 4: 5})
+
+
+def test_exceptions_reach_caller():
+    def fail_on_three(i):
+        if i == 3:
+            raise ValueError(i)
+        return i
+    with assert_raises(ValueError):
+        qs.concurrent_map(fail_on_three, range(5))
+
+
+def test_system_exit_reaches_caller():
+    def exit_on_three(i):
+        if i == 3:
+            raise SystemExit('critical')
+        return i
+    with assert_raises(SystemExit):
+        qs.concurrent_map(exit_on_three, range(5))
+
+
+def _square(i):
+    return i * i
+
+
+def _fail_on_three(i):
+    if i == 3:
+        raise ValueError(i)
+    return i
+
+
+def test_process_imap_keeps_order():
+    assert_equals(
+        list(qs.process_imap(_square, xrange(2500), processes=3,
+            chunk_size=100)),
+        [i * i for i in xrange(2500)])
+    assert_equals(list(qs.process_imap(_square, [], processes=2)), [])
+
+
+def test_process_imap_single_process():
+    assert_equals(list(qs.process_imap(_square, [1, 2], processes=1)), [1, 4])
+
+
+def test_process_imap_reraises():
+    with assert_raises(ValueError):
+        list(qs.process_imap(_fail_on_three, range(5), processes=2,
+            chunk_size=2))
@@ -0,0 +1,271 @@
+"""Test reading and writing CSVs with qs.csv_tools"""
+
+import os
+import shutil
+import tempfile
+import qs
+from nose.tools import *
+
+CSV_TEXT = (
+    'Name,Grade\n'
+    'Jane,A\n'
+    ',\n'
+    'Jos\xc3\xa9,B\n')
+
+
+def setup():
+    global temp_dir, path
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'grades.csv')
+    with open(path, 'w') as f:
+        f.write(CSV_TEXT)
+
+
+def teardown():
+    shutil.rmtree(temp_dir)
+
+
+def test_iter_csv_matches_csv():
+    assert_equals(list(qs.iter_csv(path)), qs.CSV(path).rows)
+
+
+def test_iter_csv_rows():
+    rows = list(qs.iter_csv(path))
+    assert_equals(rows, [
+        {u'Name': u'Jane', u'Grade': u'A'},
+        {u'Name': u'Jos\xe9', u'Grade': u'B'},
+    ])
+
+
+def test_iter_csv_is_lazy():
+    rows = qs.iter_csv(path)
+    assert_equals(next(rows)['Name'], 'Jane')
+
+
+def test_missing_required_cols():
+    with assert_raises(ValueError):
+        next(qs.iter_csv(path, required_cols=['Name', 'Section']))
+    with assert_raises(ValueError):
+        qs.CSV(path, stream=True, required_cols=['Section'])
+
+
+def test_streaming_csv():
+    csv = qs.CSV(path, stream=True, required_cols=['Name'])
+    assert_equals(csv.cols, ['Name', 'Grade'])
+    assert_equals(csv.rows, [])
+    assert_equals(list(csv), list(qs.iter_csv(path)))
+    # it can be iterated over more than once
+    assert_equals(len(list(csv)), 2)
+    with assert_raises(TypeError):
+        len(csv)
+
+
+def test_csv_writer():
+    output_path = os.path.join(temp_dir, 'output.csv')
+    with qs.CSVWriter(output_path, ['Name', 'Grade'], True) as writer:
+        writer.writerows(qs.iter_csv(path))
+        writer.writerow({'Name': 'Sam', 'Grade': None})
+    assert_equals(writer.filepath, output_path)
+    with open(output_path) as f:
+        assert_equals(
+            f.read(),
+            'Name,Grade\r\nJane,A\r\nJos\xc3\xa9,B\r\nSam,\r\n')
+
+
+def test_csv_writer_unique_path():
+    output_path = os.path.join(temp_dir, 'unique.csv')
+    with qs.CSVWriter(output_path, ['Name']) as writer:
+        writer.writerow({'Name': 'Jane'})
+    with qs.CSVWriter(output_path, ['Name']) as second_writer:
+        second_writer.writerow({'Name': 'Jane'})
+    assert_not_equal(writer.filepath, second_writer.filepath)
+    assert_true(os.path.exists(second_writer.filepath))
+
+
+def test_detected_encoding():
+    latin_1_path = os.path.join(temp_dir, 'latin_1.csv')
+    with open(latin_1_path, 'w') as f:
+        f.write('Name,Comment\nJos\xe9,caf\xe9 cr\xe8me\n')
+    csv = qs.CSV(latin_1_path)
+    assert_equals(csv.encoding.lower(), 'iso-8859-1')
+    assert_equals(csv[0]['Name'], u'Jos\xe9')
+    assert_equals(qs.CSV(path).encoding, 'utf-8')
+
+
+def test_encoding_override():
+    csv = qs.CSV(path, encoding='latin-1')
+    assert_equals(csv.encoding, 'latin-1')
+    assert_equals(csv[1]['Name'], u'Jos\xc3\xa9')
+
+
+def test_csv_match():
+    match_path = os.path.join(temp_dir, 'match.csv')
+    with open(match_path, 'w') as f:
+        f.write(
+            'Name,Section,Teacher\n'
+            'Jane Doe,Math,Smith\n'
+            'Sam Lee,Math,Jones\n'
+            'Jones,Art,Jones\n')
+    csv = qs.CSVMatch(match_path)
+
+    assert_equals(csv.row_for_key_val('Name', 'Sam Lee')['Teacher'], 'Jones')
+    assert_is_none(csv.row_for_key_val('Name', 'Nobody'))
+    assert_is_none(csv.row_for_key_val('Name', ''))
+    assert_is_none(csv.row_for_key_val('Name', ' jane  DOE '))
+    assert_equals(
+        csv.row_for_key_val('Name', ' jane  DOE ', use_sanitized=True),
+        csv[0])
+    with assert_raises(qs.MultipleMatchError) as context:
+        csv.row_for_key_val('Section', 'Math')
+    assert_equals(context.exception.matches, csv.rows[:2])
+    with assert_raises(KeyError):
+        csv.row_for_key_val('Grade', 'A')
+
+    assert_equals(csv.row_for_val('Art'), csv[2])
+    # Jones is in two columns of the last row, but that's one match
+    assert_equals(csv.row_for_val('jones', True, multiple_ok=True),
+        csv.rows[1:])
+    with assert_raises(ValueError):
+        csv.row_for_val('Jones')
+
+    extra_path = os.path.join(temp_dir, 'extra.csv')
+    with open(extra_path, 'w') as f:
+        f.write('Name,Section\nJane Doe,Math,extra\n')
+    # the cells past the last column aren't matched
+    assert_equals(qs.CSVMatch(extra_path).row_for_val('Math')['Name'],
+        'Jane Doe')
+    assert_is_none(qs.CSVMatch(extra_path).row_for_val('extra'))
+
+    csv.rows.append({u'Name': u'New', u'Section': u'Art', u'Teacher': u''})
+    assert_is_none(csv.row_for_key_val('Name', 'New'))
+    csv.reindex()
+    assert_equals(csv.row_for_key_val('Name', 'New')['Section'], 'Art')
+
+
+def test_csv_tree():
+    tree_path = os.path.join(temp_dir, 'tree.csv')
+    with open(tree_path, 'w') as f:
+        f.write(
+            'Name,Subject,Term,Grade\n'
+            'Jane,Math,1,A\n'
+            'Jane,Math,2,B\n'
+            'Jane,Art,1,A\n'
+            'Sam,Math,1,C\n'
+            'Sam,Math,1,D\n'
+            'Sam,Art,2,\n')
+    tree = {
+        'Jane': {
+            'Math': {'1': 'A', '2': 'B'},
+            'Art': {'1': 'A'},
+        },
+        'Sam': {
+            'Math': {'1': ['C', 'D']},
+            'Art': {'2': None},
+        },
+    }
+    assert_equals(qs.CSVTree(tree_path).tree(), tree)
+    assert_equals(qs.CSVTree(tree_path, stream=True).tree(), tree)
+    assert_equals(
+        qs.CSVTree(tree_path).tree(['Subject', 'Name']),
+        {'Math': ['Jane', 'Sam'], 'Art': ['Jane', 'Sam']})
+    with assert_raises(ValueError):
+        qs.CSVTree(tree_path).tree(['Name'])
+
+    output_path = qs.dict_to_csv(
+        tree, ['Name', 'Subject', 'Term', 'Grade'],
+        os.path.join(temp_dir, 'from_tree.csv'))
+    assert_equals(
+        sorted(qs.CSV(output_path).rows),
+        sorted(qs.CSV(tree_path).rows))
+
+
+def test_indexed_csv():
+    for name, text in [
+            ('plain.csv', CSV_TEXT),
+            ('quoted.csv',
+                'Name,Comment\r\n'
+                'Jane,"two\r\nlines"\r\n'
+                ',\r\n'
+                '"Sam ""S"" Lee",\r\n'
+                'Ana,"a, b",extra\r\n'
+                'Short\r\n')]:
+        indexed_path = os.path.join(temp_dir, name)
+        with open(indexed_path, 'wb') as f:
+            f.write(text)
+        rows = qs.CSV(indexed_path).rows
+
+        with qs.IndexedCSV(indexed_path) as csv:
+            assert_equals(len(csv), len(rows))
+            assert_equals([csv[i] for i in range(len(csv))], rows)
+            assert_equals(csv[-1], rows[-1])
+            assert_equals(csv[1:], rows[1:])
+            assert_equals(list(csv), rows)
+            with assert_raises(IndexError):
+                csv[len(rows)]
+        assert_true(os.path.exists(indexed_path + '.rowindex'))
+
+        # the saved index is used, and still gives the same rows
+        csv = qs.IndexedCSV(indexed_path)
+        assert_equals(csv[:], rows)
+        csv.close()
+
+
+def test_indexed_csv_stale_index():
+    indexed_path = os.path.join(temp_dir, 'changing.csv')
+    with open(indexed_path, 'w') as f:
+        f.write('Name\nJane\n')
+    qs.IndexedCSV(indexed_path).close()
+    with open(indexed_path, 'a') as f:
+        f.write('Sam\n')
+    # a different size means the saved index is out of date
+    csv = qs.IndexedCSV(indexed_path, save_index=False)
+    assert_equals(csv[-1], {u'Name': u'Sam'})
+    csv.close()
+
+
+def _lower_grade(row):
+    if row['Name'] == 'Jane':
+        return None
+    return {'Name': row['Name'], 'Grade': row['Grade'].lower()}
+
+
+def test_map_rows():
+    for stream in (False, True):
+        csv = qs.CSV(path, stream=stream)
+        output_path = csv.map_rows(_lower_grade, processes=2, chunk_size=1)
+        assert_not_equal(output_path, path)
+        assert_equals(qs.CSV(output_path).rows,
+            [{u'Name': u'Jos\xe9', u'Grade': u'b'}])
+
+    copy_path = os.path.join(temp_dir, 'copy.csv')
+    shutil.copy(path, copy_path)
+    csv = qs.CSV(copy_path, stream=True)
+    assert_equals(
+        csv.map_rows(_lower_grade, cols=['Grade', 'Name'], overwrite=True),
+        copy_path)
+    assert_equals(qs.CSV(copy_path).cols, ['Grade', 'Name'])
+
+
+def test_forward_fill():
+    cols = ['Year', 'Section', 'Student', 'Grade']
+    rows = [
+        {'Year': '2020', 'Section': 'Math', 'Student': 'Jane', 'Grade': 'A'},
+        {'Year': None, 'Section': None, 'Student': 'Sam', 'Grade': None},
+        {'Year': None, 'Section': 'Art', 'Student': 'Jane', 'Grade': 'B'},
+        {'Year': '', 'Section': '', 'Student': 'Ana', 'Grade': 'C'},
+    ]
+    to_fill = qs.pivot_cols_to_fill(rows, cols)
+    # Student has no empty cells, so Grade's are blank data
+    assert_equals(to_fill, ['Year', 'Section'])
+    filled = qs.forward_fill(rows, to_fill)
+    assert_equals(next(filled)['Section'], 'Math')
+    assert_equals(
+        [(row['Year'], row['Section'], row['Grade']) for row in filled],
+        [('2020', 'Math', None), ('2020', 'Art', 'B'), ('2020', 'Art', 'C')])
+
+    # cells before a column's first value stay empty, however many there are
+    rows = [{'A': None}] * 5000 + [{'A': 'x'}, {'A': None}]
+    assert_equals(
+        [row['A'] for row in qs.forward_fill(
+            (dict(row) for row in rows), ['A'])][-3:],
+        [None, 'x', 'x'])
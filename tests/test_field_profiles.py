@@ -0,0 +1,46 @@
+"""Test the field_profiles module"""
+
+import qs
+from nose.tools import *
+
+
+def test_projection_fields():
+    assert_equals(qs.projection_fields('id_and_name'), ['id', 'fullName'])
+    assert_equals(qs.projection_fields(['id']), ['id'])
+    with assert_raises(ValueError):
+        qs.projection_fields('not a profile')
+
+
+def test_tracked_dict():
+    tracker = qs.KeyTracker()
+    student = qs.TrackedDict(
+        {'id': '1', 'fullName': 'Doe, Jane', 'gender': 'F'},
+        tracker,
+        'student')
+    student['id']
+    student.get('fullName')
+    assert_equals(tracker.suggest(), {'student': ['fullName', 'id']})
+    student.items()
+    assert_equals(tracker.suggest(), {'student': ['fullName', 'gender', 'id']})
+
+
+def test_cache_projection_and_tracking():
+    cache = qs.ListWithIDCache(sort_key='fullName')
+    cache.add([
+        {'id': '2', 'fullName': 'b', 'gender': 'F', '_hidden': 1},
+        {'id': '1', 'fullName': 'a', 'gender': 'M'},
+    ])
+    assert_equals(cache.get(projection='id_and_name'), [
+        {'id': '1', 'fullName': 'a'},
+        {'id': '2', 'fullName': 'b'},
+    ])
+    assert_equals(cache.get('2', projection=['gender']), {'gender': 'F'})
+    assert_equals(cache.get(by_id=True, projection='id'), {
+        '1': {'id': '1'},
+        '2': {'id': '2'},
+    })
+
+    tracker = qs.KeyTracker()
+    cache.key_tracker = (tracker, 'student')
+    [i['fullName'] for i in cache.get()]
+    assert_equals(tracker.suggest(), {'student': ['fullName']})
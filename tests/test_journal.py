@@ -0,0 +1,84 @@
+"""Test the journal module"""
+
+import os
+import qs
+from nose.tools import *
+
+path = '/tmp/qstools_test_journal.jsonl'
+
+
+def setup():
+    teardown()
+
+
+def teardown():
+    if os.path.exists(path):
+        os.remove(path)
+
+
+@with_setup(setup, teardown)
+def test_run_skips_done_steps():
+    calls = []
+
+    def post(x):
+        calls.append(x)
+        return {'id': x}
+
+    journal = qs.Journal(path)
+    assert_equals(journal.run('a', post, 1), {'id': 1})
+    assert_true(journal.done('a'))
+
+    resumed = qs.Journal(path)
+    assert_equals(resumed.run('a', post, 2), {'id': 1})
+    assert_equals(calls, [1])
+    assert_equals(len(resumed), 1)
+
+
+@with_setup(setup, teardown)
+def test_failed_steps_run_again():
+    def fail():
+        raise SystemExit('critical')
+
+    journal = qs.Journal(path)
+    with assert_raises(SystemExit):
+        journal.run(('section', 1), fail)
+    assert_false(journal.done(('section', 1)))
+
+    resumed = qs.Journal(path)
+    assert_equals(resumed.run('section:1', lambda: 'ok'), 'ok')
+    assert_equals(resumed.interrupted, [])
+
+
+@with_setup(setup, teardown)
+def test_none_results_fail():
+    # how a qs request that fails without critical=True returns
+    journal = qs.Journal(path)
+    with assert_raises(qs.StepFailedError):
+        journal.run('assignment', lambda: None)
+    assert_false(journal.done('assignment'))
+
+    resumed = qs.Journal(path)
+    assert_false(resumed.done('assignment'))
+    assert_equals(resumed.run('assignment', lambda: {'id': 1}), {'id': 1})
+
+
+@with_setup(setup, teardown)
+def test_interrupted_and_cut_off_lines():
+    qs.Journal(path).run('a', lambda: 1)
+    with open(path, 'a') as f:
+        f.write('{"key": "b", "status": "started", "time": 1}\n')
+        f.write('{"key": "c", "sta')
+
+    journal = qs.Journal(path)
+    assert_equals(journal.interrupted, ['b'])
+    assert_equals(journal.run('c', lambda: 3), 3)
+    assert_true(qs.Journal(path).done('c'))
+
+
+@with_setup(setup, teardown)
+def test_bar_skips_done_items():
+    journal = qs.Journal(path)
+    for i in [1, 3]:
+        journal.run(i, lambda: True)
+    assert_equals(journal.pending(range(5)), [0, 2, 4])
+    assert_equals(list(journal.bar(range(5))), [0, 2, 4])
@@ -0,0 +1,67 @@
+"""Test the multi_school module"""
+
+import os
+import shutil
+import tempfile
+import qs
+from nose.tools import *
+
+
+def schoolcode_and_cwd(q, fail_for=None):
+    if q.api_key == fail_for:
+        qs.logger.critical('Failing on purpose')
+    print 'printed for', q.schoolcode
+    return q.schoolcode, os.getcwd()
+
+
+def make_output_dir():
+    global output_dir
+    output_dir = tempfile.mkdtemp()
+
+
+def remove_output_dir():
+    shutil.rmtree(output_dir)
+
+
+def test_stored_schoolcodes():
+    assert_in('qstools', qs.stored_schoolcodes())
+
+
+@with_setup(make_output_dir, remove_output_dir)
+def test_run_for_schools():
+    runs = qs.run_for_schools(
+        schoolcode_and_cwd,
+        ['qstools', 'qstools.fakeapikey'],
+        args=('qstools.fakeapikey',),
+        output_dir=output_dir)
+
+    assert_equals([i['schoolcode'] for i in runs],
+        ['qstools', 'qstools.fakeapikey'])
+    assert_true(runs[0]['successful'])
+    assert_equals(runs[0]['result'],
+        ('qstools', os.path.join(output_dir, 'qstools')))
+    assert_false(runs[1]['successful'])
+    assert_in('Failing on purpose', runs[1]['error'])
+
+    school_dir = os.path.join(output_dir, 'qstools')
+    with open(os.path.join(school_dir, 'output.txt')) as f:
+        assert_in('printed for qstools', f.read())
+    assert_true(os.listdir(os.path.join(school_dir, 'logs')))
+    assert_true(os.path.exists(os.path.join(output_dir, 'school_report.csv')))
+
+
+@with_setup(make_output_dir, remove_output_dir)
+def test_run_script_for_schools():
+    script_path = os.path.join(output_dir, 'script.py')
+    with open(script_path, 'w') as f:
+        f.write('import sys\n'
+            'open(sys.argv[1] + ".txt", "w").write(sys.argv[2])\n')
+
+    runs = qs.run_script_for_schools(
+        script_path,
+        ['{schoolcode}-arg'],
+        schoolcodes=['qstools'],
+        output_dir=output_dir)
+    assert_true(runs[0]['successful'])
+    with open(os.path.join(output_dir, 'qstools', 'qstools.txt')) as f:
+        assert_equals(f.read(), 'qstools-arg')
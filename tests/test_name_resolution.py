@@ -0,0 +1,120 @@
+"""Test resolving names to records with qs.name_resolution"""
+
+import random
+import time
+import qs
+from nose.tools import *
+
+STUDENTS = [
+    {'id': '1', 'fullName': u'Doe, Jane'},
+    {'id': '2', 'fullName': u'Smith, John'},
+    {'id': '3', 'fullName': u'Mu\xf1oz, Jos\xe9'},
+    {'id': '4', 'fullName': u'Lee, Sam'},
+    {'id': '5', 'fullName': u'Lee, Sam'},
+    {'id': '6', 'fullName': u'Johnson, Emily'},
+]
+
+
+def setup():
+    global resolver
+    resolver = qs.NameResolver(STUDENTS)
+
+
+def _resolved_id(name):
+    match = resolver.resolve(name)
+    return match['record']['id'] if match else None
+
+
+def test_exact_matches():
+    for name in ['Doe, Jane', 'Jane Doe', '  jane   DOE ', 'doe,jane']:
+        match = resolver.resolve(name)
+        assert_equals(match['record']['id'], '1')
+        assert_equals(match['confidence'], 1)
+
+
+def test_unicode_normalization():
+    # utf-8 bytes, and decomposed accents
+    assert_equals(_resolved_id('Jos\xc3\xa9 Mu\xc3\xb1oz'), '3')
+    assert_equals(_resolved_id(u'Jose\u0301 Mun\u0303oz'), '3')
+
+
+def test_fuzzy_match():
+    match = resolver.resolve('Jon Smith')
+    assert_equals(match['record']['id'], '2')
+    assert_less(match['confidence'], 1)
+    assert_greater_equal(match['confidence'], qs.DEFAULT_MIN_CONFIDENCE)
+    assert_equals(_resolved_id('Johnsen, Emily'), '6')
+
+
+def test_no_match():
+    assert_is_none(resolver.resolve('Someone Else'))
+    assert_is_none(resolver.resolve(''))
+    strict = qs.NameResolver(STUDENTS, min_confidence=0.95)
+    assert_is_none(strict.resolve('Jon Smith'))
+    case_sensitive = qs.NameResolver(
+        STUDENTS, min_confidence=1, ignore_case=False)
+    assert_is_none(case_sensitive.resolve('jane doe'))
+    assert_equals(case_sensitive.resolve('Jane Doe')['record']['id'], '1')
+
+
+def test_duplicates():
+    assert_equals(resolver.duplicates.keys(), [u'sam lee'])
+    assert_is_none(resolver.resolve('Sam Lee'))
+
+
+def test_name_key():
+    teachers = [{'id': '7', 'name': 'Ms. Ada Lovelace'}]
+    resolver = qs.NameResolver(teachers, name_key='name')
+    assert_equals(resolver.resolve('ms ada lovelace')['record']['id'], '7')
+
+
+def test_speed():
+    students = [
+        {'id': str(i), 'fullName': u'Last{}, First{}'.format(i, i)}
+        for i in range(10000)
+    ]
+    resolver = qs.NameResolver(students)
+    start = time.time()
+    for i in range(10000):
+        resolver.resolve(u'first{} LAST{}'.format(i, i))
+    assert_less(time.time() - start, 1)
+
+
+def test_fuzzy_speed():
+    first = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer',
+        'Michael', 'Linda', 'William', 'Elizabeth', 'David', 'Barbara',
+        'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+        'Charles', 'Karen', 'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony',
+        'Betty', 'Mark', 'Margaret', 'Donald', 'Sandra', 'Steven', 'Ashley',
+        'Paul', 'Kimberly', 'Andrew', 'Emily', 'Joshua', 'Donna', 'Kenneth',
+        'Michelle']
+    last = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia',
+        'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez',
+        'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+        'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White', 'Harris',
+        'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson', 'Walker',
+        'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen',
+        'Hill', 'Flores']
+    suffixes = ['', 'son', 'ley', 'ton', 'er', 'man', 'ford', 'wood',
+        'field', 'berg']
+    generator = random.Random(1)
+    names = set()
+    while len(names) < 10000:
+        names.add(u'{}{}, {} {}'.format(
+            generator.choice(last), generator.choice(suffixes),
+            generator.choice(first), generator.choice(first)))
+    names = sorted(names)
+    resolver = qs.NameResolver(
+        [{'id': str(i), 'fullName': name} for i, name in enumerate(names)])
+    # drop a letter from each name, so none of them match exactly
+    typos = []
+    for name in names:
+        i = generator.randint(1, len(name) - 2)
+        typos.append(name[:i] + name[i + 1:])
+    start = time.time()
+    matches = [resolver.resolve(name) for name in typos]
+    assert_less(time.time() - start, 1)
+    assert_greater(
+        sum(1 for match, name in zip(matches, names)
+            if match and match['record']['fullName'] == name),
+        9000)
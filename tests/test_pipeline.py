@@ -0,0 +1,40 @@
+"""Test the pipeline module"""
+
+import qs
+from nose.tools import *
+
+
+def test_chain_passes_results_along():
+    chain = qs.Chain('a').then(lambda _: 1).then(lambda x: x + 1)
+    result = chain.run()
+    assert_true(result.successful)
+    assert_equals(result.results, [1, 2])
+
+
+def test_chain_stops_at_failure():
+    ran = []
+
+    def fail(_):
+        raise SystemExit('critical')
+
+    chain = qs.Chain('a').then(lambda _: 1).then(fail).then(ran.append)
+    result = chain.run()
+    assert_false(result.successful)
+    assert_is_instance(result.error, SystemExit)
+    assert_equals(result.results, [1])
+    assert_equals(ran, [])
+
+
+def test_run_chains_isolates_failures():
+    def fail(_):
+        raise ValueError()
+
+    chains = [
+        qs.Chain(i).then(lambda _, i=i: i).then(fail if i == 2 else str)
+        for i in range(5)
+    ]
+    results = qs.run_chains(chains, workers=3)
+    assert_equals([r.name for r in results], range(5))
+    assert_equals([r.successful for r in results],
+        [True, True, False, True, True])
+    assert_equals(results[4].results, [4, '4'])
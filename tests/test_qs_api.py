@@ -73,3 +73,41 @@ def test_make_request_no_cache():
     students = q.get_students(fields='deleted')
     assert_true(all('deleted' in i for i in students))
     assert_false(any('deleted' in i for i in q.get_students(use_cache=False)))
+
+
+def test_dry_run_fakes_mutating_requests():
+    q = qs.API(dry_run=True)
+    assignment = q.post_assignment(SECTION_ID, 'Dry run', '2015-01-01', 10)
+    q.post_grades(SECTION_ID, assignment['id'], [{
+        'studentId': STUDENT_ID,
+        'marks': MARKS,
+    }])
+    assert_equals(assignment['name'], 'Dry run')
+    assert_equals(q.plan.counts, {
+        ('POST', '/sections/{id}/assignments'): 1,
+        ('POST', '/grades'): 1,
+    })
+
+
+def test_dry_run_post_sections():
+    q = qs.API(dry_run=True)
+    q.get_active_semester_id = lambda: '1234'
+    section_ids = q.post_sections({
+        'MATH-1': {
+            'section_name': 'Math',
+            'section_code': 'MATH-1',
+            'class_id': '1',
+            'teacher_id': '2',
+        },
+    }, print_log=True)
+    assert_true(section_ids['MATH-1'].startswith('dry-run-'))
+    section = q._section_cache.get(section_ids['MATH-1'])
+    assert_equals(section['semesterId'], '1234')
+    assert_equals(q.plan.counts, {('POST', '/sections'): 1})
+
+
+def test_request_budget():
+    q = qs.API(dry_run=True, request_budget=1)
+    q.post_assignment(SECTION_ID, 'Dry run', '2015-01-01', 10)
+    with assert_raises(qs.RequestBudgetExceeded):
+        q.post_assignment(SECTION_ID, 'Dry run', '2015-01-01', 10)
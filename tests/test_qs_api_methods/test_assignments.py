@@ -1,6 +1,7 @@
 """Test methods related to the /assignments endpoints."""
 
 from nose.tools import *
+from mock import MagicMock
 import qs
 from qs.test_data import *
 
@@ -52,6 +53,77 @@ def test_with_grades():
     assert_true(found_student)
 
 
+def test_with_grades_leaves_cache_alone():
+    q.get_assignments(SECTION_WITH_GB, include_grades=True)
+    for assignment in q.get_assignments(SECTION_WITH_GB):
+        assert_not_in('grades', assignment)
+
+
 def test_get_assignment_including_grades():
     with assert_raises(TypeError):
         q.get_assignment(ASSIGNMENT_ID, include_grades=True)
+
+
+def test_post_assignments_with_grades():
+    q2 = qs.API()
+    assignment_ids = iter(range(100))
+
+    def fake_make_request(request, **kwargs):
+        if 'fail' in request.uri:
+            raise SystemExit('critical')
+        request.successful = True
+        if request.uri.endswith('/assignments'):
+            return {'id': str(next(assignment_ids))}
+        return {'success': True}
+
+    q2._make_request = MagicMock(side_effect=fake_make_request)
+    grades = [{'studentId': STUDENT_ID, 'marks': MARKS}]
+    results = q2.post_assignments_with_grades([{
+        'section_id': section_id,
+        'name': name,
+        'date': '2015-01-01',
+        'total_marks_possible': 10,
+        'grades': grades,
+    } for section_id in [SECTION_WITH_GB, 'fail'] for name in 'ab'])
+
+    assert_equals([r['name'] for r in results], ['a', 'b', 'a', 'b'])
+    for result in results[:2]:
+        assert_is_not_none(result['assignment id'])
+        assert_equals(result['grades posted'], 1)
+    for result in results[2:]:
+        assert_is_none(result['assignment id'])
+        assert_equals(result['grades failed'], grades)
+
+
+def test_post_assignments_with_grades_failed_post():
+    q2 = qs.API()
+    assignment_ids = iter(range(100))
+
+    def fake_make_request(request, **kwargs):
+        # a failed request that isn't critical returns None
+        if 'fail' in request.uri:
+            request.successful = False
+            return None
+        request.successful = True
+        if request.uri.endswith('/assignments'):
+            return {'id': str(next(assignment_ids))}
+        return {'success': True}
+
+    q2._make_request = MagicMock(side_effect=fake_make_request)
+    grades = [{'studentId': STUDENT_ID, 'marks': MARKS}]
+    results = q2.post_assignments_with_grades([{
+        'section_id': section_id,
+        'name': name,
+        'date': '2015-01-01',
+        'total_marks_possible': 10,
+        'grades': grades,
+    } for section_id in ['fail', SECTION_WITH_GB] for name in 'ab'])
+
+    for result in results[:2]:
+        assert_is_none(result['assignment id'])
+        assert_equals(result['grades posted'], 0)
+        assert_equals(result['grades failed'], grades)
+    assert_equals([r['assignment id'] for r in results[2:]], ['0', '1'])
+    for result in results[2:]:
+        assert_equals(result['grades posted'], 1)
+        assert_equals(result['grades failed'], [])
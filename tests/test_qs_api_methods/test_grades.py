@@ -1,7 +1,9 @@
 """Test methods related to the /grades endpoint"""
 
+import json
 from nose.tools import *
 import qs
+from mock import MagicMock
 from qs.test_data import *
 
 
@@ -25,3 +27,52 @@ def test_get_grades_for_assignment():
     grades = q.get_grades(SECTION_WITH_GB, student_id=STUDENT_ID)
     for grade in grades:
         assert_equals(grade['studentId'], STUDENT_ID)
+
+
+def test_get_all_grades():
+    q2 = qs.API()
+    all_grades = q2.get_all_grades()
+    assert_in(SECTION_WITH_GB, [i['sectionId'] for i in all_grades])
+
+    q2._make_request = MagicMock()
+    for_section = q2.get_grades(SECTION_WITH_GB)
+    for_sections = [i for i in all_grades if i['sectionId'] == SECTION_WITH_GB]
+    assert_equals(len(for_section), len(for_sections))
+    assert_false(q2._make_request.called)
+
+    # once the cache is invalidated, the section's grades are requested again
+    q2._grade_cache.invalidate()
+    q2._make_request = MagicMock(return_value=[])
+    q2.get_grades(SECTION_WITH_GB)
+    assert_true(q2._make_request.called)
+
+
+def test_post_grades_for_assignments_in_chunks():
+    q2 = qs.API()
+    posted = []
+
+    def fake_make_request(request, **kwargs):
+        posted.append(json.loads(request.request_data['grades']))
+        request.successful = True
+        return {'success': True}
+
+    q2._make_request = MagicMock(side_effect=fake_make_request)
+    grades = [{'studentId': str(i), 'marks': '90'} for i in range(5)]
+    summary = q2.post_grades_for_assignments(
+        [(SECTION_WITH_GB, ASSIGNMENT_ID, grades), (SECTION_ID, '1', grades)],
+        chunk_size=2)
+
+    assert_equals(len(posted), 6)
+    assert_equals(summary['grades'], 10)
+    assert_equals(summary['failed'], [])
+
+
+def test_post_grades_updates_cached_assignment():
+    q2 = qs.API()
+    q2.get_grades(SECTION_WITH_GB)
+    q2.post_grades(SECTION_WITH_GB, ASSIGNMENT_ID, [{
+        'studentId': STUDENT_ID,
+        'marks': MARKS,
+    }])
+    grades = q2._grade_cache.get(cache_filter={'sectionId': SECTION_WITH_GB})
+    assert_is_not_none(grades)
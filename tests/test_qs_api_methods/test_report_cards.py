@@ -21,3 +21,25 @@ def test_get_active_report_cycle():
 def test_get_report_card():
     rc = q.get_report_card(STUDENT_ID)
     assert_equals(rc['sectionLevel'][SECTION_WITH_GB]['marks'], MARKS)
+
+
+def test_get_report_cards():
+    report_cycle_id = q.get_active_report_cycle()['id']
+    report_cards = q.get_report_cards([
+        (STUDENT_ID, None),
+        (STUDENT_ID, report_cycle_id),
+    ])
+    assert_equals(len(report_cards), 1)
+    assert_equals(report_cards[0]['studentId'], STUDENT_ID)
+    assert_equals(
+        report_cards[0]['sectionLevel'][SECTION_WITH_GB]['marks'],
+        MARKS)
+
+
+def test_iter_report_card_section_level():
+    rows = q.iter_report_card_section_level(
+        [(STUDENT_ID, None)],
+        identifiers=['marks'])
+    rows = {i['sectionId']: i for i in rows}
+    assert_equals(rows[SECTION_WITH_GB]['marks'], MARKS)
+    assert_equals(rows[SECTION_WITH_GB]['studentId'], STUDENT_ID)
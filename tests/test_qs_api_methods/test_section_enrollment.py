@@ -2,6 +2,7 @@
 
 from nose.tools import *
 import qs
+from mock import MagicMock
 from qs.test_data import *
 
 
@@ -31,6 +32,34 @@ def test_section_enrollments_using_get_section_kwargs():
     assert_in(NAS2_SECTION_ID, sections)
 
 
+def test_get_semester_enrollments():
+    enrollments = q.get_semester_enrollments(NAS1_SEMESTER_ID, by_id=True)
+    assert_equals(len(enrollments), NAS1_SECTION_COUNT)
+    assert_in(NAS1_SECTION_ID, enrollments)
+    assert_in('students', enrollments[NAS1_SECTION_ID])
+
+
+def test_get_semester_enrollments_resumes():
+    q2 = qs.API()
+    q2.get_semester_enrollments(NAS1_SEMESTER_ID)
+    q2._section_enrollment_cache.invalidate(NAS1_SECTION_ID)
+    q2._request_section_enrollment = MagicMock(
+        return_value={'id': NAS1_SECTION_ID, 'students': []})
+
+    q2.get_semester_enrollments(NAS1_SEMESTER_ID)
+    q2._request_section_enrollment.assert_called_once_with(NAS1_SECTION_ID)
+
+
+def test_get_student_enrollment_from_semester_index():
+    enrollments = q.get_semester_enrollments(NAS1_SEMESTER_ID)
+    for section_enrollment in enrollments:
+        for student in section_enrollment['students']:
+            student_sections = q.get_student_enrollment(
+                student['id'],
+                semester_id=NAS1_SEMESTER_ID)
+            assert_in(section_enrollment['id'], student_sections)
+
+
 def test_get_student_enrollments():
     enrollment_list = q.get_student_enrollments()
     first_id = enrollment_list[0]['id']
@@ -57,3 +86,26 @@ def assert_valid_enrollment(enrollment):
     for student in enrollment['students']:
         ids.append(student['id'])
     return set(ids) == set(SECTION_ENROLLMENT)
+
+
+def test_sync_section_enrollments_only_posts_missing():
+    q2 = qs.API()
+    enrolled = [i['id'] for i in q2.get_section_enrollment(SECTION_ID)['students']]
+    new_student = STUDENT['id']
+    requests = []
+
+    def fake_make_request(request, **kwargs):
+        requests.append(request)
+        request.successful = True
+
+    q2._make_request = MagicMock(side_effect=fake_make_request)
+    summary = q2.sync_section_enrollments({
+        SECTION_ID: enrolled + [new_student],
+        SECTION_WITH_ENROLLMENT_1: [],
+    })
+
+    assert_equals(len(requests), 1)
+    assert_equals(requests[0].verb, qs.POST)
+    assert_equals(summary['added'], {SECTION_ID: [new_student]})
+    assert_equals(summary['unchanged'], [SECTION_WITH_ENROLLMENT_1])
+    assert_equals(summary['removed'], {})
@@ -171,6 +171,45 @@ def test_posted_section():
         if k in posted_match:
             assert_equals(posted_match[k], v)
 
+
+def test_post_sections():
+    section_ids = q.post_sections({
+        'temp 3': {
+            'section_name': 'temp 3',
+            'section_code': 'temp 3',
+            'class_id': CLASS_ID,
+            'teacher_id': TEACHER_ID,
+        },
+        'temp 4': {
+            'section_name': 'temp 4',
+            'section_code': 'temp 4',
+            'class_id': CLASS_ID,
+            'teacher_id': [TEACHER_ID],
+            'credit_hours': 2,
+        },
+    })
+    assert_equals(set(section_ids.keys()), {'temp 3', 'temp 4'})
+    cached = q._section_cache.get(by_id=True)
+    for section_id in section_ids.values():
+        assert_in(section_id, cached)
+        q.delete_section(section_id)
+
+
+def test_post_sections_validates_first():
+    q2 = qs.API()
+    q2._make_request = MagicMock()
+    with assert_raises(ValueError):
+        q2.post_sections({
+            'good': {
+                'section_name': 'temp 5',
+                'section_code': 'temp 5',
+                'class_id': CLASS_ID,
+                'teacher_id': TEACHER_ID,
+            },
+            'bad': {'section_name': 'temp 6', 'class_id': CLASS_ID},
+        })
+    assert_false(q2._make_request.called)
+
 # ==================
 # = DELETE section =
 # ==================
@@ -13,3 +13,18 @@ def setup():
 def test_get_transcript():
     transcript = q.get_transcript(STUDENT_ID)
     assert_equals(transcript['sectionLevel'][SECTION_WITH_GB]['marks'], MARKS)
+
+
+def test_get_transcripts():
+    transcripts = q.get_transcripts([STUDENT_ID, STUDENT_ID], by_id=True)
+    assert_equals(transcripts.keys(), [STUDENT_ID])
+    transcript = transcripts[STUDENT_ID]
+    assert_equals(transcript['sectionLevel'][SECTION_WITH_GB]['marks'], MARKS)
+
+
+def test_iter_transcript_values():
+    rows = q.iter_transcript_values([STUDENT_ID], identifiers=['marks'])
+    rows = [i for i in rows if i['sectionId'] == SECTION_WITH_GB]
+    assert_equals(len(rows), 1)
+    assert_equals(rows[0]['identifier'], 'marks')
+    assert_equals(rows[0]['value'], MARKS)
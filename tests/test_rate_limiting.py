@@ -0,0 +1,69 @@
+"""Test the priority lanes of rate limited servers, without a network."""
+
+import time
+import threading
+import qs
+from nose.tools import *
+
+URL = 'http://example.com'
+
+
+def _run_waiting(server, priorities):
+    """Fill the server's window, then start a request for each priority and
+    return the priorities in the order they got through.
+    """
+    for i in range(server._limit):
+        server.register_request(URL, qs.NORMAL)
+
+    order = []
+    order_lock = threading.Lock()
+
+    def request(priority):
+        server.register_request(URL, priority)
+        with order_lock:
+            order.append(priority)
+
+    threads = []
+    for priority in priorities:
+        thread = threading.Thread(target=request, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        # make sure every request is waiting before the window opens
+        while sum(len(i) for i in server._lanes.values()) < len(threads):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_priority_order():
+    server = qs.rate_limiting._ServerWithWait('test', 1, 0.05)
+    order = _run_waiting(
+        server, [qs.BACKGROUND, qs.NORMAL, qs.INTERACTIVE])
+    assert_equals(order, [qs.INTERACTIVE, qs.NORMAL, qs.BACKGROUND])
+
+
+def test_background_is_not_starved():
+    server = qs.rate_limiting._ServerWithWait('test', 1, 0.05)
+    skips = qs.rate_limiting._MAX_SKIPS
+    order = _run_waiting(
+        server, [qs.BACKGROUND] + [qs.INTERACTIVE] * (skips + 2))
+    assert_equals(order.index(qs.BACKGROUND), skips)
+
+
+def test_limit_per_window():
+    server = qs.rate_limiting._ServerWithWait('test', 3, 0.05)
+    start = time.time()
+    for i in range(7):
+        server.register_request(URL, qs.BACKGROUND)
+    # 3 in the first window, 3 in the second, 1 in the third
+    assert_true(time.time() - start >= 0.1)
+    assert_equals(server.request_count, 7)
+
+
+def test_no_wait_time_doesnt_throttle():
+    server = qs.rate_limiting._ServerWithWait('test', 1, 0)
+    start = time.time()
+    for i in range(50):
+        server.register_request(URL)
+    assert_true(time.time() - start < 0.5)
@@ -0,0 +1,51 @@
+"""Test the read_routing module"""
+
+import qs
+from nose.tools import *
+
+
+def request(verb, uri):
+    request = qs.QSRequest('Testing', uri)
+    request.verb = verb
+    return request
+
+
+def test_fresh_enough_gets_use_backup():
+    routing = qs.ReadRouting(backup_lag=60, max_ages={'grades': 0})
+    assert_true(routing.use_backup(request(qs.GET, '/students')))
+    assert_true(routing.use_backup(request(qs.GET, '/sections/1/assignments')))
+    assert_false(routing.use_backup(request(qs.GET, '/grades')))
+    assert_equals(routing.counts, {'live': 1, 'backup': 2})
+
+
+def test_default_max_age():
+    routing = qs.ReadRouting(backup_lag=60, default_max_age=0,
+        max_ages={'students': 3600})
+    assert_true(routing.use_backup(request(qs.GET, '/students/123')))
+    assert_false(routing.use_backup(request(qs.GET, '/sections')))
+
+
+def test_reads_after_writes_use_live():
+    routing = qs.ReadRouting()
+    assert_true(routing.use_backup(request(qs.GET, '/sections/1/assignments')))
+    assert_false(routing.use_backup(
+        request(qs.POST, '/sections/1/assignments')))
+    assert_false(routing.use_backup(request(qs.GET, '/sections/2/assignments')))
+    assert_true(routing.use_backup(request(qs.GET, '/sections')))
+
+
+def test_writes_send_dependent_reads_to_live():
+    routing = qs.ReadRouting()
+    assert_true(routing.use_backup(request(qs.GET, '/students')))
+    assert_false(routing.use_backup(request(qs.POST, '/sectionenrollments/1')))
+    # active semester enrollments are read from /students
+    assert_false(routing.use_backup(request(qs.GET, '/students')))
+    assert_true(routing.use_backup(request(qs.GET, '/teachers')))
+
+
+def test_api_routes_to_backup():
+    q = qs.API(read_routing=qs.ReadRouting(), dry_run=True)
+    made = []
+    q._make_dry_run_request = lambda request: made.append(request)
+    q._make_request(qs.QSRequest('Testing', '/students'))
+    assert_equals(made[0].base_url, qs.QSBackupRequest.base_url)
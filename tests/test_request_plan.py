@@ -0,0 +1,79 @@
+"""Test the request_plan module"""
+
+import os
+import shutil
+import tempfile
+import qs
+from mock import patch
+from nose.tools import *
+
+
+def test_plan_groups_by_endpoint():
+    plan = qs.RequestPlan()
+    for uri in ['/sections/123/assignments', '/sections/456/assignments']:
+        request = qs.QSRequest('POST an assignment', uri)
+        request.verb = qs.POST
+        plan.add(request)
+    plan.add(qs.QSRequest('GET students', '/students'))
+    assert_equals(len(plan), 3)
+    assert_equals(plan.summary()['by endpoint'], {
+        'POST /sections/{id}/assignments': 2,
+        'GET /students': 1,
+    })
+
+
+def test_estimate_uses_rate_limits():
+    live = qs.RequestPlan()
+    backup = qs.RequestPlan()
+    for _ in range(20):
+        live.add(qs.QSRequest('GET students', '/students'))
+        backup.add(qs.QSBackupRequest('GET students', '/students'))
+    assert_equals(live.estimated_seconds(seconds_per_request=0), 4)
+    assert_equals(backup.estimated_seconds(seconds_per_request=0), 0)
+    assert_equals(live.estimated_seconds(seconds_per_request=1), 24)
+
+
+def test_budget():
+    plan = qs.RequestPlan(budget=2)
+    plan.add(qs.QSRequest('GET students', '/students'))
+    plan.add(qs.QSRequest('GET students', '/students'))
+    with assert_raises(qs.RequestBudgetExceeded):
+        plan.add(qs.QSRequest('GET students', '/students'))
+    assert_equals(len(plan), 2)
+
+
+def _students_request(page):
+    request = qs.QSRequest('GET students', '/students')
+    request.params['page'] = page
+    request.successful = True
+    request.data = [{'id': str(page), 'fullName': 'Student {}'.format(page)}]
+    request.return_type = 'Paged List'
+    request.paging_info = {'page': page}
+    return request
+
+
+def test_snapshot_written_once():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'school.json')
+        with patch.object(qs, 'write', wraps=qs.write) as write:
+            with qs.Snapshot(path) as snapshot:
+                for page in range(1, 4):
+                    snapshot.save(_students_request(page))
+                assert_false(os.path.exists(path))
+            snapshot.flush()
+        assert_equals(write.call_count, 1)
+        assert_equals(os.listdir(temp_dir), ['school.json'])
+
+        reloaded = qs.Snapshot(path)
+        request = qs.QSRequest('GET students', '/students')
+        request.params['page'] = 2
+        assert_true(reloaded.fill(request))
+        assert_equals(request.data, [{'id': '2', 'fullName': 'Student 2'}])
+        assert_equals(request.paging_info, {'page': 2})
+
+        with qs.API(dry_run=True, snapshot=path) as q:
+            q._snapshot.save(_students_request(4))
+        assert_equals(len(qs.Snapshot(path)._responses), 4)
+    finally:
+        shutil.rmtree(temp_dir)
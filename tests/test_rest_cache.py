@@ -109,3 +109,35 @@ def test_ignore_key():
     cache.add({'_ignore_me': 1234, 'id': 123})
     assert_not_in('_ignore_me', cache.get())
     assert_items_equal(cache.get(), sorted_version + [{'id': 123}])
+
+
+def test_list_with_id_cache_threads():
+    cache = qs.ListWithIDCache()
+    qs.concurrent_map(
+        lambda i: cache.add({'id': i}) or cache.get(),
+        range(200),
+        workers=10)
+    assert_equals(len(cache.get()), 200)
+
+
+def test_grade_cache_complete_sections():
+    cache = qs.GradeCache()
+    cache.add([
+        {'_qstools_id': '1-1-1', 'sectionId': '1'},
+        {'_qstools_id': '1-1-2', 'sectionId': '2'},
+    ])
+    cache.complete_sections.update(['1', '2', '3'])
+
+    cache.invalidate('1-1-1')
+    assert_equals(cache.complete_sections, {'2', '3'})
+    cache.invalidate('missing')
+    assert_equals(cache.complete_sections, {'2', '3'})
+
+    cache.invalidate()
+    assert_is_none(cache.get())
+    assert_equals(cache.complete_sections, set())
+
+    # sections without grades leave the cache empty, but are cleared too
+    cache.complete_sections.add('3')
+    cache.invalidate()
+    assert_equals(cache.complete_sections, set())
@@ -0,0 +1,133 @@
+"""Test the column-oriented qs.Table"""
+
+import os
+import shutil
+import tempfile
+import qs
+from nose.tools import *
+
+ENROLLMENTS = [
+    {'Student': 'Jane', 'Section': 'Math', 'Grade': '90'},
+    {'Student': 'Jane', 'Section': 'Art', 'Grade': '80'},
+    {'Student': 'Sam', 'Section': 'Math', 'Grade': '70'},
+    {'Student': 'Ana', 'Section': 'Math', 'Grade': ''},
+]
+
+
+def setup():
+    global table
+    table = qs.Table.from_rows(ENROLLMENTS, ['Student', 'Section', 'Grade'])
+
+
+def test_from_rows():
+    assert_equals(len(table), 4)
+    assert_equals(table.cols, ['Student', 'Section', 'Grade'])
+    assert_equals(list(table), ENROLLMENTS)
+    assert_equals(table[-1], ENROLLMENTS[-1])
+    assert_equals(table.column('Section'), ['Math', 'Art', 'Math', 'Math'])
+
+
+def test_dictionary_encoding():
+    column = table._columns['Section']
+    assert_equals(column.values, ['Math', 'Art'])
+    assert_equals(list(column.codes), [0, 1, 0, 0])
+
+
+def test_missing_keys():
+    table = qs.Table.from_rows([{'a': 1}, {'b': 'x'}])
+    assert_equals(table.cols, ['a', 'b'])
+    assert_equals(list(table), [
+        {'a': 1, 'b': None},
+        {'a': None, 'b': 'x'},
+    ])
+
+
+def test_numeric_columns():
+    table = qs.Table.from_rows(
+        [{'Grade': '90', 'Marks': 9}, {'Grade': '85.5', 'Marks': 10}],
+        numeric_cols=['Grade'])
+    assert_equals(table._columns['Grade'].numbers.typecode, 'd')
+    assert_equals(table._columns['Marks'].numbers.typecode, 'l')
+    assert_equals(table.column('Grade'), [90, 85.5])
+    assert_equals(table.where('Marks', lambda i: i > 9).column('Grade'),
+        [85.5])
+
+
+def test_where():
+    math = table.where('Section', lambda section: section == 'Math')
+    assert_equals(math.column('Student'), ['Jane', 'Sam', 'Ana'])
+    assert_equals(
+        table.where_in('Student', ['Sam', 'Ana']).column('Section'),
+        ['Math', 'Math'])
+    assert_equals(len(table.where('Student', lambda i: False)), 0)
+
+
+def test_sort_by():
+    assert_equals(
+        table.sort_by(['Student', 'Section']).column('Student'),
+        ['Ana', 'Jane', 'Jane', 'Sam'])
+
+
+def test_group_by():
+    grades = qs.Table.from_rows(
+        ENROLLMENTS[:3], numeric_cols=['Grade'])
+    groups = grades.group_by(['Student'], {
+        'Sections': (None, 'count'),
+        'Average': ('Grade', 'mean'),
+        'First Section': ('Section', 'first'),
+    })
+    assert_equals(groups.cols,
+        ['Student', 'Average', 'First Section', 'Sections'])
+    assert_equals(list(groups), [
+        {'Student': 'Jane', 'Sections': 2, 'Average': 85.0,
+            'First Section': 'Math'},
+        {'Student': 'Sam', 'Sections': 1, 'Average': 70.0,
+            'First Section': 'Math'},
+    ])
+    with assert_raises(ValueError):
+        grades.group_by(['Student'], {'x': ('Grade', 'median')})
+
+
+def test_join():
+    students = qs.Table.from_rows([
+        {'Student': 'Jane', 'Student ID': '1', 'Section': 'Homeroom A'},
+        {'Student': 'Sam', 'Student ID': '2', 'Section': 'Homeroom B'},
+    ], ['Student', 'Student ID', 'Section'])
+    joined = table.join(students, 'Student')
+    assert_equals(joined.cols,
+        ['Student', 'Section', 'Grade', 'Student ID', 'Section_2'])
+    assert_equals(joined.column('Student ID'), ['1', '1', '2'])
+
+    left = table.join(students, ['Student'], how='left')
+    assert_equals(left.column('Student ID'), ['1', '1', '2', None])
+    assert_equals(left[3]['Section_2'], None)
+    # the None added for the missing row isn't added to students' dictionary
+    assert_not_in(None, students._columns['Student ID'].values)
+
+
+def test_from_csv_and_save():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'enrollments.csv')
+        qs.write_csv(ENROLLMENTS, path, column_headers=table.cols)
+        from_csv = qs.Table.from_csv(qs.CSV(path, stream=True))
+        assert_equals(from_csv.cols, table.cols)
+        assert_equals(list(from_csv), [
+            {k: v or None for k, v in row.iteritems()}
+            for row in ENROLLMENTS
+        ])
+
+        saved_path = from_csv.save(path)
+        assert_not_equal(saved_path, path)
+        assert_equals(qs.CSV(saved_path).rows, qs.CSV(path).rows)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_from_cache():
+    cache = qs.ListWithIDCache(sort_key='fullName')
+    cache.add([{'id': '2', 'fullName': 'Sam'}, {'id': '1', 'fullName': 'Ana'}])
+    students = qs.Table.from_cache(cache)
+    assert_equals(students.column('fullName'), ['Ana', 'Sam'])
+    filtered = qs.Table.from_cache(cache, cache_filter={'id': '2'})
+    assert_equals(filtered.column('fullName'), ['Sam'])
@@ -0,0 +1,158 @@
+"""Stress test sharing one QSAPIWrapper between many threads, against a local
+stand-in for the QS server.
+"""
+
+import json
+import time
+import urlparse
+import threading
+import itertools
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+import qs
+from nose.tools import *
+
+THREADS = 20
+ASSIGNMENTS_PER_THREAD = 3
+TEMP_STORE_PATH = '~/.apikeys_testing.json'
+
+STUDENTS = [
+    {'id': str(i), 'fullName': 'Student {}'.format(i)} for i in range(50)]
+SECTIONS = [
+    {'id': str(100 + i), 'sectionName': 'Section {}'.format(i)}
+    for i in range(10)]
+TEACHERS = [
+    {'id': str(200 + i), 'fullName': 'Teacher {}'.format(i)}
+    for i in range(5)]
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Answers the handful of QS endpoints the test uses. Every request is
+    slow enough that threads overlap.
+    """
+    counts = {}
+    ids = itertools.count(1000)
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self._count('GET')
+        lists = {
+            '/students': STUDENTS,
+            '/sections': SECTIONS,
+            '/teachers': TEACHERS,
+        }
+        if path == '/semesters':
+            self._respond([{'id': '1', 'isActive': True, 'yearId': '9'}])
+        elif path in lists:
+            self._respond({
+                'list': lists[path],
+                'itemsPerPage': 1000,
+                'page': 1,
+                'numberOfPages': 1,
+                'numberOfItems': len(lists[path]),
+            })
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        path = self._count('POST')
+        length = int(self.headers.getheader('content-length') or 0)
+        data = urlparse.parse_qs(self.rfile.read(length))
+        with self.lock:
+            new_id = next(self.ids)
+        self._respond({
+            'id': str(new_id),
+            'name': data['name'][0],
+            'sectionId': path.split('/')[2],
+        })
+
+    def _count(self, verb):
+        time.sleep(0.01)
+        path = urlparse.urlparse(self.path).path.replace('/sms/v1', '', 1)
+        key = '{} {}'.format(verb, '/sections/{id}/assignments'
+            if path.endswith('/assignments') else path)
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+        return path
+
+    def _respond(self, data):
+        body = json.dumps(data)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def setup():
+    global server, base_url, store_path
+    server = _Server(('localhost', 0), _StandInHandler)
+    threading.Thread(target=server.serve_forever).start()
+
+    base_url = qs.QSLocalRequest.base_url
+    qs.QSLocalRequest.base_url = 'http://localhost:{}/sms/v1'.format(
+        server.server_address[1])
+    store_path = qs.api_keys.KEY_STORE_PATH
+    qs.api_keys.KEY_STORE_PATH = TEMP_STORE_PATH
+
+
+def teardown():
+    server.shutdown()
+    server.server_close()
+    qs.QSLocalRequest.base_url = base_url
+    qs.api_keys.KEY_STORE_PATH = store_path
+
+
+def test_shared_wrapper():
+    q = qs.API('stresstest.fakeapikey', server='local')
+    start = threading.Event()
+    errors = []
+    posted = []
+
+    def work(thread_number):
+        start.wait()
+        try:
+            assert_equals(len(q.get_students()), len(STUDENTS))
+            sections = q.get_sections()
+            assert_equals(len(sections), len(SECTIONS))
+            assert_equals(len(q.get_teachers()), len(TEACHERS))
+            assert_equals(q.get_student('7')['fullName'], 'Student 7')
+            for i in range(ASSIGNMENTS_PER_THREAD):
+                section = sections[(thread_number + i) % len(sections)]
+                posted.append(q.post_assignment(
+                    section['id'],
+                    'Assignment {} {}'.format(thread_number, i),
+                    '2016-01-01',
+                    10)['id'])
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=work, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    assert_equals(errors, [])
+    # each list is requested once, however many threads wanted it
+    counts = _StandInHandler.counts
+    for endpoint in ['/semesters', '/students', '/sections', '/teachers']:
+        assert_equals(counts['GET ' + endpoint], 1)
+
+    total = THREADS * ASSIGNMENTS_PER_THREAD
+    assert_equals(counts['POST /sections/{id}/assignments'], total)
+    assert_equals(len(set(posted)), total)
+    cached = q._assignment_cache.get(by_id=True)
+    assert_equals(sorted(cached), sorted(posted))
+    assert_equals(qs.api_keys.get(['qs', 'local', 'stresstest']),
+        'stresstest.fakeapikey')
+    qs.api_keys.remove(['qs', 'local', 'stresstest'])
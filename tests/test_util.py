@@ -53,6 +53,12 @@ def test_merge():
     assert_equals(qs.merge({1: 1}, {2: 2}, {3: 3}), {1: 1, 2: 2, 3: 3})
 
 
+def test_chunks():
+    assert_equals(qs.chunks([1, 2, 3], 2), [[1, 2], [3]])
+    assert_equals(qs.chunks([1, 2, 3]), [[1, 2, 3]])
+    assert_equals(qs.chunks([], 2), [])
+
+
 def test_clean_id():
     good_inputs = [1234, u'1234', '1234', '1g5H6', 0]
     for good_input in good_inputs:
@@ -177,6 +183,19 @@ def test_unicode_decode():
     assert_equals(len(dec_utf_8), 1)
 
 
+def test_unicode_decode_with_encoding():
+    assert_equals(qs.unicode_decode('\xe2\x82\xac5', 'utf-8'), u'\u20ac5')
+    # falls back to detecting the encoding if the string isn't valid in it
+    assert_equals(qs.unicode_decode('\xf3', 'utf-8'), u'\xf3')
+
+
+def test_detect_encoding():
+    with open('._qstest_encoding.txt', 'w') as f:
+        f.write('plain ascii')
+    assert_equals(qs.detect_encoding('._qstest_encoding.txt'), 'utf-8')
+    os.remove('._qstest_encoding.txt')
+
+
 def teardown():
     os.remove('._qstest.txt')
     os.remove('._qstest(5).txt')
@@ -0,0 +1,98 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Benchmark reading a CSV with qs.CSV, which detects the encoding once per
+file, against detecting it for every cell (how qs.CSV used to read). Also
+times reading the last 100 rows with qs.IndexedCSV, the first time (building
+its row index) and again (loading the saved index).
+
+Usage:
+    ./benchmark_csv_reading.py [{rows}]
+
+Params:
+    rows: the number of rows in the generated CSV. Defaults to 100000.
+
+Outputs:
+    The seconds each way takes, and whether they read the same rows.
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import tempfile
+import qs
+
+COLUMNS = ['Student ID', 'Full Name', 'Section', 'Grade', 'Comment']
+NAMES = ['Jane Doe', 'Jos\xc3\xa9 Mu\xc3\xb1oz', 'Zo\xc3\xab Smith', 'Ana Li']
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'benchmark.csv')
+        _write_csv(path, row_count)
+
+        start = time.time()
+        per_file = qs.CSV(path).rows
+        per_file_seconds = time.time() - start
+
+        start = time.time()
+        per_cell = _read_detecting_per_cell(path)
+        per_cell_seconds = time.time() - start
+
+        indexed_seconds = []
+        for _ in range(2):
+            start = time.time()
+            with qs.IndexedCSV(path) as indexed_csv:
+                last_rows = indexed_csv[-100:]
+            indexed_seconds.append(time.time() - start)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    qs.logger.info('CSV reading benchmark', {
+        'rows': row_count,
+        'seconds detecting per file': round(per_file_seconds, 2),
+        'seconds detecting per cell': round(per_cell_seconds, 2),
+        'same rows': per_file == per_cell,
+        'seconds for the last 100 rows, indexing': round(
+            indexed_seconds[0], 3),
+        'seconds for the last 100 rows, indexed': round(
+            indexed_seconds[1], 3),
+        'same last 100 rows': last_rows == per_file[-100:],
+    }, cc_print=True)
+
+
+def _write_csv(path, row_count):
+    with open(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in xrange(row_count):
+            writer.writerow([
+                i,
+                NAMES[i % len(NAMES)],
+                'Section {}'.format(i % 40),
+                'ABCDF'[i % 5],
+                'caf\xc3\xa9 {}'.format(i) if i % 7 == 0 else '',
+            ])
+
+
+def _read_detecting_per_cell(path):
+    rows = []
+    with open(path, 'rU') as f:
+        for row in csv.DictReader(f):
+            if not any(v for k, v in row.iteritems()):
+                continue
+            rows.append({
+                _decoded(key): _decoded(val)
+                for key, val in row.iteritems()
+            })
+    return rows
+
+
+def _decoded(val):
+    return qs.unicode_decode(val) if val else None
+
+
+if __name__ == '__main__':
+    main()
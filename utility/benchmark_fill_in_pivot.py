@@ -0,0 +1,129 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Benchmark filling in a pivot table CSV with qs.forward_fill, which streams
+the rows, against loading the whole CSV and filling each empty cell by
+recursing up the rows above it (how fill_in_pivot.py used to work).
+
+Each way runs in its own process, so their peak memory is measured
+separately.
+
+Usage:
+    ./benchmark_fill_in_pivot.py [{rows}]
+
+Params:
+    rows: the number of rows in the generated pivot table. Defaults to
+        500000.
+
+Outputs:
+    The seconds and peak memory each way takes, and whether they wrote the
+    same CSV.
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import resource
+import tempfile
+import multiprocessing
+import qs
+
+COLUMNS = ['School Year', 'Section', 'Student', 'Assignment', 'Grade']
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'pivot.csv')
+        _write_pivot(path, row_count)
+        streaming = _run_in_process(_fill_streaming, path)
+        recursive = _run_in_process(_fill_recursive, path)
+        with open(streaming['filepath']) as f, \
+                open(recursive['filepath']) as g:
+            same_csv = f.read() == g.read()
+    finally:
+        shutil.rmtree(temp_dir)
+
+    qs.logger.info('Pivot fill benchmark', {
+        'rows': row_count,
+        'seconds streaming': streaming['seconds'],
+        'seconds recursive': recursive['seconds'],
+        'peak MB streaming': streaming['peak MB'],
+        'peak MB recursive': recursive['peak MB'],
+        'same CSV': same_csv,
+    }, cc_print=True)
+
+
+def _fill_streaming(path):
+    csv = qs.CSV(path, stream=True)
+    cols_to_fill = qs.pivot_cols_to_fill(csv, csv.cols)
+    with qs.CSVWriter(path, csv.cols) as writer:
+        writer.writerows(qs.forward_fill(csv, cols_to_fill))
+    return writer.filepath
+
+
+def _fill_recursive(path):
+    csv = qs.CSV(path)
+    cols_to_fill = []
+    for col in csv.cols:
+        if all(row[col] for row in csv):
+            break
+        cols_to_fill.append(col)
+
+    def resolve_val(row_index, col):
+        row = csv[row_index]
+        if row[col]:
+            return row[col]
+        elif row_index > 0:
+            return resolve_val(row_index - 1, col)
+        return None
+
+    for row_index in range(len(csv)):
+        for col in cols_to_fill:
+            csv[row_index][col] = resolve_val(row_index, col)
+    return csv.save()
+
+
+def _run_in_process(fill, path):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_timed, args=(fill, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def _timed(fill, path, results):
+    start = time.time()
+    filepath = fill(path)
+    results.put({
+        'filepath': filepath,
+        'seconds': round(time.time() - start, 2),
+        # ru_maxrss is in KB on Linux, and bytes on OS X
+        'peak MB': round(resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss / (
+                1024.0 ** 2 if sys.platform == 'darwin' else 1024.0), 1),
+    })
+
+
+def _write_pivot(path, row_count):
+    """A pivot table of grades, with each year, section and student only on
+    the first of their rows.
+    """
+    with open(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in xrange(row_count):
+            writer.writerow([
+                2000 + i // 100000 if i % 100000 == 0 else '',
+                'Section {}'.format(i // 1000) if i % 1000 == 0 else '',
+                'Student {}'.format(i // 10) if i % 10 == 0 else '',
+                'Assignment {}'.format(i % 10),
+                'ABCDF'[i % 5] if i % 7 else '',
+            ])
+
+
+if __name__ == '__main__':
+    main()
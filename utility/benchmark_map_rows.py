@@ -0,0 +1,82 @@
+#!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
+"""Benchmark titlecasing every cell of a CSV with qs.CSV.map_rows (like
+titlecase_all.py does), with 1 process and then with more, up to one per CPU.
+
+Usage:
+    ./benchmark_map_rows.py [{rows}]
+
+Params:
+    rows: the number of rows in the generated CSV, which has 10 columns.
+        Defaults to 100000 (a million cells).
+
+Outputs:
+    The seconds each number of processes takes, and whether they all wrote
+    the same rows.
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import tempfile
+import multiprocessing
+import qs
+from titlecase_all import titlecase_row
+
+COLUMNS = ['Column {}'.format(i) for i in range(10)]
+WORDS = ['the', 'quick', 'BROWN', 'fox', 'of', 'macon', 'po box', 'an']
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    temp_dir = tempfile.mkdtemp()
+    seconds = {}
+    outputs = []
+    try:
+        path = os.path.join(temp_dir, 'benchmark.csv')
+        _write_csv(path, row_count)
+        for processes in _process_counts():
+            start = time.time()
+            output_path = qs.CSV(path, stream=True).map_rows(
+                titlecase_row, processes=processes)
+            seconds['seconds with {} processes'.format(processes)] = round(
+                time.time() - start, 2)
+            with open(output_path) as f:
+                outputs.append(f.read())
+            os.remove(output_path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    results = {
+        'cells': row_count * len(COLUMNS),
+        'cpus': multiprocessing.cpu_count(),
+        'same rows': len(set(outputs)) == 1,
+    }
+    results.update(seconds)
+    qs.logger.info('map_rows benchmark', results, cc_print=True)
+
+
+def _process_counts():
+    cpus = multiprocessing.cpu_count()
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def _write_csv(path, row_count):
+    with open(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in xrange(row_count):
+            writer.writerow([
+                ' '.join(WORDS[(i + j) % len(WORDS):][:3])
+                for j in range(len(COLUMNS))
+            ])
+
+
+if __name__ == '__main__':
+    main()
@@ -24,47 +24,32 @@ in it, indicating that blank cells after that column are actually blank data as
 opposed to fields to be filled.
 
 Example input sheet:
-examples/fill_in_pivot.sample.csv
+examples/fill_in_pivot.example.csv
+
+Each row is filled from the last value above it in each column, in one pass
+that only keeps those last values in memory.
 
 CLI Usage:
 python fill_in_pivot.py {pivot CSV filename}
 """
 
+import os
 import sys
 import qs
 
 
 def main():
     filename = sys.argv[1]
-    csv = qs.CSV(filename)
-
-    cols_to_fill = get_cols_to_fill(csv)
-
-    for row_index in range(0, len(csv)):
-        row = csv[row_index]
-        for col in cols_to_fill:
-            row[col] = resolve_val(row_index, col, csv)
-    csv.save()
-
-
-def get_cols_to_fill(csv):
-    to_fill = []
-    for col in csv.cols:
-        if all(row[col] for row in csv):
-            break
-        else:
-            to_fill.append(col)
-    return to_fill
+    # streamed, so the CSV never has to fit in memory. It's read twice: once
+    # to find the columns to fill, then again to fill them
+    csv = qs.CSV(filename, stream=True)
 
+    cols_to_fill = qs.pivot_cols_to_fill(csv, csv.cols)
+    # written next to the CSV while it's still being read, then moved over it
+    with qs.CSVWriter(qs.unique_path(filename), csv.cols) as writer:
+        writer.writerows(qs.forward_fill(csv, cols_to_fill))
+    os.rename(writer.filepath, filename)
 
-def resolve_val(row_index, col, csv):
-    row = csv[row_index]
-    if row[col]:
-        return row[col]
-    elif row_index > 0:
-        return resolve_val(row_index - 1, col, csv)
-    else:
-        return None
 
 if __name__ == '__main__':
     main()
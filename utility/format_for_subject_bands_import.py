@@ -42,28 +42,32 @@ def main():
     else:
         qs.logger.info('Student names are unique.')
 
-    if ignore_case is True:
-        for student in db_students:
-            student['fullName'] = student['fullName'].lower()
-    db_by_name = qs.dict_list_to_dict(db_students, 'fullName')
+    resolver = qs.NameResolver(db_students, ignore_case=ignore_case)
 
     student_names_not_matched = set()
+    similar_names = {}
     for csv_student in csv_students:
         if 'Full Name' in csv_student:
             csv_full_name = csv_student['Full Name']
         else:
-            csv_full_name = '{}, {}'.format(
+            csv_full_name = u'{}, {}'.format(
                 csv_student['Last'],
                 csv_student['First'])
 
-        csv_original_full_name = csv_full_name
-        if ignore_case:
-            csv_full_name = csv_full_name.lower()
-        db_match = db_by_name.get(csv_full_name)
-        if db_match:
-            csv_student['Student ID'] = db_match['id']
+        match = resolver.resolve(csv_full_name)
+        if match:
+            csv_student['Student ID'] = match['record']['id']
+            if match['confidence'] < 1:
+                csv_student['Match Confidence'] = match['confidence']
+                similar_names[csv_full_name] = match['record']['fullName']
         else:
-            student_names_not_matched.add(csv_original_full_name)
+            student_names_not_matched.add(csv_full_name)
+
+    if similar_names:
+        qs.logger.warning(
+            ('{} students were matched to a similar name in the db, see the '
+                'Match Confidence column'.format(len(similar_names))),
+            similar_names)
 
     if student_names_not_matched:
         qs.logger.warning(
@@ -24,22 +24,27 @@ import qs
 def main():
     filename = sys.argv[1]
     overwrite = qs.to_bool(sys.argv[2]) if len(sys.argv) > 2 else False
-    csv = qs.CSV(filename)
-
-    csv.cols.insert(csv.cols.index('Full Name') + 1, 'First')
-    csv.cols.insert(csv.cols.index('Full Name') + 2, 'Last')
-    for row in csv:
-        full_name = row['Full Name'].strip()
-        split_by_comma = full_name.split(',')
-        split_by_space = full_name.split(' ')
-
-        if len(split_by_comma) == 2:
-            row['First'] = split_by_comma[1].strip()
-            row['Last'] = split_by_comma[0].strip()
-        elif len(split_by_space) == 2:
-            row['First'] = split_by_space[0].strip()
-            row['Last'] = split_by_space[1].strip()
-    csv.save("with first last", overwrite=overwrite)
+    # streamed, so the CSV never has to fit in memory
+    csv = qs.CSV(filename, stream=True, required_cols=['Full Name'])
+
+    cols = list(csv.cols)
+    cols.insert(cols.index('Full Name') + 1, 'First')
+    cols.insert(cols.index('Full Name') + 2, 'Last')
+    csv.map_rows(add_first_last, cols=cols, overwrite=overwrite)
+
+
+def add_first_last(row):
+    full_name = (row['Full Name'] or '').strip()
+    split_by_comma = full_name.split(',')
+    split_by_space = full_name.split(' ')
+
+    if len(split_by_comma) == 2:
+        row['First'] = split_by_comma[1].strip()
+        row['Last'] = split_by_comma[0].strip()
+    elif len(split_by_space) == 2:
+        row['First'] = split_by_space[0].strip()
+        row['Last'] = split_by_space[1].strip()
+    return row
 
 
 if __name__ == '__main__':
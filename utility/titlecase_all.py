@@ -1,8 +1,11 @@
 #!/Library/Frameworks/Python.framework/Versions/2.7/bin/python
 """Titlecase all cells (except for headers) in a CSV
 
+The CSV is titlecased in place. The rows are titlecased across a pool of
+processes, one per CPU unless processes is supplied.
+
 CLI Usage:
-python titlecase_all.py filepath
+python titlecase_all.py filepath [processes]
 """
 
 import sys
@@ -12,13 +15,16 @@ import qs
 
 def main():
     filepath = os.path.expanduser(sys.argv[1])
-    csv = qs.CSV(filepath)
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    csv = qs.CSV(filepath, stream=True)
+    csv.map_rows(titlecase_row, overwrite=True, processes=processes)
 
-    for row in csv:
-        for key, value in row.iteritems():
-            row[key] = qs.tc(value)
 
-    csv.save()
+def titlecase_row(row):
+    return {
+        key: qs.tc(value) if value else value
+        for key, value in row.iteritems()
+    }
 
 if __name__ == '__main__':
     main()